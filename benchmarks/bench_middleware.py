@@ -0,0 +1,106 @@
+"""
+Measure the latency the middleware stack adds to every request.
+
+Requests are driven straight through the ASGI interface, so the numbers
+contain no HTTP client or socket overhead. The previous decorator-based
+(BaseHTTPMiddleware) timing middleware is measured for comparison.
+
+Usage:
+    python -m benchmarks.bench_middleware --requests 5000
+"""
+import argparse
+import asyncio
+import time
+from typing import Dict
+
+from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
+
+from benchmarks.common import print_table
+from src.api.middleware import CompressionMiddleware, PerformanceMiddleware
+from src.services.monitoring_service import monitoring
+
+SCOPE = {
+    "type": "http", "method": "GET", "path": "/ping", "raw_path": b"/ping", "query_string": b"",
+    "headers": [(b"accept-encoding", b"gzip")], "root_path": "", "scheme": "http",
+    "server": ("bench", 80), "client": ("bench", 1), "http_version": "1.1",
+}
+
+
+def build_app(stack: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("pong")
+
+    if stack == "asgi":
+        app.add_middleware(CompressionMiddleware, minimum_size=1024, compresslevel=5)
+        app.add_middleware(PerformanceMiddleware)
+    elif stack == "base_http":
+        @app.middleware("http")
+        async def add_performance_monitoring(request: Request, call_next):
+            start_time = time.time()
+            response = await call_next(request)
+            process_time = time.time() - start_time
+            response.headers["X-Process-Time"] = str(process_time)
+            monitoring.log_api_performance(
+                endpoint=str(request.url.path),
+                method=request.method,
+                response_time=process_time,
+                status_code=response.status_code
+            )
+            return response
+    return app
+
+
+async def request_once(app: FastAPI):
+    """One request whose client disconnects after receiving the complete response."""
+    done = asyncio.Event()
+    received = False
+
+    async def receive():
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            done.set()
+
+    await app(dict(SCOPE), receive, send)
+
+
+async def drive(app: FastAPI, requests: int) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        await request_once(app)
+    return time.perf_counter() - start
+
+
+def run(requests: int = 5000) -> Dict[str, Dict[str, float]]:
+    results = {}
+    baseline = None
+    for name, stack in (("no middleware", "none"), ("pure ASGI stack", "asgi"),
+                        ("BaseHTTPMiddleware (previous)", "base_http")):
+        app = build_app(stack)
+        asyncio.run(drive(app, 200))  # warm up
+        per_request = asyncio.run(drive(app, requests)) / requests * 1e6
+        if baseline is None:
+            baseline = per_request
+        results[name] = {"per_request_us": per_request, "added_us": per_request - baseline}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Middleware overhead benchmark")
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+    print_table("Middleware overhead (microseconds per request)", run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
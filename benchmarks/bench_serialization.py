@@ -0,0 +1,94 @@
+"""
+Compare serialization time and payload size for large `/costs/daily` payloads.
+
+Usage:
+    python -m benchmarks.bench_serialization --rows 1000000
+"""
+import argparse
+import json
+import time
+from datetime import date, timedelta
+from typing import Callable, Dict, List, Any, Tuple
+
+from src.api.routes import CostResponse
+from src.api import responses
+
+SERVICES = ["Amazon EC2", "Amazon RDS", "Amazon S3", "AWS Lambda", "Amazon CloudFront",
+            "Amazon DynamoDB", "Amazon EKS", "AWS Glue"]
+
+
+def make_columns(rows: int) -> Dict[str, List[Any]]:
+    """Build synthetic cost columns as they come out of a column query."""
+    start = date(2023, 1, 1)
+    return {
+        "id": list(range(1, rows + 1)),
+        "date": [start + timedelta(days=i // 400) for i in range(rows)],
+        "service": [SERVICES[i % len(SERVICES)] for i in range(rows)],
+        "cost": [round((i % 977) * 0.37, 4) for i in range(rows)],
+        "usage": [float(i % 113) for i in range(rows)],
+        "account_id": [f"{100000000000 + i % 40}" for i in range(rows)],
+    }
+
+
+def baseline_pydantic(columns: Dict[str, List[Any]]) -> bytes:
+    """The original path: one dict and one validated model per row, stdlib JSON."""
+    names = list(columns)
+    rows = [dict(zip(names, row)) for row in zip(*columns.values())]
+    models = [CostResponse(**{**row, "date": str(row["date"])}) for row in rows]
+    return json.dumps([m.model_dump() for m in models]).encode()
+
+
+def timed(fn: Callable[[], bytes]) -> Tuple[float, bytes]:
+    start = time.perf_counter()
+    body = fn()
+    return time.perf_counter() - start, body
+
+
+def run(rows: int, skip_baseline: bool = False) -> List[Dict[str, Any]]:
+    columns = make_columns(rows)
+    cases = []
+    if not skip_baseline:
+        cases.append(("pydantic + json (baseline)", lambda: baseline_pydantic(columns)))
+    cases.append(("json rows (orjson)" if responses.orjson else "json rows (stdlib)",
+                  lambda: responses.encode_json_rows(columns)))
+    if responses.msgpack is not None:
+        cases.append(("msgpack columns", lambda: responses.encode_msgpack(columns)))
+    try:
+        import pyarrow  # noqa: F401
+        cases.append(("arrow ipc", lambda: responses.encode_arrow(columns)))
+    except ImportError:
+        pass
+
+    results = []
+    json_body = None
+    for name, fn in cases:
+        seconds, body = timed(fn)
+        results.append({"case": name, "seconds": seconds, "bytes": len(body)})
+        if name.startswith("json rows"):
+            json_body = body
+
+    if json_body is not None:
+        seconds, body = timed(lambda: responses.compress_body(json_body, "gzip")[0])
+        results.append({"case": "  + gzip", "seconds": seconds, "bytes": len(body)})
+        if responses.brotli is not None:
+            seconds, body = timed(lambda: responses.compress_body(json_body, "br")[0])
+            results.append({"case": "  + brotli", "seconds": seconds, "bytes": len(body)})
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--skip-baseline", action="store_true",
+                        help="Skip the slow per-row Pydantic baseline")
+    args = parser.parse_args()
+
+    print(f"Serialization benchmark: {args.rows:,} rows")
+    print(f"{'case':<28}{'time (s)':>10}{'size (MB)':>12}")
+    for result in run(args.rows, args.skip_baseline):
+        print(f"{result['case']:<28}{result['seconds']:>10.3f}{result['bytes'] / 1e6:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""
+Micro-benchmarks for the analytic services and ingestion.
+
+Usage:
+    python -m benchmarks.bench_services --accounts 10 --services 20 --days 180
+"""
+import argparse
+import os
+import tempfile
+from datetime import date, timedelta
+from typing import Dict
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import measure, print_table
+from benchmarks.data_generator import generate_cost_rows, populate_database
+from src.models.database import Base
+from src.services.cost_cube import CostCube
+
+
+def run(accounts: int = 10, services: int = 20, days: int = 180, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Populate a temporary SQLite database and time each service against it."""
+    from src.services.anomaly_detection import AnomalyDetector
+    from src.services.aggregation_service import CostAggregationService
+    from src.services.ingestion_service import IngestionService
+    from src.services.simulation_engine import SimulationEngine
+    from src.api.routes import simulate_budget
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        rows = populate_database(engine, accounts, services, days)
+        Session = sessionmaker(bind=engine)
+        db = Session()
+        suffix = f"[{rows:,} rows]"
+
+        results[f"anomaly_detector {suffix}"] = measure(
+            lambda: AnomalyDetector(db).get_all_recommendations(), repeat=repeat)
+        results[f"simulate_budget {suffix}"] = measure(
+            lambda: simulate_budget(budget_amount=1_000_000, months=12, current_user=None, db=db), repeat=repeat)
+        grid = dict(stop_idle=[i / 10 for i in range(11)], commitment_coverage=[i / 10 for i in range(11)],
+                    commitment_plans=["reserved_1yr", "reserved_3yr", "savings_plan_1yr", "savings_plan_3yr"],
+                    spot_fraction=[i / 10 for i in range(6)], rds_downsize=[0.0, 0.5, 1.0])
+        results[f"simulation_engine [8,712 scenarios x {min(days, 90)}d]"] = measure(
+            lambda: SimulationEngine(db).rank_scenarios(days=min(days, 90), **grid), repeat=repeat)
+        results[f"aggregate_month_by_service {suffix}"] = measure(
+            lambda: CostAggregationService(db).aggregate(
+                bucket="month", start_date=date.today() - timedelta(days=days)), repeat=repeat)
+
+        from src.models.budget_model import Budget
+        from src.services.budget_service import BudgetService
+        db.bulk_insert_mappings(Budget, [
+            {"name": f"budget-{i}", "tenant": f"tenant-{i % 50}", "account_id": str(100000000000 + i % accounts),
+             "service": None if i % 3 else "Amazon EC2", "amount": 1000.0 + i, "thresholds": "50,80,100"}
+            for i in range(10_000)
+        ])
+        db.commit()
+        results["budget_threshold_check [10,000 budgets]"] = measure(
+            lambda: BudgetService(db).check_thresholds(send_alerts=False), repeat=repeat)
+
+        from src.models.allocation_model import AllocationRule
+        from src.services.allocation_service import AllocationService
+        db.add_all([
+            AllocationRule(name="team-a", method="direct", targets="team-a", priority=10, account_pattern="10000000000[0-4]"),
+            AllocationRule(name="team-b", method="direct", targets="team-b", priority=10, account_pattern="10000000000[5-9]"),
+            AllocationRule(name="databases", method="fixed", targets="team-a:2,team-b:1", priority=20, service_pattern="*RDS*"),
+            AllocationRule(name="shared", method="proportional", targets="*", priority=30, service_pattern="*S3*"),
+        ])
+        db.commit()
+        results[f"allocation_rebuild {suffix}"] = measure(lambda: AllocationService(db).rebuild_all(), repeat=repeat)
+
+        results[f"cost_cube_load {suffix}"] = measure(lambda: CostCube().load(db), repeat=repeat)
+
+        try:
+            from src.services.ai_recommendations import AIRecommendationService
+            service = AIRecommendationService()
+            cube = CostCube.snapshot_for(db)
+            results[f"prepare_cost_summary {suffix}"] = measure(
+                lambda: [service._prepare_cost_summary(summary) for summary in service.build_account_summaries(cube)],
+                repeat=repeat)
+        except ImportError as e:
+            print(f"Skipping prepare_cost_summary: {e}")
+
+        db.close()
+        engine.dispose()
+
+    # Ingestion of one day for every (account, service) pair into an empty database
+    batch = [
+        {"date": d.isoformat(), "service": s, "cost": c, "usage": u, "account_id": a, "region": r}
+        for d, s, c, u, a, r in generate_cost_rows(accounts, services, 1)
+    ]
+
+    def ingest():
+        ingest_engine = create_engine("sqlite://")
+        Base.metadata.create_all(bind=ingest_engine)
+        session = sessionmaker(bind=ingest_engine)()
+        ingestion = IngestionService(session)
+        ingestion.store_cost_records(batch)
+        ingestion.on_ingestion_complete()
+        session.close()
+        ingest_engine.dispose()
+
+    results[f"ingestion [{len(batch):,} records]"] = measure(ingest, repeat=repeat)
+
+    # CUR import of hourly line items for 30 days of (account, service) pairs into an empty database
+    import csv
+    import gzip
+    from src.services.cur_import import CurImportService
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cur.csv.gz")
+        line_items = 0
+        with gzip.open(path, "wt", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["lineItem/UsageStartDate", "lineItem/UsageAccountId", "product/ProductName",
+                             "product/region", "lineItem/UsageAmount", "lineItem/UnblendedCost"])
+            for d, s, c, u, a, r in generate_cost_rows(accounts, services, 30):
+                for hour in range(24):
+                    writer.writerow([f"{d.isoformat()}T{hour:02d}:00:00Z", a, s, r, u / 24, c / 24])
+                    line_items += 1
+
+        def import_cur():
+            import_engine = create_engine("sqlite://")
+            Base.metadata.create_all(bind=import_engine)
+            session = sessionmaker(bind=import_engine)()
+            CurImportService(session).import_file(path, refresh=False)
+            session.close()
+            import_engine.dispose()
+
+        results[f"cur_import [{line_items:,} line items]"] = measure(import_cur, repeat=repeat)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Service micro-benchmarks")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print_table("Service micro-benchmarks (ms)", run(args.accounts, args.services, args.days, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
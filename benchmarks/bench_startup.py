@@ -0,0 +1,98 @@
+"""
+Import-time profile of the application entry point.
+
+Runs `python -X importtime -c "import src.main"` in fresh interpreters and
+reports the total import time, the slowest top-level imports and whether
+heavy optional dependencies were loaded eagerly.
+
+Usage:
+    python -m benchmarks.bench_startup --repeat 5 --top 15
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks.common import print_table
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("boto3", "openai", "smtplib", "requests", "apscheduler", "numpy")
+PROBE = (
+    "import sys, src.main; "
+    f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+)
+
+
+def profile_import(module: str = "src.main") -> Tuple[int, Dict[str, int], List[str]]:
+    """
+    Import `module` in a fresh interpreter with -X importtime.
+
+    Returns:
+        Tuple of (total microseconds, cumulative microseconds per direct
+        child import of `module`, heavy modules loaded)
+    """
+    env = dict(os.environ, SCHEDULER_ENABLED="0")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE.replace("src.main", module)],
+        capture_output=True, text=True, cwd=PROJECT_ROOT, env=env, check=True,
+    )
+
+    # Lines look like "import time: <self> | <cumulative> | <indent><name>" and
+    # children are printed before their parent
+    total = 0
+    children: Dict[str, int] = {}
+    pending: Dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, raw_name = line.split("|")
+        name = raw_name.strip()
+        level = (len(raw_name) - len(raw_name.lstrip()) - 1) // 2
+        if level == 1:
+            pending[name] = int(cumulative_us)
+        elif level == 0:
+            if name == module:
+                total = int(cumulative_us)
+                children = pending
+            pending = {}
+
+    loaded = [m for m in proc.stdout.strip().split(",") if m]
+    return total, children, loaded
+
+
+def run(repeat: int = 5, top: int = 10) -> Dict[str, Dict[str, float]]:
+    totals = []
+    children = {}
+    loaded = []
+    for _ in range(repeat):
+        total, children, loaded = profile_import()
+        totals.append(total / 1000)
+
+    results = {
+        "import src.main": {
+            "min_ms": min(totals),
+            "median_ms": statistics.median(totals),
+            "max_ms": max(totals),
+        }
+    }
+    slowest = sorted(children.items(), key=lambda item: item[1], reverse=True)[:top]
+    print("\nSlowest imports of src.main (last run, cumulative ms):")
+    for name, micros in slowest:
+        print(f"  {name:<48}{micros / 1000:>10.2f}")
+    print(f"Heavy modules loaded at import: {', '.join(loaded) or 'none'}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import-time profile")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    print_table("Startup (ms)", run(args.repeat, args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Shared timing, reporting and baseline helpers for the benchmark suite."""
+import json
+import os
+import statistics
+import time
+from typing import Any, Callable, Dict, List, Sequence
+
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "baselines.json")
+# A result is a regression when it is this much slower than its baseline
+REGRESSION_TOLERANCE = 0.25
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the pct-th percentile (0-100) using linear interpolation."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5, warmup: int = 1) -> Dict[str, float]:
+    """Time `fn` several times and summarize the samples in milliseconds."""
+    for _ in range(warmup):
+        fn()
+
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "min_ms": min(samples),
+        "median_ms": statistics.median(samples),
+        "p95_ms": percentile(samples, 95),
+        "max_ms": max(samples),
+    }
+
+
+def print_table(title: str, results: Dict[str, Dict[str, float]]):
+    """Print benchmark results as a fixed-width table."""
+    print(f"\n{title}")
+    if not results:
+        print("  (no results)")
+        return
+    keys = list(next(iter(results.values())).keys())
+    print(f"  {'name':<48}" + "".join(f"{k:>14}" for k in keys))
+    for name, values in results.items():
+        print(f"  {name:<48}" + "".join(f"{values[k]:>14.2f}" for k in keys))
+
+
+def load_baselines(path: str = BASELINE_PATH) -> Dict[str, Any]:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baselines(results: Dict[str, Any], path: str = BASELINE_PATH):
+    rounded = {
+        group: {name: {k: round(v, 2) for k, v in values.items()} for name, values in entries.items()}
+        for group, entries in results.items()
+    }
+    with open(path, "w") as f:
+        json.dump(rounded, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def find_regressions(results: Dict[str, Dict[str, float]], baselines: Dict[str, Dict[str, float]],
+                     metric: str = "median_ms", tolerance: float = REGRESSION_TOLERANCE) -> List[str]:
+    """
+    Compare results against stored baselines.
+
+    Returns:
+        Human readable descriptions of every benchmark slower than its baseline
+        by more than `tolerance`
+    """
+    regressions = []
+    for name, values in results.items():
+        baseline = baselines.get(name, {}).get(metric)
+        current = values.get(metric)
+        if baseline and current is not None and current > baseline * (1 + tolerance):
+            regressions.append(
+                f"{name}: {metric} {current:.2f} vs baseline {baseline:.2f} "
+                f"(+{(current / baseline - 1) * 100:.0f}%)"
+            )
+    return regressions
@@ -0,0 +1,140 @@
+"""
+HTTP load scenario for the main API endpoints.
+
+Runs against a live server (--base-url) or, by default, in-process against the
+ASGI app backed by a temporary synthetic database. Reports throughput and
+latency percentiles per endpoint.
+
+Usage:
+    python -m benchmarks.load_test --concurrency 20 --duration 15
+    python -m benchmarks.load_test --base-url http://localhost:8000 --token <jwt>
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import percentile, print_table
+
+ENDPOINTS = [
+    ("GET", "/health"),
+    ("GET", "/costs/daily"),
+    ("GET", "/costs/aggregate?bucket=week"),
+    ("GET", "/recommendations"),
+    ("GET", "/monitoring/health"),
+    ("POST", "/budget/simulate?budget_amount=100000"),
+]
+
+
+async def _worker(client: httpx.AsyncClient, deadline: float, endpoints, samples: Dict[str, List[float]],
+                  errors: Dict[str, int], offset: int):
+    i = offset
+    while time.perf_counter() < deadline:
+        method, path = endpoints[i % len(endpoints)]
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            failed = True
+        samples[path].append((time.perf_counter() - start) * 1000)
+        if failed:
+            errors[path] += 1
+
+
+async def run_load(client: httpx.AsyncClient, concurrency: int, duration: float,
+                   endpoints=ENDPOINTS) -> Dict[str, Dict[str, float]]:
+    """Drive the endpoints round-robin from `concurrency` workers for `duration` seconds."""
+    samples = {path: [] for _, path in endpoints}
+    errors = {path: 0 for _, path in endpoints}
+    deadline = time.perf_counter() + duration
+
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _worker(client, deadline, endpoints, samples, errors, offset) for offset in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+
+    results = {}
+    for path, latencies in samples.items():
+        results[path] = {
+            "requests": len(latencies),
+            "rps": len(latencies) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+            "p99_ms": percentile(latencies, 99),
+            "errors": errors[path],
+        }
+    return results
+
+
+def _in_process_client(tmp: str, accounts: int, services: int, days: int) -> httpx.AsyncClient:
+    """Point the app at a synthetic database and bypass authentication."""
+    from unittest.mock import MagicMock
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from benchmarks.data_generator import populate_database
+    from src.main import app
+    from src.models.database import get_db
+    from src.api.auth_routes import get_current_user
+    from src.api import rate_limits
+
+    # Measure endpoint latency, not the per-user throttling of expensive endpoints
+    rate_limits.RATE_LIMIT_ENABLED = False
+
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'load.db')}",
+                           connect_args={"check_same_thread": False})
+    populate_database(engine, accounts, services, days)
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+    def get_load_db():
+        db = Session()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_load_db
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="loadtest")
+    return httpx.AsyncClient(app=app, base_url="http://loadtest")
+
+
+def run(base_url: Optional[str] = None, token: Optional[str] = None, concurrency: int = 10,
+        duration: float = 10.0, accounts: int = 5, services: int = 10, days: int = 90) -> Dict[str, Dict[str, float]]:
+    with tempfile.TemporaryDirectory() as tmp:
+        if base_url:
+            headers = {"Authorization": f"Bearer {token}"} if token else {}
+            client = httpx.AsyncClient(base_url=base_url, headers=headers, timeout=30)
+        else:
+            client = _in_process_client(tmp, accounts, services, days)
+
+        async def _run():
+            async with client:
+                return await run_load(client, concurrency, duration)
+
+        return asyncio.run(_run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="API load test")
+    parser.add_argument("--base-url", help="Target a running server instead of the in-process app")
+    parser.add_argument("--token", default=os.getenv("LOADTEST_TOKEN"), help="Bearer token for --base-url")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--accounts", type=int, default=5)
+    parser.add_argument("--services", type=int, default=10)
+    parser.add_argument("--days", type=int, default=90)
+    args = parser.parse_args()
+
+    results = run(args.base_url, args.token, args.concurrency, args.duration,
+                  args.accounts, args.services, args.days)
+    print_table(f"Load test: {args.concurrency} workers for {args.duration:.0f}s", results)
+
+
+if __name__ == "__main__":
+    main()
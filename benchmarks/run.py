@@ -0,0 +1,77 @@
+"""
+Run the benchmark suite and compare against stored baselines.
+
+Exits with status 1 when any benchmark is slower than its baseline by more
+than the regression tolerance, so it can gate CI.
+
+Usage:
+    python -m benchmarks.run                    # services only, compare to baselines
+    python -m benchmarks.run --load             # include the HTTP load scenario
+    python -m benchmarks.run --update-baselines # record the current numbers
+"""
+import argparse
+import json
+import sys
+
+from benchmarks import bench_middleware, bench_services, bench_startup, load_test
+from benchmarks.common import (
+    REGRESSION_TOLERANCE, find_regressions, load_baselines, print_table, save_baselines
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--services", type=int, default=20)
+    parser.add_argument("--days", type=int, default=180)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--load", action="store_true", help="Also run the HTTP load scenario")
+    parser.add_argument("--load-duration", type=float, default=10.0)
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE)
+    parser.add_argument("--output", help="Write raw results as JSON to this path")
+    parser.add_argument("--update-baselines", action="store_true")
+    args = parser.parse_args()
+
+    results = {"startup": bench_startup.run(args.repeat)}
+    print_table("Startup (ms)", results["startup"])
+
+    results["middleware"] = bench_middleware.run()
+    print_table("Middleware overhead (microseconds per request)", results["middleware"])
+
+    results["services"] = bench_services.run(args.accounts, args.services, args.days, args.repeat)
+    print_table("Service micro-benchmarks (ms)", results["services"])
+
+    if args.load:
+        results["load"] = load_test.run(duration=args.load_duration)
+        print_table("Load test", results["load"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.update_baselines:
+        # Keep baselines for groups that were not run this time
+        save_baselines({**load_baselines(), **results})
+        print("\nBaselines updated")
+        return
+
+    baselines = load_baselines()
+    regressions = []
+    for group in ("startup", "services"):
+        regressions += find_regressions(results[group], baselines.get(group, {}), tolerance=args.tolerance)
+    regressions += find_regressions(results["middleware"], baselines.get("middleware", {}),
+                                    metric="per_request_us", tolerance=args.tolerance)
+    if "load" in results:
+        regressions += find_regressions(results["load"], baselines.get("load", {}),
+                                        metric="p95_ms", tolerance=args.tolerance)
+
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        sys.exit(1)
+    print("\nNo regressions against baselines")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Initial schema: users, cloud_costs and cost_rollups
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("username", sa.String(), nullable=False),
+        sa.Column("email", sa.String(), nullable=False),
+        sa.Column("hashed_password", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_username", "users", ["username"], unique=True)
+    op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    op.create_table(
+        "cloud_costs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.Date()),
+        sa.Column("service", sa.String(100)),
+        sa.Column("cost", sa.Float()),
+        sa.Column("usage", sa.Float()),
+        sa.Column("account_id", sa.String(50)),
+        sa.Column("region", sa.String(50), nullable=True),
+    )
+    op.create_index("ix_cloud_costs_id", "cloud_costs", ["id"])
+    op.create_index("ix_cloud_costs_date", "cloud_costs", ["date"])
+    op.create_index("ix_cloud_costs_service", "cloud_costs", ["service"])
+    op.create_index("ix_cloud_costs_account_id", "cloud_costs", ["account_id"])
+    op.create_index("ix_cloud_costs_region", "cloud_costs", ["region"])
+
+    op.create_table(
+        "cost_rollups",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("granularity", sa.String(10), nullable=False),
+        sa.Column("period_start", sa.Date(), nullable=False),
+        sa.Column("service", sa.String(100), nullable=False),
+        sa.Column("account_id", sa.String(50), nullable=False),
+        sa.Column("region", sa.String(50), nullable=True),
+        sa.Column("cost", sa.Float()),
+        sa.Column("usage", sa.Float()),
+        sa.Column("row_count", sa.Integer()),
+        sa.UniqueConstraint("granularity", "period_start", "service", "account_id", "region",
+                            name="uq_cost_rollups_key"),
+    )
+    op.create_index("ix_cost_rollups_id", "cost_rollups", ["id"])
+    op.create_index("ix_cost_rollups_period", "cost_rollups", ["granularity", "period_start"])
+
+
+def downgrade():
+    op.drop_table("cost_rollups")
+    op.drop_table("cloud_costs")
+    op.drop_table("users")
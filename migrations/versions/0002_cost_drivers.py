@@ -0,0 +1,37 @@
+"""Add cost_drivers index table
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "cost_drivers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("as_of", sa.Date(), nullable=False),
+        sa.Column("window", sa.String(10), nullable=False),
+        sa.Column("dimension", sa.String(20), nullable=False),
+        sa.Column("direction", sa.String(10), nullable=False),
+        sa.Column("rank", sa.Integer(), nullable=False),
+        sa.Column("key", sa.String(100), nullable=False),
+        sa.Column("current_cost", sa.Float()),
+        sa.Column("previous_cost", sa.Float()),
+        sa.Column("delta", sa.Float()),
+        sa.Column("delta_percent", sa.Float(), nullable=True),
+    )
+    op.create_index("ix_cost_drivers_id", "cost_drivers", ["id"])
+    op.create_index("ix_cost_drivers_lookup", "cost_drivers",
+                    ["as_of", "window", "dimension", "direction", "rank"])
+
+
+def downgrade():
+    op.drop_table("cost_drivers")
@@ -0,0 +1,35 @@
+"""Add budgets table
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "budgets",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("tenant", sa.String(100), nullable=False),
+        sa.Column("account_id", sa.String(50), nullable=True),
+        sa.Column("service", sa.String(100), nullable=True),
+        sa.Column("amount", sa.Float(), nullable=False),
+        sa.Column("thresholds", sa.String(50)),
+        sa.Column("last_alerted_period", sa.String(7), nullable=True),
+        sa.Column("last_alerted_threshold", sa.Integer()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_budgets_id", "budgets", ["id"])
+    op.create_index("ix_budgets_tenant", "budgets", ["tenant"])
+
+
+def downgrade():
+    op.drop_table("budgets")
@@ -0,0 +1,44 @@
+"""Add recommendations table
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "recommendations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("type", sa.String(30), nullable=False),
+        sa.Column("service", sa.String(100), nullable=False),
+        sa.Column("account_id", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("suggestion", sa.String(255), nullable=True),
+        sa.Column("cost", sa.Float()),
+        sa.Column("usage", sa.Float(), nullable=True),
+        sa.Column("previous_cost", sa.Float(), nullable=True),
+        sa.Column("change_percent", sa.Float(), nullable=True),
+        sa.Column("potential_savings", sa.Float()),
+        sa.Column("occurrences", sa.Integer()),
+        sa.Column("first_seen", sa.Date(), nullable=True),
+        sa.Column("last_seen", sa.Date(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("acknowledged_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("implemented_at", sa.DateTime(timezone=True), nullable=True),
+        sa.UniqueConstraint("type", "service", "account_id", name="uq_recommendations_key"),
+    )
+    op.create_index("ix_recommendations_id", "recommendations", ["id"])
+    op.create_index("ix_recommendations_status_savings", "recommendations", ["status", "potential_savings"])
+
+
+def downgrade():
+    op.drop_table("recommendations")
@@ -0,0 +1,48 @@
+"""Add allocation rules and precomputed cost allocations
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "allocation_rules",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(100), nullable=False),
+        sa.Column("priority", sa.Integer(), nullable=False),
+        sa.Column("method", sa.String(20), nullable=False),
+        sa.Column("service_pattern", sa.String(100), nullable=True),
+        sa.Column("account_pattern", sa.String(50), nullable=True),
+        sa.Column("region_pattern", sa.String(50), nullable=True),
+        sa.Column("targets", sa.String(500), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    op.create_index("ix_allocation_rules_id", "allocation_rules", ["id"])
+
+    op.create_table(
+        "cost_allocations",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("date", sa.Date(), nullable=False),
+        sa.Column("team", sa.String(100), nullable=False),
+        sa.Column("service", sa.String(100), nullable=False),
+        sa.Column("account_id", sa.String(50), nullable=False),
+        sa.Column("cost", sa.Float()),
+        sa.Column("rule_id", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_cost_allocations_id", "cost_allocations", ["id"])
+    op.create_index("ix_cost_allocations_team_date", "cost_allocations", ["team", "date"])
+    op.create_index("ix_cost_allocations_date", "cost_allocations", ["date"])
+
+
+def downgrade():
+    op.drop_table("cost_allocations")
+    op.drop_table("allocation_rules")
@@ -0,0 +1,80 @@
+"""Partition cloud_costs by month on PostgreSQL, with a BRIN index on date
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+"""
+from datetime import date
+from alembic import op
+import sqlalchemy as sa
+from src.models.partitioning import months_between, next_month, partition_ddl
+
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, date, service, cost, usage, account_id, region, payload_hash"
+BTREE_INDEXES = ("id", "service", "account_id", "region")
+
+
+def upgrade():
+    # Other databases keep the plain table
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    bind = op.get_bind()
+    op.execute("ALTER TABLE cloud_costs RENAME TO cloud_costs_unpartitioned")
+    for column in BTREE_INDEXES + ("date",):
+        op.execute(f"ALTER INDEX ix_cloud_costs_{column} RENAME TO ix_cloud_costs_unpartitioned_{column}")
+    op.execute("ALTER SEQUENCE cloud_costs_id_seq OWNED BY NONE")
+
+    # The partition key has to be part of the primary key; rows without a date
+    # cannot be routed to a partition and are not carried over
+    op.execute(
+        "CREATE TABLE cloud_costs ("
+        "id INTEGER NOT NULL DEFAULT nextval('cloud_costs_id_seq'), "
+        "date DATE NOT NULL, service VARCHAR(100), cost FLOAT, usage FLOAT, "
+        "account_id VARCHAR(50), region VARCHAR(50), payload_hash VARCHAR(16), "
+        "PRIMARY KEY (id, date)"
+        ") PARTITION BY RANGE (date)"
+    )
+    first, last = bind.execute(sa.text("SELECT min(date), max(date) FROM cloud_costs_unpartitioned")).one()
+    this_month = date.today().replace(day=1)
+    # Existing history plus the current and next month, so the first ingestion issues no DDL
+    for month in months_between(min(first or this_month, this_month), max(last or this_month, next_month(this_month))):
+        op.execute(partition_ddl(month))
+
+    op.execute(
+        f"INSERT INTO cloud_costs ({COLUMNS}) SELECT {COLUMNS} FROM cloud_costs_unpartitioned "
+        "WHERE date IS NOT NULL"
+    )
+    op.execute("DROP TABLE cloud_costs_unpartitioned")
+    op.execute("ALTER SEQUENCE cloud_costs_id_seq OWNED BY cloud_costs.id")
+
+    for column in BTREE_INDEXES:
+        op.create_index(f"ix_cloud_costs_{column}", "cloud_costs", [column])
+    # Rows arrive in date order, so a BRIN index is a tiny fraction of a B-tree's size
+    op.create_index("ix_cloud_costs_date", "cloud_costs", ["date"], postgresql_using="brin")
+    op.execute("ANALYZE cloud_costs")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE cloud_costs RENAME TO cloud_costs_partitioned")
+    for column in BTREE_INDEXES + ("date",):
+        op.execute(f"ALTER INDEX ix_cloud_costs_{column} RENAME TO ix_cloud_costs_partitioned_{column}")
+    op.execute("ALTER SEQUENCE cloud_costs_id_seq OWNED BY NONE")
+    op.execute(
+        "CREATE TABLE cloud_costs ("
+        "id INTEGER NOT NULL DEFAULT nextval('cloud_costs_id_seq') PRIMARY KEY, "
+        "date DATE, service VARCHAR(100), cost FLOAT, usage FLOAT, "
+        "account_id VARCHAR(50), region VARCHAR(50), payload_hash VARCHAR(16))"
+    )
+    op.execute(f"INSERT INTO cloud_costs ({COLUMNS}) SELECT {COLUMNS} FROM cloud_costs_partitioned")
+    op.execute("DROP TABLE cloud_costs_partitioned")
+    op.execute("ALTER SEQUENCE cloud_costs_id_seq OWNED BY cloud_costs.id")
+    for column in BTREE_INDEXES + ("date",):
+        op.create_index(f"ix_cloud_costs_{column}", "cloud_costs", [column])
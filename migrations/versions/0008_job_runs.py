@@ -0,0 +1,39 @@
+"""Add job_runs for scheduled job telemetry
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "job_runs",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("job_id", sa.String(50), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("scheduled_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("started_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("finished_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("duration_seconds", sa.Float(), nullable=True),
+        sa.Column("rows_fetched", sa.Integer()),
+        sa.Column("rows_upserted", sa.Integer()),
+        sa.Column("api_calls", sa.Integer()),
+        sa.Column("alerts", sa.Integer()),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("phases", sa.Text(), nullable=True),
+    )
+    op.create_index("ix_job_runs_id", "job_runs", ["id"])
+    op.create_index("ix_job_runs_job_started", "job_runs", ["job_id", "started_at"])
+    op.create_index("ix_job_runs_started", "job_runs", ["started_at"])
+
+
+def downgrade():
+    op.drop_table("job_runs")
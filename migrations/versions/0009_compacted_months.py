@@ -0,0 +1,25 @@
+"""Add compacted_months to record the months folded into rollups by retention
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "compacted_months",
+        sa.Column("month", sa.Date(), primary_key=True),
+        sa.Column("compacted_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_table("compacted_months")
@@ -0,0 +1,33 @@
+"""Make cloud_costs.date NOT NULL on databases without partitioning
+
+The partitioned PostgreSQL table (0007) already requires a date.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        return
+
+    # Like 0007, rows without a date are not carried over
+    op.execute("DELETE FROM cloud_costs WHERE date IS NULL")
+    with op.batch_alter_table("cloud_costs") as batch:
+        batch.alter_column("date", existing_type=sa.Date(), nullable=False)
+
+
+def downgrade():
+    if op.get_bind().dialect.name == "postgresql":
+        return
+
+    with op.batch_alter_table("cloud_costs") as batch:
+        batch.alter_column("date", existing_type=sa.Date(), nullable=True)
@@ -0,0 +1,31 @@
+"""Add rollup_periods to record the rollup periods that are current with the raw rows
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "rollup_periods",
+        sa.Column("granularity", sa.String(10), primary_key=True),
+        sa.Column("period_start", sa.Date(), primary_key=True),
+        sa.Column("refreshed_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # Rollups are rebuilt after every ingestion, so the periods they exist for are current
+    op.execute(
+        "INSERT INTO rollup_periods (granularity, period_start) "
+        "SELECT DISTINCT granularity, period_start FROM cost_rollups"
+    )
+
+
+def downgrade():
+    op.drop_table("rollup_periods")
@@ -0,0 +1,68 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+from src.api.auth_routes import get_admin_user
+from src.api.middleware import ProfiledRoute
+from src.services.profiler import DEFAULT_HZ, profiler, to_collapsed, to_speedscope
+
+router = APIRouter(route_class=ProfiledRoute)
+
+class ProfileCapture(BaseModel):
+    seconds: float = 10
+    hz: int = DEFAULT_HZ
+
+class RouteProfile(BaseModel):
+    pattern: str
+    sample_rate: float = 0.1
+    hz: int = DEFAULT_HZ
+    seconds: float = 60
+
+@router.get("/profiler")
+def get_profiler_status(admin = Depends(get_admin_user)):
+    """
+    Current profiler state and the size of the last captured profile
+    """
+    return profiler.status()
+
+@router.post("/profiler/start")
+def start_profiler(capture: ProfileCapture, admin = Depends(get_admin_user)):
+    """
+    Sample every thread for the given number of seconds
+    """
+    try:
+        profiler.start(capture.seconds, capture.hz)
+        return profiler.status()
+    except ValueError as e:
+        raise HTTPException(status_code=409 if "already running" in str(e) else 400, detail=str(e))
+
+@router.post("/profiler/routes")
+def profile_route(rule: RouteProfile, admin = Depends(get_admin_user)):
+    """
+    Sample a fraction of the requests whose path matches a regular expression
+    """
+    try:
+        profiler.profile_route(rule.pattern, rule.sample_rate, rule.hz, rule.seconds)
+        return profiler.status()
+    except ValueError as e:
+        raise HTTPException(status_code=409 if "already running" in str(e) else 400, detail=str(e))
+
+@router.post("/profiler/stop")
+def stop_profiler(admin = Depends(get_admin_user)):
+    """
+    Stop sampling and keep what was collected as the latest profile
+    """
+    profiler.stop()
+    return profiler.status()
+
+@router.get("/profiler/profile")
+def get_profile(format: str = "collapsed", admin = Depends(get_admin_user)):
+    """
+    Latest profile as collapsed stacks (flamegraph.pl, speedscope) or speedscope JSON
+    """
+    if profiler.profile is None:
+        raise HTTPException(status_code=404, detail="No profile captured yet")
+    if format == "collapsed":
+        return PlainTextResponse(to_collapsed(profiler.profile))
+    if format == "speedscope":
+        return to_speedscope(profiler.profile)
+    raise HTTPException(status_code=400, detail="format must be collapsed or speedscope")
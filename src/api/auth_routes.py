@@ -1,3 +1,4 @@
+import os
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
@@ -6,13 +7,18 @@ from pydantic import BaseModel
 from typing import Optional
 from jose import jwt, JWTError
 from src.models.database import get_db
+from src.api.middleware import ProfiledRoute
 from src.services.auth_service import AuthService
 from src.models.user_model import User
+from src.services.query_stats import query_budget
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
+# Comma separated usernames allowed to use the /admin endpoints
+ADMIN_USERS = {u.strip() for u in os.getenv("ADMIN_USERS", "").split(",") if u.strip()}
+
 class UserCreate(BaseModel):
     username: str
     email: str
@@ -30,6 +36,7 @@ class TokenData(BaseModel):
     username: Optional[str] = None
 
 @router.post("/register", response_model=UserResponse)
+@query_budget(4)
 def register(user: UserCreate, db: Session = Depends(get_db)):
     db_user = AuthService.get_user_by_username(db, username=user.username)
     if db_user:
@@ -41,6 +48,7 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
     return AuthService.create_user(db, user.username, user.email, user.password)
 
 @router.post("/token", response_model=Token)
+@query_budget(1)
 def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     user = AuthService.authenticate_user(db, form_data.username, form_data.password)
     if not user:
@@ -73,3 +81,8 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: Session = De
     if user is None:
         raise credentials_exception
     return user
+
+async def get_admin_user(current_user = Depends(get_current_user)):
+    if current_user.username not in ADMIN_USERS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Admin access required")
+    return current_user
@@ -0,0 +1,176 @@
+"""
+Pure ASGI middleware.
+
+Unlike @app.middleware("http") (BaseHTTPMiddleware), these wrap `send`
+directly: responses are never copied into a second stream, streaming
+responses such as /events/stream pass straight through, and no Request
+object is built per call.
+"""
+import asyncio
+import functools
+import time
+import zlib
+from fastapi.routing import APIRoute
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from src.services import query_stats
+from src.services.logging_service import new_correlation_id
+from src.services.monitoring_service import monitoring
+from src.services.profiler import profiler
+
+# Content types that must reach the client chunk by chunk, uncompressed
+STREAMING_TYPES = ("text/event-stream",)
+
+
+class PerformanceMiddleware:
+    """
+    Request ids, timing, SQL statistics, profiling and per-endpoint metrics.
+
+    Response headers are added when the response starts; the metrics record
+    the full duration including any streamed body.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        request_id = new_correlation_id(Headers(scope=scope).get("x-request-id"))
+        token = query_stats.start_tracking()
+        stats = query_stats.current_stats()
+        status_code = 500
+        budget = None
+
+        async def send_with_headers(message: Message):
+            nonlocal status_code, budget
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                budget = query_stats.endpoint_budget(scope.get("endpoint"))
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Process-Time", str(time.perf_counter() - start))
+                headers.append("X-Request-ID", request_id)
+                for name, value in stats.headers().items():
+                    headers.append(name, value)
+                if budget is not None:
+                    headers.append(query_stats.BUDGET_HEADER, str(budget))
+            await send(message)
+
+        try:
+            with profiler.profile_request(scope["path"]):
+                await self.app(scope, receive, send_with_headers)
+        finally:
+            query_stats.stop_tracking(token)
+            monitoring.log_api_performance(
+                endpoint=scope["path"],
+                method=scope["method"],
+                response_time=time.perf_counter() - start,
+                status_code=status_code,
+                query_stats=stats,
+                query_budget=budget
+            )
+
+
+class CompressionMiddleware:
+    """
+    Gzip responses for clients that accept it.
+
+    Complete bodies below `minimum_size` are sent as-is. Streamed bodies
+    are compressed chunk by chunk with a sync flush so every chunk reaches
+    the client immediately; event streams and responses that already set
+    Content-Encoding are left untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, compresslevel: int = 5):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or "gzip" not in Headers(scope=scope).get("accept-encoding", ""):
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_compressed(message: Message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                passthrough = ("content-encoding" in headers
+                               or headers.get("content-type", "").startswith(STREAMING_TYPES))
+                if passthrough:
+                    await send(message)
+                else:
+                    # Held back until the first body chunk shows whether to compress
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start_message is not None:
+                headers = MutableHeaders(scope=start_message)
+                if not more_body and len(body) < self.minimum_size:
+                    await send(start_message)
+                    start_message = None
+                    passthrough = True
+                    await send(message)
+                    return
+
+                compressor = zlib.compressobj(self.compresslevel, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+                headers["Content-Encoding"] = "gzip"
+                headers.add_vary_header("Accept-Encoding")
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = compressor.compress(body) + compressor.flush()
+                    headers["Content-Length"] = str(len(body))
+                    await send(start_message)
+                    start_message = None
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send(start_message)
+                start_message = None
+
+            if more_body:
+                body = compressor.compress(body) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            else:
+                body = compressor.compress(body) + compressor.flush()
+            await send({"type": "http.response.body", "body": body, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+class ProfiledRoute(APIRoute):
+    """
+    APIRoute running its endpoint under profiler.profile_thread().
+
+    Sync endpoints run in a worker thread rather than the thread that entered
+    PerformanceMiddleware; this registers that thread with a route profile
+    so only the threads serving the matched request are sampled.
+    """
+
+    def __init__(self, path: str, endpoint, **kwargs):
+        super().__init__(path, endpoint, **kwargs)
+        call = self.dependant.call
+        if asyncio.iscoroutinefunction(call):
+            @functools.wraps(call)
+            async def profiled(**values):
+                with profiler.profile_thread():
+                    return await call(**values)
+        else:
+            @functools.wraps(call)
+            def profiled(**values):
+                with profiler.profile_thread():
+                    return call(**values)
+        self.dependant.call = profiled
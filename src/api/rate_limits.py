@@ -0,0 +1,44 @@
+import math
+import os
+from typing import Optional
+from fastapi import Depends, HTTPException
+from src.api.auth_routes import get_current_user
+from src.services.rate_limiter import concurrency_limiter, rate_limiter
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") == "1"
+# Seconds clients are asked to wait when a concurrency cap sheds their request
+CONCURRENCY_RETRY_AFTER = 5
+
+
+def rate_limit(name: str, per_minute: float, burst: int, max_concurrent: Optional[int] = None):
+    """
+    Dependency throttling a route per user, and optionally capping its concurrency.
+
+    Over the rate the request gets 429, over the concurrency cap 503; both
+    carry Retry-After.
+    """
+    rate = per_minute / 60.0
+
+    # Plain def: the (Redis) token bucket round trip runs in the threadpool, off the event loop
+    def limit(current_user = Depends(get_current_user)):
+        if not RATE_LIMIT_ENABLED:
+            yield
+            return
+
+        allowed, retry_after = rate_limiter.acquire(f"{current_user.username}:{name}", rate, burst)
+        if not allowed:
+            raise HTTPException(status_code=429, detail=f"Rate limit exceeded for {name}",
+                                headers={"Retry-After": str(math.ceil(retry_after))})
+
+        if max_concurrent is None:
+            yield
+            return
+        if not concurrency_limiter.try_acquire(name, max_concurrent):
+            raise HTTPException(status_code=503, detail=f"Too many concurrent {name} requests",
+                                headers={"Retry-After": str(CONCURRENCY_RETRY_AFTER)})
+        try:
+            yield
+        finally:
+            concurrency_limiter.release(name)
+
+    return limit
@@ -0,0 +1,206 @@
+import gzip
+import json
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from datetime import date
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+
+JSON_MEDIA_TYPE = "application/json"
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+MEDIA_TYPES = {
+    "json": JSON_MEDIA_TYPE,
+    "msgpack": MSGPACK_MEDIA_TYPE,
+    "arrow": ARROW_MEDIA_TYPE,
+}
+ACCEPT_ALIASES = {
+    "application/json": "json",
+    "application/msgpack": "msgpack",
+    "application/x-msgpack": "msgpack",
+    "application/vnd.apache.arrow.stream": "arrow",
+    "application/vnd.apache.arrow.file": "arrow",
+}
+
+# Optional package each non-JSON format needs
+FORMAT_PACKAGES = {"msgpack": "msgpack", "arrow": "pyarrow"}
+
+# Bodies smaller than this are not worth compressing
+COMPRESSION_MIN_SIZE = 1024
+BROTLI_QUALITY = 4
+
+
+def negotiate_format(accept: Optional[str], requested: Optional[str] = None,
+                     supported: Sequence[str] = ("json", "msgpack", "arrow")) -> str:
+    """
+    Pick the response format from an explicit `format` parameter or the Accept header.
+
+    Accept entries are tried in order of their q-value (ties keep header
+    order); entries with q=0 are not acceptable. Formats whose optional package is not installed are only skipped when the
+    Accept header leaves an alternative (JSON, a wildcard or an unknown type).
+
+    Raises:
+        ValueError: If the requested format is unknown, unsupported here or
+            needs a package that is not installed
+    """
+    if requested:
+        if requested not in supported:
+            raise ValueError(f"format must be one of {', '.join(supported)}")
+        if not _format_available(requested):
+            raise ValueError(f"{requested} format requires the '{FORMAT_PACKAGES[requested]}' package")
+        return requested
+
+    unavailable = []
+    fallback = not accept
+    for media_type in _accepted_media_types(accept):
+        fmt = ACCEPT_ALIASES.get(media_type)
+        if fmt in supported and _format_available(fmt):
+            return fmt
+        if fmt in supported:
+            unavailable.append(fmt)
+        else:
+            fallback = True
+    if unavailable and not fallback:
+        raise ValueError(f"{unavailable[0]} format requires the '{FORMAT_PACKAGES[unavailable[0]]}' package")
+    return "json"
+
+
+def _accepted_media_types(accept: Optional[str]) -> List[str]:
+    """Media types of an Accept header, highest q-value first, without the q=0 ones."""
+    weighted = []
+    for part in (accept or "").split(","):
+        media_type, *params = [item.strip() for item in part.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            weighted.append((q, media_type.lower()))
+    # sorted() is stable, so equal q-values keep their header order
+    return [media_type for _, media_type in sorted(weighted, key=lambda item: -item[0])]
+
+
+def _format_available(fmt: str) -> bool:
+    if fmt == "msgpack":
+        return msgpack is not None
+    if fmt == "arrow":
+        return pa is not None
+    return True
+
+
+def rows_to_columns(rows: List[Sequence[Any]], names: Sequence[str]) -> Dict[str, List[Any]]:
+    """Transpose query result tuples into one list per column."""
+    if not rows:
+        return {name: [] for name in names}
+    return {name: list(values) for name, values in zip(names, zip(*rows))}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps_json(payload: Any) -> bytes:
+    """Serialize to JSON with orjson when installed, falling back to the stdlib."""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_json_default)
+    return json.dumps(payload, default=_json_default, separators=(",", ":")).encode()
+
+
+def encode_json_rows(columns: Dict[str, List[Any]]) -> bytes:
+    """Encode columns as a JSON array of row objects."""
+    names = list(columns)
+    return dumps_json([dict(zip(names, row)) for row in zip(*columns.values())])
+
+
+def encode_msgpack(payload: Any) -> bytes:
+    """Encode a payload (typically a dict of columns) as MessagePack."""
+    if msgpack is None:
+        raise ValueError("msgpack format requires the 'msgpack' package")
+    return msgpack.packb(payload, default=_json_default, use_bin_type=True)
+
+
+def encode_arrow(columns: Dict[str, List[Any]]) -> bytes:
+    """Encode columns as an Arrow IPC stream."""
+    if pa is None:
+        raise ValueError("arrow format requires the 'pyarrow' package")
+
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def compress_body(body: bytes, accept_encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a body with brotli (preferred) or gzip when the client accepts it.
+
+    Returns:
+        Tuple of (body, content encoding or None)
+    """
+    accept_encoding = accept_encoding or ""
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return body, None
+    if brotli is not None and "br" in accept_encoding:
+        return brotli.compress(body, quality=BROTLI_QUALITY), "br"
+    if "gzip" in accept_encoding:
+        return gzip.compress(body, compresslevel=5), "gzip"
+    return body, None
+
+
+def columnar_response(columns: Dict[str, List[Any]], fmt: str,
+                      accept_encoding: Optional[str] = None) -> Response:
+    """
+    Build a response straight from column arrays, bypassing per-row model validation.
+
+    JSON keeps the row-object layout existing clients expect; MessagePack and
+    Arrow ship the columns as-is.
+    """
+    if fmt == "arrow":
+        body = encode_arrow(columns)
+    elif fmt == "msgpack":
+        body = encode_msgpack(columns)
+    else:
+        body = encode_json_rows(columns)
+    return encoded_response(body, fmt, accept_encoding)
+
+
+def payload_response(payload: Any, fmt: str, accept_encoding: Optional[str] = None) -> Response:
+    """Build a JSON or MessagePack response for an arbitrary payload."""
+    body = encode_msgpack(payload) if fmt == "msgpack" else dumps_json(payload)
+    return encoded_response(body, fmt, accept_encoding)
+
+
+def encoded_response(body: bytes, fmt: str, accept_encoding: Optional[str] = None) -> Response:
+    """Wrap an encoded body, compressing text formats when the client allows it."""
+    headers = {"Vary": "Accept, Accept-Encoding"}
+    if fmt == "json":
+        body, encoding = compress_body(body, accept_encoding)
+        if encoding:
+            headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type=MEDIA_TYPES[fmt], headers=headers)
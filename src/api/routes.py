@@ -1,14 +1,40 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import inspect
 from sqlalchemy.orm import Session
-from src.models.database import get_db
+from src.models.database import get_db, get_read_db, read_router
 from src.models.cost_model import CloudCost
 from src.services.aws_cost_service import AWSCostService
-from src.api.auth_routes import get_current_user
-from typing import List
+from src.services.cost_explorer_cache import cost_explorer_cache
+from src.services.cost_cube import CostCube
+from src.services.ingestion_service import IngestionService
+from src.services.aggregation_service import CostAggregationService
+from src.services.simulation_engine import SimulationEngine
+from src.services.driver_index import DriverIndexService
+from src.services.budget_service import BudgetService, parse_thresholds
+from src.models.budget_model import Budget
+from src.models.allocation_model import AllocationRule
+from src.services.allocation_service import AllocationService, serialize_rule
+from src.services.ai_recommendations import AIRecommendationService, ai_usage
+from src.services.monitoring_service import monitoring
+from src.services.event_bus import TOPICS, event_bus, format_sse
+from src.services.query_stats import query_budget
+from src.services.recommendation_service import RecommendationService
+from src.services.job_runs import JobRunService
+from src.api.responses import negotiate_format, rows_to_columns, columnar_response, payload_response
+from src.api.auth_routes import get_admin_user, get_current_user
+from src.api.middleware import ProfiledRoute
+from src.api.rate_limits import rate_limit
+from src.services.rate_limiter import cost_fetch_flight
+from typing import List, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date
 
-router = APIRouter()
+router = APIRouter(route_class=ProfiledRoute)
+
+# Comment lines sent on idle event streams so proxies keep the connection open
+EVENT_KEEPALIVE_SECONDS = 15
 
 class CostResponse(BaseModel):
     id: int
@@ -25,6 +51,35 @@ class CostData(BaseModel):
     usage: float
     account_id: str
 
+class WhatIfRequest(BaseModel):
+    days: int = 90
+    stop_idle: List[float] = [0.0, 0.5, 1.0]
+    commitment_coverage: List[float] = [0.0, 0.25, 0.5, 0.75, 1.0]
+    commitment_plans: List[str] = ["reserved_1yr", "reserved_3yr", "savings_plan_1yr", "savings_plan_3yr"]
+    spot_fraction: List[float] = [0.0, 0.2, 0.4]
+    spot_discount: float = 0.7
+    rds_downsize: List[float] = [0.0, 0.5, 1.0]
+    top_n: int = 20
+
+class RecommendationStatusUpdate(BaseModel):
+    status: str
+
+class AllocationRuleCreate(BaseModel):
+    name: str
+    method: str
+    targets: str
+    priority: int = 100
+    service_pattern: Optional[str] = None
+    account_pattern: Optional[str] = None
+    region_pattern: Optional[str] = None
+
+class BudgetCreate(BaseModel):
+    name: str
+    amount: float
+    account_id: Optional[str] = None
+    service: Optional[str] = None
+    thresholds: List[int] = [50, 80, 100]
+
 @router.get("/")
 def read_root():
     return {"message": "Cloud Cost Optimizer Dashboard API"}
@@ -33,76 +88,143 @@ def read_root():
 def health_check():
     return {"status": "healthy"}
 
+COST_COLUMNS = ("id", "date", "service", "cost", "usage", "account_id")
+
 @router.get("/costs/daily", response_model=List[CostResponse])
-def get_daily_costs(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
-    costs = db.query(CloudCost).all()
-    return [{"id": c.id, "date": str(c.date), "service": c.service, "cost": c.cost, "usage": c.usage, "account_id": c.account_id} for c in costs]
+@query_budget(2)
+def get_daily_costs(request: Request, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                    format: Optional[str] = None,
+                    current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Get daily cost rows as JSON, MessagePack or Arrow IPC (via Accept or `format`).
+    """
+    try:
+        fmt = negotiate_format(request.headers.get("accept"), format)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    query = db.query(*(getattr(CloudCost, name) for name in COST_COLUMNS))
+    if start_date:
+        query = query.filter(CloudCost.date >= start_date)
+    if end_date:
+        query = query.filter(CloudCost.date <= end_date)
+
+    columns = rows_to_columns(query.all(), COST_COLUMNS)
+    return columnar_response(columns, fmt, request.headers.get("accept-encoding"))
+
+@router.get("/costs/aggregate")
+def get_aggregated_costs(request: Request, group_by: str = "service", bucket: str = "day",
+                         start_date: Optional[date] = None, end_date: Optional[date] = None,
+                         max_points: int = 365, top_n: int = 10, downsample: str = "lttb",
+                         format: Optional[str] = None,
+                         current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Get chart-ready cost series grouped by service, account or region.
+    """
+    try:
+        fmt = negotiate_format(request.headers.get("accept"), format, supported=("json", "msgpack"))
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+    try:
+        result = CostAggregationService(db).aggregate(
+            group_by=group_by,
+            bucket=bucket,
+            start_date=start_date,
+            end_date=end_date,
+            max_points=max_points,
+            top_n=top_n,
+            downsample=downsample
+        )
+        return payload_response(result, fmt, request.headers.get("accept-encoding"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/costs/fetch")
-def fetch_costs(current_user = Depends(get_current_user)):
+@router.get("/costs/drivers")
+@query_budget(3)
+def get_cost_drivers(window: str = "dod", dimension: str = "service", k: int = 10,
+                     as_of: Optional[date] = None,
+                     current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
-    Fetch cost data from AWS and store in database.
+    Get the top-K cost increases and decreases (day-over-day or week-over-week).
     """
     try:
+        return DriverIndexService(db).top_drivers(window=window, dimension=dimension, k=k, as_of=as_of)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/costs/fetch", dependencies=[Depends(rate_limit("costs_fetch", per_minute=6, burst=2, max_concurrent=4))])
+def fetch_costs(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Fetch cost data from AWS and store in database.
+
+    Each fetch is a billed Cost Explorer call, so concurrent requests share
+    one upstream fetch and its result.
+    """
+    def fetch_and_store():
         service = AWSCostService()
         cost_data = service.get_yesterday_costs()
 
         if not cost_data:
             raise HTTPException(status_code=500, detail="Failed to fetch cost data from AWS")
 
-        # Store in database
-        db = next(get_db())
-        for data in cost_data:
-            cost_entry = CloudCost(
-                date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                service=data['service'],
-                cost=data['cost'],
-                usage=data['usage'],
-                account_id=data['account_id']
-            )
-            db.add(cost_entry)
-        db.commit()
-
-        return {"message": f"Successfully fetched and stored {len(cost_data)} cost records"}
+        # Store in database and refresh rollups
+        ingestion = IngestionService(db)
+        stored_count = ingestion.store_cost_records(cost_data)
+        ingestion.on_ingestion_complete()
+
+        return {"message": f"Successfully fetched {len(cost_data)} cost records ({stored_count} new)"}
+
+    try:
+        return cost_fetch_flight.run("yesterday", fetch_and_store)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/recommendations")
-def get_recommendations(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+@query_budget(2)
+def get_recommendations(status: Optional[str] = "open", type: Optional[str] = None,
+                        account_id: Optional[str] = None, limit: int = 100,
+                        current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
-    Get cost optimization recommendations.
+    Get stored cost optimization recommendations, highest potential savings first.
     """
     try:
-        from src.services.anomaly_detection import AnomalyDetector
-
-        detector = AnomalyDetector(db)
-        recommendations = detector.get_all_recommendations()
-
-        return recommendations
-
+        return RecommendationService(db).list(status=status, type=type, account_id=account_id, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/budget/simulate")
-def simulate_budget(budget_amount: float, months: int = 12, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+@router.patch("/recommendations/{recommendation_id}")
+def update_recommendation_status(recommendation_id: int, update: RecommendationStatusUpdate,
+                                 current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Acknowledge, implement or reopen a recommendation
+    """
+    try:
+        recommendation = RecommendationService(db).set_status(recommendation_id, update.status)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if recommendation is None:
+        raise HTTPException(status_code=404, detail="Recommendation not found")
+    return recommendation
+
+@router.post("/budget/simulate", dependencies=[Depends(rate_limit("budget_simulate", per_minute=30, burst=5, max_concurrent=4))])
+def simulate_budget(budget_amount: float, months: int = 12, current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Simulate budget impact over time based on current spending patterns
     """
-    # Get user's cost data
-    costs = db.query(CloudCost).all()
+    # Calculate average monthly spend from the shared cost cube
+    monthly_spends = CostCube.snapshot_for(db).monthly_totals()
 
-    if not costs:
+    if not monthly_spends:
         return {"error": "No cost data available for simulation"}
 
-    # Calculate average monthly spend
-    monthly_spends = {}
-    for cost in costs:
-        month_key = cost.date.strftime("%Y-%m")
-        if month_key not in monthly_spends:
-            monthly_spends[month_key] = 0
-        monthly_spends[month_key] += cost.cost
-
     avg_monthly = sum(monthly_spends.values()) / len(monthly_spends) if monthly_spends else 0
 
     # Simulate budget over months
@@ -130,14 +252,149 @@ def simulate_budget(budget_amount: float, months: int = 12, current_user = Depen
         "months_until_depletion": len(simulation) if simulation and simulation[-1]["remaining_budget"] <= 0 else None
     }
 
-@router.get("/ai-recommendations")
-def get_ai_recommendations(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+def _serialize_budget(budget: Budget) -> dict:
+    return {
+        "id": budget.id,
+        "name": budget.name,
+        "tenant": budget.tenant,
+        "account_id": budget.account_id,
+        "service": budget.service,
+        "amount": budget.amount,
+        "thresholds": list(parse_thresholds(budget.thresholds)),
+    }
+
+@router.get("/budgets")
+@query_budget(2)
+def list_budgets(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
     """
-    Get AI-powered cost optimization recommendations using OpenAI
+    List the current user's budgets
+    """
+    budgets = db.query(Budget).filter(Budget.tenant == current_user.username).order_by(Budget.id).all()
+    return [_serialize_budget(b) for b in budgets]
+
+@router.post("/budgets")
+def create_budget(budget: BudgetCreate, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Create a monthly budget, optionally scoped to an account and/or service
+    """
+    if budget.amount <= 0:
+        raise HTTPException(status_code=400, detail="amount must be positive")
+    if not budget.thresholds or any(t <= 0 or t > 1000 for t in budget.thresholds):
+        raise HTTPException(status_code=400, detail="thresholds must be percentages between 1 and 1000")
+
+    db_budget = Budget(
+        name=budget.name,
+        tenant=current_user.username,
+        account_id=budget.account_id,
+        service=budget.service,
+        amount=budget.amount,
+        thresholds=",".join(str(t) for t in sorted(set(budget.thresholds)))
+    )
+    db.add(db_budget)
+    db.commit()
+    db.refresh(db_budget)
+    return _serialize_budget(db_budget)
+
+@router.delete("/budgets/{budget_id}")
+def delete_budget(budget_id: int, current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Delete one of the current user's budgets
+    """
+    deleted = db.query(Budget).filter(
+        Budget.id == budget_id, Budget.tenant == current_user.username
+    ).delete(synchronize_session=False)
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Budget not found")
+    db.commit()
+    return {"message": "Budget deleted"}
+
+@router.get("/budgets/status")
+@query_budget(4)
+def get_budget_status(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+    """
+    Month-to-date spend and end-of-month forecast for the current user's budgets
+    """
+    try:
+        return BudgetService(db).evaluate_all(tenant=current_user.username)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/allocation/rules")
+def list_allocation_rules(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
     """
+    List the chargeback allocation rules in evaluation order
+    """
+    rules = db.query(AllocationRule).order_by(AllocationRule.priority, AllocationRule.id).all()
+    return [serialize_rule(rule) for rule in rules]
+
+@router.post("/allocation/rules")
+def create_allocation_rule(rule: AllocationRuleCreate, current_user = Depends(get_admin_user),
+                           db: Session = Depends(get_db)):
+    """
+    Add an allocation rule and reallocate all history (admin only)
+    """
+    try:
+        created = AllocationService(db).create_rule(**rule.model_dump())
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return serialize_rule(created)
+
+@router.delete("/allocation/rules/{rule_id}")
+def delete_allocation_rule(rule_id: int, current_user = Depends(get_admin_user), db: Session = Depends(get_db)):
+    """
+    Remove an allocation rule and reallocate all history (admin only)
+    """
+    if not AllocationService(db).delete_rule(rule_id):
+        raise HTTPException(status_code=404, detail="Allocation rule not found")
+    return {"message": "Allocation rule deleted"}
+
+@router.get("/chargeback")
+@query_budget(2)
+def get_chargeback(start_date: Optional[date] = None, end_date: Optional[date] = None, group_by: str = "team",
+                   team: Optional[str] = None,
+                   current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Allocated cost per team, service or account (defaults to the current month to date)
+    """
+    end_date = end_date or date.today()
+    start_date = start_date or end_date.replace(day=1)
+    try:
+        return AllocationService(db).chargeback(start_date, end_date, group_by=group_by, team=team)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/simulations/what-if")
+def simulate_what_if(scenario: WhatIfRequest, current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Rank savings scenarios (stop idle EC2, commitments, spot, RDS downsizing) against recent spend
+    """
+    if scenario.days < 1 or scenario.days > 730:
+        raise HTTPException(status_code=400, detail="days must be between 1 and 730")
+
     try:
-        from src.services.ai_recommendations import AIRecommendationService
+        return SimulationEngine(db).rank_scenarios(
+            days=scenario.days,
+            stop_idle=scenario.stop_idle,
+            commitment_coverage=scenario.commitment_coverage,
+            commitment_plans=scenario.commitment_plans,
+            spot_fraction=scenario.spot_fraction,
+            rds_downsize=scenario.rds_downsize,
+            spot_discount=scenario.spot_discount,
+            top_n=scenario.top_n
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/ai-recommendations", dependencies=[Depends(rate_limit("ai_recommendations", per_minute=10, burst=3, max_concurrent=2))])
+def get_ai_recommendations(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Get AI-powered cost optimization recommendations using OpenAI
+    """
+    try:
         ai_service = AIRecommendationService()
         recommendations = ai_service.generate_ai_recommendations(db)
 
@@ -147,13 +404,12 @@ def get_ai_recommendations(current_user = Depends(get_current_user), db: Session
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/monitoring/health")
-def get_system_health(current_user = Depends(get_current_user), db: Session = Depends(get_db)):
+@query_budget(4)
+def get_system_health(current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Get system health and performance metrics
     """
     try:
-        from src.services.monitoring_service import monitoring
-
         health_data = monitoring.get_system_health(db)
         return health_data
 
@@ -166,22 +422,97 @@ def get_performance_metrics(current_user = Depends(get_current_user)):
     Get API performance metrics
     """
     try:
-        from src.services.monitoring_service import monitoring
-
         return monitoring.get_performance_report()
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/monitoring/ai-usage")
+def get_ai_usage_stats(current_user = Depends(get_current_user)):
+    """
+    Token usage and latency of AI recommendation requests
+    """
+    return ai_usage.stats()
+
+@router.get("/monitoring/cost-explorer-cache")
+def get_cost_explorer_cache_stats(current_user = Depends(get_current_user)):
+    """
+    Cost Explorer response cache hit/miss statistics and billed API calls
+    """
+    try:
+        return {**cost_explorer_cache.stats(), "api_calls": AWSCostService.api_calls}
+
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/monitoring/replicas")
+def get_replica_status(current_user = Depends(get_current_user)):
+    """
+    Replication lag and read share of the read replicas
+    """
+    return read_router.stats()
+
 @router.get("/monitoring/savings")
-def get_cost_savings_report(days: int = 30, current_user = Depends(get_current_user)):
+def get_cost_savings_report(days: int = 30, current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
     """
     Get cost savings report for the specified period
     """
     try:
-        from src.services.monitoring_service import monitoring
+        return monitoring.calculate_total_savings(days, db=db)
 
-        return monitoring.calculate_total_savings(days)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/jobs/runs")
+@query_budget(2)
+def get_job_runs(job_id: Optional[str] = None, days: int = 30, limit: int = 50,
+                 current_user = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    """
+    Recent scheduled job runs with per-job duration percentiles and ingestion throughput
+    """
+    try:
+        return JobRunService(db).report(job_id=job_id, days=days, limit=limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/events/stream")
+async def stream_events(request: Request, topics: Optional[str] = None,
+                        current_user = Depends(get_current_user)):
+    """
+    Server-Sent Events stream of cost, rollup, anomaly and budget deltas.
+
+    Events are pushed when ingestion or anomaly detection finishes, so
+    dashboards no longer need to poll; budget events only reach their tenant.
+    """
+    selected = topics.split(",") if topics else list(TOPICS)
+    unknown = [t for t in selected if t not in TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(unknown)}; use {', '.join(TOPICS)}")
+
+    # The stream can stay open for hours; release the connection the user lookup holds
+    user_state = inspect(current_user, raiseerr=False)
+    if user_state is not None and user_state.session is not None:
+        user_state.session.close()
+    subscription_id, subscriber = event_bus.subscribe(current_user.username, selected)
+
+    async def events():
+        try:
+            yield ": connected\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(subscriber.queue.get(), EVENT_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_sse(event["topic"], event["data"])
+        finally:
+            event_bus.unsubscribe(subscription_id)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no",
+    })
@@ -0,0 +1,50 @@
+import argparse
+import logging
+import time
+from datetime import date, datetime, timedelta
+from src.models.database import get_db
+from src.models.partitioning import months_between, next_month
+from src.services.aws_cost_service import AWSCostService
+from src.services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+def backfill_costs(start: date, end: date):
+    """
+    Job to load historical cost data for [start, end), one month per Cost Explorer request.
+
+    Records are bulk loaded (COPY on PostgreSQL) and derived data is refreshed
+    once at the end.
+    """
+    logger.info(f"Starting cost backfill from {start} to {end}...")
+    started = time.perf_counter()
+
+    db = next(get_db())
+    try:
+        cost_service = AWSCostService()
+        ingestion = IngestionService(db)
+        stored_count = 0
+        for month in months_between(start, end - timedelta(days=1)):
+            window_start = max(month, start)
+            window_end = min(next_month(month), end)
+            cost_data = cost_service.get_cost_and_usage(window_start.isoformat(), window_end.isoformat())
+            stored_count += ingestion.bulk_load_cost_records(cost_data)
+
+        ingestion.on_ingestion_complete()
+        logger.info(f"Backfill stored {stored_count} new cost records",
+                    extra={"start": start.isoformat(), "end": end.isoformat(), "stored": stored_count,
+                           "duration_seconds": round(time.perf_counter() - started, 1)})
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    from src.services.logging_service import configure_logging
+
+    parser = argparse.ArgumentParser(description="Backfill historical cost data")
+    parser.add_argument("start", help="First day (YYYY-MM-DD)")
+    parser.add_argument("end", help="Day after the last one (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    configure_logging()
+    backfill_costs(datetime.strptime(args.start, "%Y-%m-%d").date(),
+                   datetime.strptime(args.end, "%Y-%m-%d").date())
@@ -0,0 +1,32 @@
+import logging
+from src.models.database import get_db
+from src.services.job_runs import job_runs
+from src.services.retention_service import RetentionService
+
+logger = logging.getLogger(__name__)
+
+def compact_cost_data():
+    """
+    Job to apply the retention tiers: compact old raw rows, archive old rollups, vacuum.
+    """
+    logger.info("Starting cost data compaction...")
+
+    with job_runs.telemetry("retention_compaction") as telemetry:
+        db = next(get_db())
+        try:
+            with telemetry.phase("compaction"):
+                stats = RetentionService(db).run()
+            telemetry.add(rows_fetched=stats['deleted_raw_rows'] + stats['archived_rollups'])
+            logger.info(
+                f"Compaction: {stats['deleted_raw_rows']} raw rows compacted into {stats['compacted_months']} months, "
+                f"{stats['archived_rollups']} monthly rollups archived",
+                extra={"retention": stats}
+            )
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    from src.services.logging_service import configure_logging
+
+    configure_logging()
+    compact_cost_data()
@@ -0,0 +1,37 @@
+import argparse
+import logging
+from typing import List
+from src.models.database import get_db
+from src.services.cur_import import CUR_CHUNK_ROWS, CurImportService
+
+logger = logging.getLogger(__name__)
+
+def import_cur_files(paths: List[str], chunk_rows: int = CUR_CHUNK_ROWS, include_region: bool = False):
+    """
+    Job to load AWS Cost and Usage Report files (.csv, .csv.gz or .parquet).
+
+    The files are one import run (typically the part files of a report): their
+    line items add up, and derived data is refreshed once after the last file.
+    """
+    db = next(get_db())
+    try:
+        # One service for all files: part files of a report add up instead of replacing each other
+        importer = CurImportService(db, chunk_rows=chunk_rows, include_region=include_region)
+        for stats in importer.import_files(paths):
+            logger.info(f"Imported {stats['line_items']:,} line items from {stats['file']} "
+                        f"at {stats['rows_per_second']:,.0f} rows/sec", extra=stats)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    from src.services.logging_service import configure_logging
+
+    parser = argparse.ArgumentParser(description="Import AWS Cost and Usage Report files")
+    parser.add_argument("paths", nargs="+", help="CUR files (.csv, .csv.gz or .parquet)")
+    parser.add_argument("--chunk-rows", type=int, default=CUR_CHUNK_ROWS, help="Line items parsed per chunk")
+    parser.add_argument("--region", action="store_true",
+                        help="Keep one row per region (not for accounts also fetched from Cost Explorer)")
+    args = parser.parse_args()
+
+    configure_logging()
+    import_cur_files(args.paths, chunk_rows=args.chunk_rows, include_region=args.region)
@@ -1,55 +1,54 @@
-import os
-from datetime import datetime
+import logging
 from src.services.aws_cost_service import AWSCostService
+from src.services.ingestion_service import IngestionService
 from src.models.database import get_db
-from src.models.cost_model import CloudCost
+from src.services.job_runs import job_runs
+
+logger = logging.getLogger(__name__)
 
 def fetch_and_store_daily_costs():
     """
     Job to fetch daily cost data from AWS and store in database.
     """
-    print(f"[{datetime.now()}] Starting daily cost fetch job...")
-
-    try:
-        # Initialize AWS Cost Service
-        cost_service = AWSCostService()
-
-        # Fetch yesterday's costs
-        cost_data = cost_service.get_yesterday_costs()
-
-        if not cost_data:
-            print("No cost data fetched from AWS")
-            return
-
-        # Store in database
-        db = next(get_db())
-        stored_count = 0
-
-        for data in cost_data:
-            # Check if record already exists to avoid duplicates
-            existing = db.query(CloudCost).filter(
-                CloudCost.date == datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                CloudCost.service == data['service'],
-                CloudCost.account_id == data['account_id']
-            ).first()
-
-            if not existing:
-                cost_entry = CloudCost(
-                    date=datetime.strptime(data['date'], '%Y-%m-%d').date(),
-                    service=data['service'],
-                    cost=data['cost'],
-                    usage=data['usage'],
-                    account_id=data['account_id']
-                )
-                db.add(cost_entry)
-                stored_count += 1
-
-        db.commit()
-        print(f"Successfully stored {stored_count} new cost records")
-
-    except Exception as e:
-        print(f"Error in daily cost fetch job: {e}")
-        raise
+    logger.info("Starting daily cost fetch job...")
+
+    with job_runs.telemetry("daily_cost_fetch") as telemetry:
+        try:
+            # Initialize AWS Cost Service
+            cost_service = AWSCostService()
+
+            # Fetch yesterday's costs
+            api_calls = AWSCostService.api_calls
+            with telemetry.phase("fetch"):
+                cost_data = cost_service.get_yesterday_costs()
+            telemetry.add(rows_fetched=len(cost_data), api_calls=AWSCostService.api_calls - api_calls)
+
+            if not cost_data:
+                logger.info("No cost data fetched from AWS")
+                return
+
+            # Store in database, skipping records that already exist
+            db = next(get_db())
+            try:
+                ingestion = IngestionService(db)
+                with telemetry.phase("store"):
+                    stored_count = ingestion.store_cost_records(cost_data)
+                telemetry.add(rows_upserted=stored_count)
+                logger.info(f"Successfully stored {stored_count} new cost records",
+                            extra={"fetched": len(cost_data), "stored": stored_count})
+
+                # Refresh rollups for the ingested dates
+                with telemetry.phase("refresh"):
+                    ingestion.on_ingestion_complete()
+            finally:
+                db.close()
+
+        except Exception:
+            logger.exception("Error in daily cost fetch job")
+            raise
 
 if __name__ == "__main__":
+    from src.services.logging_service import configure_logging
+
+    configure_logging()
     fetch_and_store_daily_costs()
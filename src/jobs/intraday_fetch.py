@@ -0,0 +1,49 @@
+import os
+import logging
+from src.services.aws_cost_service import AWSCostService
+from src.services.ingestion_service import IngestionService
+from src.models.database import get_db
+from src.services.job_runs import job_runs
+
+logger = logging.getLogger(__name__)
+
+# Cost Explorer revises recent days for up to 72 hours
+INTRADAY_WINDOW_DAYS = int(os.getenv("INTRADAY_WINDOW_DAYS", "3"))
+
+def fetch_recent_costs():
+    """
+    Job to re-fetch the rolling recent window and upsert only changed records.
+    """
+    logger.info(f"Starting intraday cost fetch ({INTRADAY_WINDOW_DAYS} day window)...")
+
+    with job_runs.telemetry("intraday_cost_fetch") as telemetry:
+        api_calls = AWSCostService.api_calls
+        with telemetry.phase("fetch"):
+            cost_data = AWSCostService().get_recent_costs(INTRADAY_WINDOW_DAYS)
+        telemetry.add(rows_fetched=len(cost_data), api_calls=AWSCostService.api_calls - api_calls)
+        if not cost_data:
+            logger.info("No cost data fetched from AWS")
+            return
+
+        db = next(get_db())
+        try:
+            ingestion = IngestionService(db)
+            with telemetry.phase("upsert"):
+                counts = ingestion.upsert_cost_records(cost_data)
+            telemetry.add(rows_upserted=counts['inserted'] + counts['updated'])
+            logger.info(
+                f"Intraday fetch: {counts['fetched']} fetched, {counts['unchanged']} unchanged, "
+                f"{counts['inserted']} inserted, {counts['updated']} updated"
+            )
+
+            # Only dates with real changes are propagated to rollups, drivers and budgets
+            with telemetry.phase("refresh"):
+                ingestion.on_ingestion_complete()
+        finally:
+            db.close()
+
+if __name__ == "__main__":
+    from src.services.logging_service import configure_logging
+
+    configure_logging()
+    fetch_recent_costs()
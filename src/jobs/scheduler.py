@@ -1,52 +1,83 @@
+from apscheduler.events import (
+    EVENT_JOB_ERROR, EVENT_JOB_EXECUTED, EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+)
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from datetime import datetime
+from apscheduler.triggers.interval import IntervalTrigger
 import logging
+import os
 from src.jobs.daily_cost_fetch import fetch_and_store_daily_costs
-from src.services.anomaly_detection import AnomalyDetector
+from src.jobs.intraday_fetch import fetch_recent_costs
+from src.jobs.compaction import compact_cost_data
+from src.services.recommendation_service import RecommendationService
+from src.services.event_bus import event_bus
+from src.services.job_runs import job_runs
 from src.models.database import get_db
+from src.services.logging_service import configure_logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Scheduler events recorded in job_runs
+JOB_EVENTS = EVENT_JOB_SUBMITTED | EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED | EVENT_JOB_MAX_INSTANCES
+
+INTRADAY_INGESTION_ENABLED = os.getenv("INTRADAY_INGESTION_ENABLED", "0") == "1"
+INTRADAY_INTERVAL_MINUTES = int(os.getenv("INTRADAY_INTERVAL_MINUTES", "60"))
+
 def check_for_anomalies():
     """
     Job to check for cost anomalies and send alerts.
     """
-    logger.info(f"[{datetime.now()}] Checking for cost anomalies...")
+    logger.info("Checking for cost anomalies...")
 
-    try:
-        from src.services.alert_service import AlertService
+    from src.services.alert_service import AlertService
 
+    with job_runs.telemetry("anomaly_check") as telemetry:
         db = next(get_db())
-        detector = AnomalyDetector(db)
-        recommendations = detector.get_all_recommendations()
+        try:
+            # Refresh the recommendation store; alerts cover the open recommendations
+            service = RecommendationService(db)
+            with telemetry.phase("detect"):
+                recommendations = service.refresh()
+            for category, timing in service.detector_timings.items():
+                telemetry.phases[f"detect.{category}"] = timing["seconds"]
 
-        total_alerts = sum(len(recs) for recs in recommendations.values())
+            total_alerts = sum(len(recs) for recs in recommendations.values())
+            telemetry.add(alerts=total_alerts)
+            event_bus.publish("anomalies", {
+                "total": total_alerts,
+                "counts": {category: len(recs) for category, recs in recommendations.items()},
+                "top": {category: recs[:3] for category, recs in recommendations.items() if recs},
+            })
 
-        if total_alerts > 0:
-            logger.warning(f"Found {total_alerts} cost optimization opportunities:")
-            for category, recs in recommendations.items():
-                if recs:
-                    logger.warning(f"  {category.upper()}: {len(recs)} issues")
-                    for rec in recs[:3]:  # Log first 3 per category
-                        logger.warning(f"    - {rec.get('suggestion', 'Check service')}")
+            if total_alerts > 0:
+                logger.warning(f"Found {total_alerts} cost optimization opportunities:")
+                for category, recs in recommendations.items():
+                    if recs:
+                        logger.warning(f"  {category.upper()}: {len(recs)} issues")
+                        for rec in recs[:3]:  # Log first 3 per category
+                            logger.warning(f"    - {rec.get('suggestion', 'Check service')}")
 
-            # Send alerts
-            alert_service = AlertService()
-            alert_service.send_anomaly_alerts(recommendations)
-        else:
-            logger.info("No anomalies detected")
+                # Send alerts
+                with telemetry.phase("alert"):
+                    alert_service = AlertService()
+                    alert_service.send_anomaly_alerts(recommendations)
+            else:
+                logger.info("No anomalies detected")
 
-    except Exception as e:
-        logger.error(f"Error in anomaly check job: {e}")
+        except Exception:
+            # Re-raised so the scheduler records the run as failed
+            logger.exception("Error in anomaly check job")
+            raise
+        finally:
+            db.close()
 
 def setup_scheduler():
     """
     Set up the APScheduler for automated jobs.
     """
     scheduler = BackgroundScheduler()
+    # Every run, missed run and skipped overlapping run ends up in job_runs
+    scheduler.add_listener(job_runs.listener, JOB_EVENTS)
 
     # Daily cost fetch at 2 AM
     scheduler.add_job(
@@ -66,6 +97,28 @@ def setup_scheduler():
         replace_existing=True
     )
 
+    # Weekly retention compaction on Sunday at 4 AM, after the daily jobs
+    scheduler.add_job(
+        compact_cost_data,
+        trigger=CronTrigger(day_of_week='sun', hour=4, minute=0),
+        id='retention_compaction',
+        name='Cost Data Retention Compaction',
+        max_instances=1,
+        replace_existing=True
+    )
+
+    # Intraday polling of the recent window, never overlapping with itself
+    if INTRADAY_INGESTION_ENABLED:
+        scheduler.add_job(
+            fetch_recent_costs,
+            trigger=IntervalTrigger(minutes=INTRADAY_INTERVAL_MINUTES),
+            id='intraday_cost_fetch',
+            name='Intraday Cost Data Fetch',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+
     logger.info("Scheduler configured with daily jobs")
     return scheduler
 
@@ -73,6 +126,7 @@ def start_scheduler():
     """
     Start the scheduler.
     """
+    configure_logging()
     scheduler = setup_scheduler()
     scheduler.start()
     logger.info("Scheduler started")
@@ -1,17 +1,64 @@
-from fastapi import FastAPI, Request
+from contextlib import asynccontextmanager
+from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
+import os
+import threading
 import time
 from src.api.routes import router
 from src.api.auth_routes import router as auth_router
-from src.jobs.scheduler import setup_scheduler
-from src.models.database import create_tables
+from src.api.admin_routes import router as admin_router
+from src.api.middleware import CompressionMiddleware, PerformanceMiddleware
+from src.models.database import run_migrations, warm_pool
+from src.services.logging_service import configure_logging, shutdown_logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="Cloud Cost Optimizer Dashboard", version="1.0.0")
+# Schema changes are applied with `alembic upgrade head`; set AUTO_MIGRATE=1 to
+# run them on startup instead (handy for local development).
+AUTO_MIGRATE = os.getenv("AUTO_MIGRATE", "0") == "1"
+SCHEDULER_ENABLED = os.getenv("SCHEDULER_ENABLED", "1") == "1"
+
+def warm_up():
+    """Warm the connection pool and caches without blocking startup."""
+    start = time.perf_counter()
+    try:
+        warm_pool()
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.3f}s")
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background work on startup and clean it up on shutdown."""
+    # Structured logging through a background writer thread
+    configure_logging()
+
+    if AUTO_MIGRATE:
+        run_migrations()
+
+    threading.Thread(target=warm_up, name="warm-up", daemon=True).start()
+
+    scheduler = None
+    if SCHEDULER_ENABLED:
+        try:
+            # Imported here so APScheduler and the job modules load only in serving processes
+            from src.jobs.scheduler import setup_scheduler
+
+            scheduler = setup_scheduler()
+            scheduler.start()
+            logger.info("Background scheduler started successfully")
+        except Exception as e:
+            logger.error(f"Failed to start background scheduler: {e}")
+
+    yield
+
+    if scheduler is not None:
+        scheduler.shutdown(wait=False)
+    logger.info("Application shutting down")
+    shutdown_logging()
+
+app = FastAPI(title="Cloud Cost Optimizer Dashboard", version="1.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -22,52 +69,21 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize database tables on startup
-create_tables()
+# Compress large JSON responses (responses that already set Content-Encoding are left alone)
+app.add_middleware(CompressionMiddleware, minimum_size=1024, compresslevel=5)
+
+# Request ids, timing, SQL statistics and metrics; outermost so it covers everything else
+app.add_middleware(PerformanceMiddleware)
 
 # Include routers
 app.include_router(router)
 app.include_router(auth_router, prefix="/auth", tags=["authentication"])
+app.include_router(admin_router, prefix="/admin", tags=["admin"])
 
 @app.get("/")
 def read_root():
     return {"message": "Cloud Cost Optimizer Dashboard API"}
 
-# Performance monitoring middleware
-@app.middleware("http")
-async def add_performance_monitoring(request: Request, call_next):
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
-    response.headers["X-Process-Time"] = str(process_time)
-
-    # Log performance metrics
-    from src.services.monitoring_service import monitoring
-    monitoring.log_api_performance(
-        endpoint=str(request.url.path),
-        method=request.method,
-        response_time=process_time,
-        status_code=response.status_code
-    )
-
-    return response
-
-# Start background scheduler on app startup
-@app.on_event("startup")
-async def startup_event():
-    """Initialize background jobs on startup."""
-    try:
-        scheduler = setup_scheduler()
-        scheduler.start()
-        logger.info("Background scheduler started successfully")
-    except Exception as e:
-        logger.error(f"Failed to start background scheduler: {e}")
-
-@app.on_event("shutdown")
-async def shutdown_event():
-    """Clean up on shutdown."""
-    logger.info("Application shutting down")
-
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,38 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+class AllocationRule(Base):
+    """
+    Chargeback rule: cost rows matching the service/account/region glob patterns go to one
+    team ("direct"), to several teams by fixed weights ("fixed"), or to teams in proportion
+    to their directly allocated cost of the day ("proportional", for shared services).
+    """
+    __tablename__ = "allocation_rules"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    priority = Column(Integer, nullable=False, default=100)  # Lowest matching priority wins
+    method = Column(String(20), nullable=False)  # "direct", "fixed" or "proportional"
+    service_pattern = Column(String(100), nullable=True)  # None matches everything
+    account_pattern = Column(String(50), nullable=True)
+    region_pattern = Column(String(50), nullable=True)
+    targets = Column(String(500), nullable=False)  # "team", "team-a:60,team-b:40", "team-a,team-b" or "*"
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class CostAllocation(Base):
+    """Cost of one day, service and account charged to a team by the allocation rules."""
+    __tablename__ = "cost_allocations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False)
+    team = Column(String(100), nullable=False)
+    service = Column(String(100), nullable=False)
+    account_id = Column(String(50), nullable=False)
+    cost = Column(Float, default=0.0)
+    rule_id = Column(Integer, nullable=True)  # None for unallocated cost
+
+    __table_args__ = (
+        Index('ix_cost_allocations_team_date', 'team', 'date'),
+        Index('ix_cost_allocations_date', 'date'),
+    )
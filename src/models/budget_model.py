@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Index
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+class Budget(Base):
+    """Monthly spending limit for a tenant, optionally scoped to an account and/or service."""
+    __tablename__ = "budgets"
+
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), nullable=False)
+    tenant = Column(String(100), nullable=False)
+    account_id = Column(String(50), nullable=True)  # None means all accounts
+    service = Column(String(100), nullable=True)  # None means all services
+    amount = Column(Float, nullable=False)
+    thresholds = Column(String(50), default="50,80,100")  # Percentages of amount
+    last_alerted_period = Column(String(7), nullable=True)  # "YYYY-MM"
+    last_alerted_threshold = Column(Integer, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index('ix_budgets_tenant', 'tenant'),
+    )
@@ -1,12 +1,28 @@
-from sqlalchemy import Column, Integer, String, Float, Date
+from sqlalchemy import Column, Integer, String, Float, Date, Index
 from src.models.database import Base
 
 class CloudCost(Base):
+    """
+    Daily cost and usage per service, account and region.
+
+    On PostgreSQL the table is partitioned by month on `date` (migration 0007),
+    so its primary key there is (id, date): a partitioned table's keys must
+    include the partition key. The mapper keys rows on `id` alone, which the
+    sequence keeps unique across partitions; SQLite cannot autoincrement a
+    composite key.
+    """
     __tablename__ = "cloud_costs"
 
     id = Column(Integer, primary_key=True, index=True)
-    date = Column(Date, index=True)
+    date = Column(Date, nullable=False)  # Partition key on PostgreSQL
     service = Column(String(100), index=True)
     cost = Column(Float)
     usage = Column(Float)
     account_id = Column(String(50), index=True)
+    region = Column(String(50), index=True, nullable=True)
+    payload_hash = Column(String(16), nullable=True)  # Fingerprint of cost/usage for change detection
+
+    __table_args__ = (
+        # BRIN on PostgreSQL, where rows arrive in date order; a B-tree elsewhere
+        Index("ix_cloud_costs_date", "date", postgresql_using="brin"),
+    )
@@ -1,12 +1,22 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from src.models.replicas import ReplicaRouter
 import os
 
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./cloud_cost_db.db")
+# Comma-separated replicas serving the read-only endpoints
+REPLICA_DATABASE_URLS = [url.strip() for url in os.getenv("REPLICA_DATABASE_URLS", "").split(",") if url.strip()]
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "30"))
+REPLICA_LAG_CHECK_SECONDS = float(os.getenv("REPLICA_LAG_CHECK_SECONDS", "5"))
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 engine = create_engine(DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+read_router = ReplicaRouter(
+    SessionLocal, [create_engine(url) for url in REPLICA_DATABASE_URLS],
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS, check_interval=REPLICA_LAG_CHECK_SECONDS
+)
 
 Base = declarative_base()
 
@@ -17,6 +27,44 @@ def get_db():
     finally:
         db.close()
 
+def get_read_db():
+    """Session for read-only endpoints: a replica when one is healthy, otherwise the primary."""
+    db = read_router.read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+def import_models():
+    """Import every model module so its tables are registered on Base.metadata."""
+    from src.models import (  # noqa: F401
+        cost_model, user_model, rollup_model, driver_model, budget_model, recommendation_model,
+        allocation_model, job_model
+    )
+
 def create_tables():
-    """Create all database tables."""
+    """Create all database tables (tests and throwaway databases; use migrations otherwise)."""
+    import_models()
     Base.metadata.create_all(bind=engine)
+
+def run_migrations(revision: str = "head", database_url: str = None):
+    """Apply Alembic migrations, equivalent to `alembic upgrade head`."""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(PROJECT_ROOT, "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(PROJECT_ROOT, "migrations"))
+    config.set_main_option("sqlalchemy.url", database_url or DATABASE_URL)
+    command.upgrade(config, revision)
+
+def warm_pool(connections: int = 2):
+    """Open pooled connections ahead of the first request."""
+    opened = []
+    try:
+        for _ in range(connections):
+            conn = engine.connect()
+            conn.execute(text("SELECT 1"))
+            opened.append(conn)
+    finally:
+        for conn in opened:
+            conn.close()
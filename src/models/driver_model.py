@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, Float, Date, Index
+from src.models.database import Base
+
+class CostDriver(Base):
+    """Precomputed cost change of one service or account, ranked by absolute delta."""
+    __tablename__ = "cost_drivers"
+
+    id = Column(Integer, primary_key=True, index=True)
+    as_of = Column(Date, nullable=False)
+    window = Column(String(10), nullable=False)  # "dod" or "wow"
+    dimension = Column(String(20), nullable=False)  # "service" or "account"
+    direction = Column(String(10), nullable=False)  # "increase" or "decrease"
+    rank = Column(Integer, nullable=False)
+    key = Column(String(100), nullable=False)
+    current_cost = Column(Float, default=0.0)
+    previous_cost = Column(Float, default=0.0)
+    delta = Column(Float, default=0.0)
+    delta_percent = Column(Float, nullable=True)
+
+    __table_args__ = (
+        Index('ix_cost_drivers_lookup', 'as_of', 'window', 'dimension', 'direction', 'rank'),
+    )
@@ -0,0 +1,28 @@
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, Index
+from src.models.database import Base
+
+# Outcome of a scheduled run; "missed" and "skipped" runs never started
+JOB_RUN_STATUSES = ("success", "error", "missed", "skipped")
+
+class JobRun(Base):
+    """One execution (or missed/skipped execution) of a scheduled job, recorded by the scheduler listener."""
+    __tablename__ = "job_runs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(String(50), nullable=False)  # APScheduler job id, e.g. "daily_cost_fetch"
+    status = Column(String(20), nullable=False)
+    scheduled_at = Column(DateTime(timezone=True), nullable=True)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    duration_seconds = Column(Float, nullable=True)
+    rows_fetched = Column(Integer, default=0)
+    rows_upserted = Column(Integer, default=0)
+    api_calls = Column(Integer, default=0)
+    alerts = Column(Integer, default=0)  # Alerts the run raised (anomaly check)
+    error = Column(Text, nullable=True)
+    phases = Column(Text, nullable=True)  # JSON object of phase name -> seconds
+
+    __table_args__ = (
+        Index('ix_job_runs_job_started', 'job_id', 'started_at'),
+        Index('ix_job_runs_started', 'started_at'),
+    )
@@ -0,0 +1,132 @@
+"""
+PostgreSQL range partitioning of cloud_costs by month.
+
+On PostgreSQL (see migration 0007) cloud_costs is partitioned by range on
+`date`, one partition per month named cloud_costs_yYYYYmMM, with a BRIN index
+on `date`. There is no default partition: writers create the partitions of
+the months they touch first, and the retention job drops whole expired
+partitions instead of deleting their rows. Existing partitions are looked up
+in the catalog on every call rather than cached, since another worker or the
+retention job may drop them. On other databases every helper here is a no-op.
+"""
+import re
+from datetime import date
+from typing import Iterable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+PARTITIONED_TABLE = "cloud_costs"
+PARTITION_NAME = re.compile(rf"^{PARTITIONED_TABLE}_y(\d{{4}})m(\d{{2}})$")
+
+
+def is_postgres(bind) -> bool:
+    return getattr(getattr(bind, "dialect", None), "name", None) == "postgresql"
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Month starts from the month of `first` through the month of `last`."""
+    months = []
+    month = month_start(first)
+    while month <= last:
+        months.append(month)
+        month = next_month(month)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"{PARTITIONED_TABLE}_y{month.year:04d}m{month.month:02d}"
+
+
+def partition_ddl(month: date) -> str:
+    month = month_start(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF {PARTITIONED_TABLE} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+    )
+
+
+def ensure_partitions(db: Session, dates: Iterable[date]) -> List[str]:
+    """
+    Create the monthly partitions holding `dates` that do not exist yet.
+
+    Existing partitions are read from the catalog (no lock on the parent
+    table), so steady-state ingestion issues no DDL. The DDL is committed
+    right away so the lock it takes on the parent table is not held for the
+    rest of the ingestion transaction.
+
+    Returns:
+        Names of the partitions that were created
+    """
+    if not is_postgres(db.get_bind()):
+        return []
+
+    existing = {month for month, _ in list_partitions(db)}
+    missing = sorted({month_start(d) for d in dates} - existing)
+    if not missing:
+        return []
+
+    for month in missing:
+        db.execute(text(partition_ddl(month)))
+    db.commit()
+    return [partition_name(month) for month in missing]
+
+
+def list_partitions(db: Session) -> List[Tuple[date, str]]:
+    """(month, name) of the monthly partitions of cloud_costs, oldest first."""
+    if not is_postgres(db.get_bind()):
+        return []
+    names = db.execute(text(
+        "SELECT child.relname FROM pg_inherits "
+        "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+        "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+    ), {"table": PARTITIONED_TABLE}).scalars().all()
+
+    partitions = []
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            partitions.append((date(int(match.group(1)), int(match.group(2)), 1), name))
+    return sorted(partitions)
+
+
+def drop_partitions_before(db: Session, cutoff: date) -> Tuple[List[str], int]:
+    """
+    Drop the partitions whose whole month lies before `cutoff`.
+
+    Returns:
+        Dropped partition names and the number of rows they held
+    """
+    dropped, rows = [], 0
+    for month, name in list_partitions(db):
+        if next_month(month) > cutoff:
+            break
+        rows += db.execute(text(f"SELECT count(*) FROM {name}")).scalar() or 0
+        db.execute(text(f"DROP TABLE {name}"))
+        db.commit()
+        dropped.append(name)
+    return dropped, rows
+
+
+def estimated_row_count(db: Session, model) -> int:
+    """
+    Row count of a table; on PostgreSQL the planner's estimate.
+
+    An exact count of a partitioned table scans every partition, while the
+    catalog estimate (kept current by autovacuum/ANALYZE) is a single lookup.
+    """
+    if not is_postgres(db.get_bind()):
+        return db.query(model).count()
+    estimate = db.execute(text(
+        "SELECT COALESCE(SUM(GREATEST(reltuples, 0)), 0) FROM pg_class "
+        "WHERE oid = CAST(:table AS regclass) "
+        "OR oid IN (SELECT inhrelid FROM pg_inherits WHERE inhparent = CAST(:table AS regclass))"
+    ), {"table": model.__tablename__}).scalar()
+    return int(estimate or 0)
@@ -0,0 +1,34 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+# Lifecycle of a recommendation; only implemented ones count as realized savings
+RECOMMENDATION_STATUSES = ("open", "acknowledged", "implemented")
+
+class Recommendation(Base):
+    """Deduplicated optimization finding for one (type, service, account), refreshed by the anomaly job."""
+    __tablename__ = "recommendations"
+
+    id = Column(Integer, primary_key=True, index=True)
+    type = Column(String(30), nullable=False)  # "idle_ec2", "underused_rds" or "cost_spike"
+    service = Column(String(100), nullable=False)
+    account_id = Column(String(50), nullable=False)
+    status = Column(String(20), nullable=False, default="open")
+    suggestion = Column(String(255), nullable=True)
+    cost = Column(Float, default=0.0)  # Cost of the flagged days (recent period for spikes)
+    usage = Column(Float, nullable=True)
+    previous_cost = Column(Float, nullable=True)
+    change_percent = Column(Float, nullable=True)
+    potential_savings = Column(Float, default=0.0)  # Monthly estimate
+    occurrences = Column(Integer, default=1)  # Days flagged in the latest detection window
+    first_seen = Column(Date, nullable=True)
+    last_seen = Column(Date, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), nullable=True)
+    acknowledged_at = Column(DateTime(timezone=True), nullable=True)
+    implemented_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        UniqueConstraint('type', 'service', 'account_id', name='uq_recommendations_key'),
+        Index('ix_recommendations_status_savings', 'status', 'potential_savings'),
+    )
@@ -0,0 +1,120 @@
+"""
+Routing of read-only sessions to database replicas.
+
+Writes always use the primary. Read-only endpoints ask the router for a
+session: it round-robins over the replicas whose replication lag is within
+REPLICA_MAX_LAG_SECONDS and falls back to the primary when none is. Lag is
+probed by a background thread every REPLICA_LAG_CHECK_SECONDS, so requests
+never wait for (or count) the probe queries.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything it received
+POSTGRES_LAG_SQL = (
+    "SELECT CASE WHEN NOT pg_is_in_recovery() "
+    "OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replication_lag(engine: Engine) -> float:
+    """
+    Replication lag of a replica in seconds.
+
+    Only PostgreSQL reports it; other databases (e.g. SQLite files copied or
+    streamed from the primary) are checked for reachability and report 0.
+    """
+    with engine.connect() as conn:
+        if engine.dialect.name == "postgresql":
+            return float(conn.execute(text(POSTGRES_LAG_SQL)).scalar() or 0.0)
+        conn.execute(text("SELECT 1"))
+        return 0.0
+
+
+class ReplicaRouter:
+    """Hands out read sessions from healthy replicas, or from the primary."""
+
+    def __init__(self, primary: sessionmaker, replicas: List[Engine], max_lag_seconds: float = 30.0,
+                 check_interval: float = 5.0, probe: Callable[[Engine], float] = replication_lag):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.max_lag_seconds = max_lag_seconds
+        self.check_interval = check_interval
+        self._probe = probe
+        self._sessions = [sessionmaker(autocommit=False, autoflush=False, bind=e) for e in self.replicas]
+        self._lock = threading.Lock()
+        self._lag: List[Optional[float]] = [None] * len(self.replicas)
+        self._errors: List[Optional[str]] = [None] * len(self.replicas)
+        self._healthy: List[int] = []
+        self._round_robin = itertools.count()
+        self._reads = [0] * len(self.replicas)
+        self._fallbacks = 0
+        self._monitor: Optional[threading.Thread] = None
+
+    def check(self):
+        """Probe every replica once and update the set of healthy ones."""
+        for index, engine in enumerate(self.replicas):
+            try:
+                lag, error = self._probe(engine), None
+            except Exception as e:
+                lag, error = None, str(e)
+            with self._lock:
+                was_healthy = index in self._healthy
+                self._lag[index], self._errors[index] = lag, error
+                self._healthy = [i for i, l in enumerate(self._lag) if l is not None and l <= self.max_lag_seconds]
+                is_healthy = index in self._healthy
+            if was_healthy != is_healthy:
+                logger.warning("Replica %d %s (lag %s, error %s)", index,
+                               "back in rotation" if is_healthy else "taken out of rotation", lag, error)
+
+    def _ensure_monitor(self):
+        if self._monitor is not None or not self.replicas:
+            return
+        with self._lock:
+            if self._monitor is not None:
+                return
+            self._monitor = threading.Thread(target=self._run_monitor, name="replica-lag-monitor", daemon=True)
+            self._monitor.start()
+
+    def _run_monitor(self):
+        while True:
+            self.check()
+            time.sleep(self.check_interval)
+
+    def read_session(self) -> Session:
+        """A session on a healthy replica (round robin), or on the primary when none is."""
+        self._ensure_monitor()
+        with self._lock:
+            if self._healthy:
+                index = self._healthy[next(self._round_robin) % len(self._healthy)]
+                self._reads[index] += 1
+                return self._sessions[index]()
+            if self.replicas:
+                self._fallbacks += 1
+        return self.primary()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_lag_seconds": self.max_lag_seconds,
+                "primary_fallbacks": self._fallbacks,
+                "replicas": [
+                    {
+                        "url": engine.url.render_as_string(hide_password=True),
+                        "healthy": index in self._healthy,
+                        "lag_seconds": round(self._lag[index], 3) if self._lag[index] is not None else None,
+                        "error": self._errors[index],
+                        "reads": self._reads[index],
+                    }
+                    for index, engine in enumerate(self.replicas)
+                ],
+            }
@@ -0,0 +1,48 @@
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from src.models.database import Base
+
+class CostRollup(Base):
+    """Pre-aggregated cost totals per period (week or month) and dimension."""
+    __tablename__ = "cost_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    granularity = Column(String(10), nullable=False)  # "week" or "month"
+    period_start = Column(Date, nullable=False)
+    service = Column(String(100), nullable=False)
+    account_id = Column(String(50), nullable=False)
+    region = Column(String(50), nullable=True)
+    cost = Column(Float, default=0.0)
+    usage = Column(Float, default=0.0)
+    row_count = Column(Integer, default=0)
+
+    __table_args__ = (
+        UniqueConstraint('granularity', 'period_start', 'service', 'account_id', 'region', name='uq_cost_rollups_key'),
+        Index('ix_cost_rollups_period', 'granularity', 'period_start'),
+    )
+
+class CompactedMonth(Base):
+    """
+    A month whose raw rows retention folded into its monthly rollups.
+
+    Those rollups are the month's data: raw rows found in it later (backfills,
+    late revisions) are not part of them and are added by the next compaction.
+    """
+    __tablename__ = "compacted_months"
+
+    month = Column(Date, primary_key=True)  # First day of the month
+    compacted_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class RollupPeriod(Base):
+    """
+    A period whose rollups are current with its raw rows.
+
+    Ingestion removes the periods it writes raw rows to, in the same
+    transaction as the rows; RollupService records them again when it
+    rebuilds their rollups. Until then they are aggregated from raw rows.
+    """
+    __tablename__ = "rollup_periods"
+
+    granularity = Column(String(10), primary_key=True)  # "week" or "month"
+    period_start = Column(Date, primary_key=True)
+    refreshed_at = Column(DateTime(timezone=True), server_default=func.now())
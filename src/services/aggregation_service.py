@@ -0,0 +1,239 @@
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+from src.models.rollup_model import CompactedMonth, CostRollup, RollupPeriod
+from src.services.rollup_service import period_end, period_start, period_starts
+
+GROUP_BY_FIELDS = {
+    "service": "service",
+    "account": "account_id",
+    "region": "region",
+}
+BUCKETS = ("day", "week", "month")
+DOWNSAMPLE_MODES = ("lttb", "bucket", "none")
+OTHER_KEY = "Other"
+
+
+def lttb(points: List[Tuple[date, float]], threshold: int) -> List[Tuple[date, float]]:
+    """
+    Downsample a series with the Largest-Triangle-Three-Buckets algorithm.
+
+    Keeps the first and last points and, for every bucket in between, the point
+    forming the largest triangle with its neighbours, which preserves spikes.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return points
+
+    xs = [p[0].toordinal() for p in points]
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    a = 0
+
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third triangle vertex
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, len(points))
+        span = max(next_end - next_start, 1)
+        avg_x = sum(xs[next_start:next_end]) / span
+        avg_y = sum(p[1] for p in points[next_start:next_end]) / span
+
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        ax, ay = xs[a], points[a][1]
+
+        max_area = -1.0
+        chosen = start
+        for j in range(start, end):
+            area = abs((ax - avg_x) * (points[j][1] - ay) - (ax - xs[j]) * (avg_y - ay))
+            if area > max_area:
+                max_area = area
+                chosen = j
+
+        sampled.append(points[chosen])
+        a = chosen
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def bucket_downsample(points: List[Tuple[date, float]], threshold: int) -> List[Tuple[date, float]]:
+    """Downsample a series by summing consecutive points into `threshold` buckets."""
+    if threshold >= len(points) or threshold < 1:
+        return points
+
+    size = len(points) / threshold
+    sampled = []
+    for i in range(threshold):
+        chunk = points[int(i * size):int((i + 1) * size)]
+        if chunk:
+            sampled.append((chunk[0][0], sum(p[1] for p in chunk)))
+    return sampled
+
+
+class CostAggregationService:
+    """Server-side aggregation of cost data into chart-ready time series."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def aggregate(self, group_by: str = "service", bucket: str = "day",
+                  start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  max_points: int = 365, top_n: int = 10, downsample: str = "lttb") -> Dict[str, Any]:
+        """
+        Aggregate costs per time bucket and dimension value.
+
+        Args:
+            group_by: Dimension to group by ("service", "account" or "region")
+            bucket: Time bucket size ("day", "week" or "month")
+            start_date: First day of the range (defaults to 90 days ago)
+            end_date: Last day of the range (defaults to today)
+            max_points: Maximum number of points returned per series
+            top_n: Number of series kept; the remainder is folded into "Other"
+            downsample: Downsampling method ("lttb", "bucket" or "none")
+
+        Returns:
+            Dictionary with one entry per series, each holding [date, cost] points
+        """
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_FIELDS)}")
+        if bucket not in BUCKETS:
+            raise ValueError(f"bucket must be one of {', '.join(BUCKETS)}")
+        if downsample not in DOWNSAMPLE_MODES:
+            raise ValueError(f"downsample must be one of {', '.join(DOWNSAMPLE_MODES)}")
+        if max_points < 3:
+            raise ValueError("max_points must be at least 3")
+
+        end_date = end_date or date.today()
+        start_date = start_date or end_date - timedelta(days=90)
+        if start_date > end_date:
+            raise ValueError("start_date must not be after end_date")
+
+        if bucket in ("week", "month"):
+            rows, source = self._query_rollups(group_by, bucket, start_date, end_date)
+        else:
+            rows, source = self._query_raw(group_by, bucket, start_date, end_date), "raw"
+
+        series = self._build_series(rows, top_n)
+
+        for entry in series:
+            points = entry.pop("_points")
+            if downsample == "lttb":
+                points = lttb(points, max_points)
+            elif downsample == "bucket":
+                points = bucket_downsample(points, max_points)
+            entry["points"] = [[d.isoformat(), round(v, 4)] for d, v in points]
+
+        return {
+            "group_by": group_by,
+            "bucket": bucket,
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "source": source,
+            "series": series,
+        }
+
+    def _query_rollups(self, group_by: str, bucket: str, start_date: date, end_date: date) -> Tuple[List[Tuple], str]:
+        """
+        Read bucket totals from the precomputed rollup table where they match the range.
+
+        Rollups hold whole periods, so only periods lying entirely within the
+        range are read from them; partial edge periods, and periods whose
+        rollups are not current (see RollupPeriod), are aggregated from raw
+        rows. Compacted months only exist as rollups.
+
+        Returns:
+            (bucket, key, cost) rows and their source: "rollup", "raw" or "mixed"
+        """
+        first = period_start(start_date, bucket)
+        if first < start_date:
+            first = period_end(first, bucket) + timedelta(days=1)
+        last = period_start(end_date, bucket)
+        last_end = end_date if period_end(last, bucket) == end_date else last - timedelta(days=1)
+        if first > last_end:
+            return self._query_raw(group_by, bucket, start_date, end_date), "raw"
+
+        current = {start for (start,) in self.db.query(RollupPeriod.period_start).filter(
+            RollupPeriod.granularity == bucket,
+            RollupPeriod.period_start.between(first, last_end)
+        )}
+        if bucket == "month":
+            current |= {month for (month,) in self.db.query(CompactedMonth.month).filter(
+                CompactedMonth.month.between(first, last_end))}
+
+        raw_ranges = []
+        if start_date < first:
+            raw_ranges.append((start_date, first - timedelta(days=1)))
+        for start in period_starts(first, last_end, bucket):
+            if start in current:
+                continue
+            end = period_end(start, bucket)
+            # Adjacent stale periods are read with one query
+            if raw_ranges and raw_ranges[-1][1] + timedelta(days=1) == start:
+                raw_ranges[-1] = (raw_ranges[-1][0], end)
+            else:
+                raw_ranges.append((start, end))
+        if last_end < end_date:
+            raw_ranges.append((last_end + timedelta(days=1), end_date))
+
+        column = getattr(CostRollup, GROUP_BY_FIELDS[group_by])
+        rows = []
+        if current:
+            rows = self.db.query(
+                CostRollup.period_start, column, func.sum(CostRollup.cost)
+            ).filter(
+                CostRollup.granularity == bucket,
+                CostRollup.period_start.in_(sorted(current))
+            ).group_by(CostRollup.period_start, column).all()
+        for range_start, range_end in raw_ranges:
+            rows += self._query_raw(group_by, bucket, range_start, range_end)
+
+        if not raw_ranges:
+            return rows, "rollup"
+        return rows, "mixed" if current else "raw"
+
+    def _query_raw(self, group_by: str, bucket: str, start_date: date, end_date: date) -> List[Tuple]:
+        """Aggregate raw rows per day in SQL and fold the days into buckets."""
+        column = getattr(CloudCost, GROUP_BY_FIELDS[group_by])
+        daily = self.db.query(
+            CloudCost.date, column, func.sum(CloudCost.cost)
+        ).filter(
+            CloudCost.date.between(start_date, end_date)
+        ).group_by(CloudCost.date, column).all()
+
+        if bucket == "day":
+            return daily
+
+        totals: Dict[Tuple, float] = {}
+        for day, key, cost in daily:
+            bucket_key = (period_start(day, bucket), key)
+            totals[bucket_key] = totals.get(bucket_key, 0.0) + (cost or 0.0)
+        return [(start, key, cost) for (start, key), cost in totals.items()]
+
+    def _build_series(self, rows: List[Tuple], top_n: int) -> List[Dict[str, Any]]:
+        """Pivot (bucket, key, cost) rows into the top-N series plus "Other"."""
+        by_key: Dict[str, Dict[date, float]] = {}
+        for bucket_start, key, cost in rows:
+            key = key or "unknown"
+            points = by_key.setdefault(key, {})
+            points[bucket_start] = points.get(bucket_start, 0.0) + (cost or 0.0)
+
+        ranked = sorted(by_key.items(), key=lambda item: sum(item[1].values()), reverse=True)
+        kept = ranked[:top_n] if top_n > 0 else ranked
+
+        if len(ranked) > len(kept):
+            other: Dict[date, float] = {}
+            for _, points in ranked[len(kept):]:
+                for bucket_start, cost in points.items():
+                    other[bucket_start] = other.get(bucket_start, 0.0) + cost
+            kept.append((OTHER_KEY, other))
+
+        return [
+            {
+                "key": key,
+                "total": round(sum(points.values()), 2),
+                "_points": sorted(points.items()),
+            }
+            for key, points in kept
+        ]
@@ -1,104 +1,269 @@
-import openai
+import json
+import logging
 import os
-from typing import List, Dict
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import numpy as np
 from sqlalchemy.orm import Session
-from src.models.cost_model import CloudCost
+from src.services.cost_cube import CostCube, CubeSnapshot
+
+logger = logging.getLogger(__name__)
+
+AI_MODEL = os.getenv("AI_MODEL", "gpt-3.5-turbo")
+# Upper bound on the (estimated) prompt tokens sent per account
+AI_PROMPT_TOKEN_BUDGET = int(os.getenv("AI_PROMPT_TOKEN_BUDGET", "1200"))
+AI_MAX_COMPLETION_TOKENS = int(os.getenv("AI_MAX_COMPLETION_TOKENS", "500"))
+# Only the most expensive accounts are analyzed, this many at a time
+AI_MAX_ACCOUNTS = int(os.getenv("AI_MAX_ACCOUNTS", "20"))
+AI_CONCURRENCY = int(os.getenv("AI_CONCURRENCY", "4"))
+AI_SUMMARY_DAYS = int(os.getenv("AI_SUMMARY_DAYS", "30"))
+TOP_K_DRIVERS = 8
+# Days whose account total is this many standard deviations above the window mean
+ANOMALY_Z_SCORE = 3.0
+MAX_ANOMALIES = 3
+
+SYSTEM_PROMPT = (
+    "You are a cloud cost optimization expert. You receive a JSON summary of one AWS account: "
+    "total cost of the current and previous period, the top cost drivers with their change, and "
+    "anomalous days. Reply with JSON only, in the form "
+    '{"recommendations": [{"title": str, "description": str, "service": str, '
+    '"estimated_monthly_savings": number, "priority": "high"|"medium"|"low"}]}.'
+)
+PRIORITIES = ("high", "medium", "low")
+
+# (messages) -> (response text, {"prompt_tokens": int, "completion_tokens": int})
+CompletionFn = Callable[[List[Dict[str, str]]], Tuple[str, Dict[str, int]]]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about four characters per token for English and JSON)."""
+    return len(text) // 4 + 1
+
+
+class AIUsageStats:
+    """Token usage and latency of the completion requests made by this process."""
 
-class AIRecommendationService:
     def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.latencies: List[float] = []
+
+    def record(self, latency: float, usage: Optional[Dict[str, int]] = None, error: bool = False):
+        with self._lock:
+            self.requests += 1
+            self.errors += int(error)
+            self.prompt_tokens += (usage or {}).get("prompt_tokens", 0)
+            self.completion_tokens += (usage or {}).get("completion_tokens", 0)
+            self.latencies.append(latency)
+            # Keep a bounded window for the percentiles
+            del self.latencies[:-1000]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+            return {
+                "model": AI_MODEL,
+                "requests": self.requests,
+                "errors": self.errors,
+                "prompt_tokens": self.prompt_tokens,
+                "completion_tokens": self.completion_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+                "latency_p50_ms": round(float(np.percentile(latencies, 50)) * 1000, 1),
+                "latency_p95_ms": round(float(np.percentile(latencies, 95)) * 1000, 1),
+            }
+
+
+class AIRecommendationService:
+    """
+    Per-account AI analysis over compact, token-budgeted summaries.
+
+    Each of the most expensive accounts is summarized from the cost cube
+    (period totals, top drivers and their trend, anomalous days), trimmed to
+    the prompt token budget and analyzed in its own request; requests run
+    concurrently and their JSON replies are merged.
+    """
+
+    def __init__(self, complete: Optional[CompletionFn] = None):
         self.api_key = os.getenv("OPENAI_API_KEY")
-        if self.api_key:
-            openai.api_key = self.api_key
+        self._complete = complete
 
     def generate_ai_recommendations(self, db: Session, user_id: int = None) -> List[Dict]:
         """
         Generate AI-powered cost optimization recommendations using OpenAI
         """
-        if not self.api_key:
+        if self._complete is None and not self.api_key:
             return [{"type": "error", "message": "OpenAI API key not configured"}]
 
-        # Get cost data
-        costs = db.query(CloudCost).all()
-
-        if not costs:
+        summaries = self.build_account_summaries(CostCube.snapshot_for(db))
+        if not summaries:
             return [{"type": "info", "message": "No cost data available for AI analysis"}]
 
-        # Prepare cost summary for AI
-        cost_summary = self._prepare_cost_summary(costs)
+        with ThreadPoolExecutor(max_workers=AI_CONCURRENCY) as pool:
+            results = list(pool.map(self._analyze_account, summaries))
+        return [recommendation for result in results for recommendation in result]
 
-        try:
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a cloud cost optimization expert. Analyze the provided cost data and provide specific, actionable recommendations to reduce cloud spending. Focus on AWS services and common optimization strategies."
-                    },
-                    {
-                        "role": "user",
-                        "content": f"Analyze this cloud cost data and provide 3-5 specific recommendations to optimize costs:\n\n{cost_summary}"
-                    }
-                ],
-                max_tokens=500,
-                temperature=0.7
-            )
-
-            ai_response = response.choices[0].message.content
-
-            # Parse AI response into structured recommendations
-            return self._parse_ai_response(ai_response)
+    def build_account_summaries(self, cube: CubeSnapshot, days: int = AI_SUMMARY_DAYS,
+                                max_accounts: int = AI_MAX_ACCOUNTS) -> List[Dict[str, Any]]:
+        """Summaries of the `max_accounts` most expensive accounts over the last `days` days."""
+        if cube.first_day is None:
+            return []
+        end = cube.last_day
+        start = max(end - timedelta(days=days - 1), cube.first_day)
+        current = cube.cost[cube.day_slice(start, end)]
+        previous = cube.cost[cube.day_slice(start - timedelta(days=current.shape[0]), start - timedelta(days=1))]
 
-        except Exception as e:
-            return [{"type": "error", "message": f"AI analysis failed: {str(e)}"}]
+        account_totals = current.sum(axis=(0, 1))
+        accounts = [a for a in np.argsort(account_totals)[::-1][:max_accounts] if account_totals[a] > 0]
+        return [
+            self._account_summary(cube, int(a), current[:, :, a], previous[:, :, a], start, end)
+            for a in accounts
+        ]
 
-    def _prepare_cost_summary(self, costs: List[CloudCost]) -> str:
-        """Prepare cost data summary for AI analysis"""
-        service_costs = {}
-        total_cost = 0
+    @staticmethod
+    def _account_summary(cube: CubeSnapshot, account: int, current: np.ndarray, previous: np.ndarray,
+                         start, end) -> Dict[str, Any]:
+        """Compact summary of one account; `current`/`previous` are (day x service) cost slices."""
+        days = current.shape[0]
+        current_by_service = current.sum(axis=0)
+        previous_by_service = previous.sum(axis=0) if previous.size else np.zeros_like(current_by_service)
 
-        for cost in costs:
-            service = cost.service
-            if service not in service_costs:
-                service_costs[service] = 0
-            service_costs[service] += cost.cost
-            total_cost += cost.cost
+        drivers = []
+        for service in np.argsort(current_by_service)[::-1][:TOP_K_DRIVERS]:
+            cost = float(current_by_service[service])
+            if cost <= 0:
+                break
+            before = float(previous_by_service[service])
+            drivers.append({
+                "service": cube.services[service],
+                "cost": round(cost, 2),
+                "share_percent": round(cost / current_by_service.sum() * 100, 1),
+                "change_percent": round((cost - before) / before * 100, 1) if before > 0 else None,
+            })
 
-        summary = f"Total Monthly Cost: ${total_cost:.2f}\n\nService Breakdown:\n"
-        for service, cost in sorted(service_costs.items(), key=lambda x: x[1], reverse=True):
-            percentage = (cost / total_cost) * 100 if total_cost > 0 else 0
-            summary += f"- {service}: ${cost:.2f} ({percentage:.1f}%)\n"
+        daily = current.sum(axis=1)
+        anomalies = []
+        if days > 2 and daily.std() > 0:
+            z_scores = (daily - daily.mean()) / daily.std()
+            for day in np.argsort(z_scores)[::-1][:MAX_ANOMALIES]:
+                if z_scores[day] < ANOMALY_Z_SCORE:
+                    break
+                # The service that moved the most above its own daily mean that day
+                service = int(np.argmax(current[day] - current.mean(axis=0)))
+                anomalies.append({
+                    "date": (start + timedelta(days=int(day))).isoformat(),
+                    "cost": round(float(daily[day]), 2),
+                    "z_score": round(float(z_scores[day]), 1),
+                    "main_service": cube.services[service],
+                })
 
-        return summary
+        total = float(current.sum())
+        previous_total = float(previous.sum())
+        return {
+            "account_id": cube.accounts[account],
+            "period": {"start": start.isoformat(), "end": end.isoformat(), "days": days},
+            "total_cost": round(total, 2),
+            "previous_period_cost": round(previous_total, 2),
+            "change_percent": round((total - previous_total) / previous_total * 100, 1) if previous_total > 0 else None,
+            "avg_daily_cost": round(total / days, 2) if days else 0.0,
+            "top_drivers": drivers,
+            "anomalies": anomalies,
+        }
 
-    def _parse_ai_response(self, ai_response: str) -> List[Dict]:
-        """Parse AI response into structured recommendations"""
-        recommendations = []
+    def _prepare_cost_summary(self, summary: Dict[str, Any], token_budget: int = AI_PROMPT_TOKEN_BUDGET) -> str:
+        """Render an account summary as compact JSON, dropping the smallest details until it fits the budget."""
+        summary = {**summary, "top_drivers": list(summary["top_drivers"]), "anomalies": list(summary["anomalies"])}
+        budget = token_budget - estimate_tokens(SYSTEM_PROMPT)
+        while True:
+            text = json.dumps(summary, separators=(",", ":"))
+            if estimate_tokens(text) <= budget:
+                return text
+            if len(summary["anomalies"]) > 1:
+                summary["anomalies"].pop()
+            elif len(summary["top_drivers"]) > 1:
+                summary["top_drivers"].pop()
+            else:
+                return text
+
+    def _analyze_account(self, summary: Dict[str, Any]) -> List[Dict]:
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": self._prepare_cost_summary(summary)},
+        ]
+        start = time.perf_counter()
+        try:
+            ai_response, usage = (self._complete or self._openai_complete)(messages)
+        except Exception as e:
+            ai_usage.record(time.perf_counter() - start, error=True)
+            logger.warning("AI analysis failed for account %s: %s", summary["account_id"], e)
+            return [{"type": "error", "account_id": summary["account_id"], "message": f"AI analysis failed: {str(e)}"}]
+        ai_usage.record(time.perf_counter() - start, usage)
 
-        # Split response into individual recommendations
-        lines = ai_response.split('\n')
-        current_rec = None
+        return [{**recommendation, "account_id": summary["account_id"]}
+                for recommendation in self._parse_ai_response(ai_response)]
 
-        for line in lines:
+    def _openai_complete(self, messages: List[Dict[str, str]]) -> Tuple[str, Dict[str, int]]:
+        import openai
+
+        openai.api_key = self.api_key
+        response = openai.ChatCompletion.create(
+            model=AI_MODEL,
+            messages=messages,
+            max_tokens=AI_MAX_COMPLETION_TOKENS,
+            temperature=0.2
+        )
+        usage = getattr(response, "usage", None) or {}
+        return response.choices[0].message.content, {
+            "prompt_tokens": int(usage.get("prompt_tokens", 0)),
+            "completion_tokens": int(usage.get("completion_tokens", 0)),
+        }
+
+    def _parse_ai_response(self, ai_response: str) -> List[Dict]:
+        """Parse the JSON reply; falls back to numbered/bulleted lines when the model ignored the format."""
+        # Models often wrap JSON in a ```json fence
+        match = re.search(r"\{.*\}", ai_response, re.DOTALL)
+        if match:
+            try:
+                items = json.loads(match.group(0)).get("recommendations", [])
+                return [self._recommendation(item) for item in items if isinstance(item, dict)]
+            except (ValueError, AttributeError):
+                pass
+
+        recommendations = []
+        for line in ai_response.split('\n'):
             line = line.strip()
             if not line:
                 continue
+            item = re.match(r"^(?:\d+[.)]|[-*•])\s*(.+)$", line)
+            if item:
+                title = item.group(1).split(':')[0]
+                recommendations.append(self._recommendation({"title": title, "description": item.group(1)}))
+            elif recommendations:
+                recommendations[-1]["description"] += f" {line}"
+        return recommendations
+
+    @staticmethod
+    def _recommendation(item: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            savings = float(item.get("estimated_monthly_savings"))
+        except (TypeError, ValueError):
+            savings = None
+        priority = str(item.get("priority", "medium")).lower()
+        return {
+            "type": "ai_recommendation",
+            "title": str(item.get("title", "")).strip(),
+            "description": str(item.get("description", "")).strip(),
+            "service": item.get("service"),
+            "potential_savings": savings,
+            "priority": priority if priority in PRIORITIES else "medium",
+        }
+
 
-            # Check if this is a new recommendation (numbered or bulleted)
-            if line.startswith(('1.', '2.', '3.', '4.', '5.', '-', '*')):
-                if current_rec:
-                    recommendations.append(current_rec)
-
-                current_rec = {
-                    "type": "ai_recommendation",
-                    "title": line.lstrip('12345.-* ').split(':')[0] if ':' in line else line.lstrip('12345.-* '),
-                    "description": line,
-                    "potential_savings": "TBD",  # Could be enhanced with more parsing
-                    "priority": "medium"
-                }
-            elif current_rec:
-                current_rec["description"] += f" {line}"
-
-        if current_rec:
-            recommendations.append(current_rec)
-
-        return recommendations[:5]  # Limit to 5 recommendations
+# Global usage statistics
+ai_usage = AIUsageStats()
@@ -1,10 +1,6 @@
 import os
 import logging
 from typing import List, Dict, Any
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-import requests
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +20,10 @@ class AlertService:
         if not recipients:
             recipients = [os.getenv('ALERT_EMAIL', '')]
 
+        import smtplib
+        from email.mime.text import MIMEText
+        from email.mime.multipart import MIMEMultipart
+
         try:
             msg = MIMEMultipart()
             msg['From'] = os.getenv('SMTP_FROM', 'cost-optimizer@yourdomain.com')
@@ -51,6 +51,8 @@ class AlertService:
             logger.warning("Slack alerts not configured")
             return
 
+        import requests
+
         try:
             webhook_url = os.getenv('SLACK_WEBHOOK_URL')
             payload = {
@@ -127,6 +129,33 @@ class AlertService:
         if self.slack_enabled:
             self.send_slack_alert(message)
 
+    def send_budget_alerts(self, crossings: List[Dict[str, Any]]):
+        """
+        Send one digest for all budgets that crossed a threshold in this evaluation.
+        """
+        if not crossings:
+            return
+
+        message = f"💸 Budget Alert: {len(crossings)} budgets crossed a threshold\n\n"
+        for status in sorted(crossings, key=lambda s: s['percent_used'], reverse=True)[:20]:
+            scope = " / ".join(filter(None, [status.get('account_id'), status.get('service')])) or "all spend"
+            message += f"• {status['name']} ({scope}): {status['threshold_crossed']}% threshold crossed\n"
+            message += f"  Month to date: ${status['month_to_date']:.2f} of ${status['amount']:.2f}"
+            message += f" (forecast ${status['forecast_end_of_month']:.2f})\n"
+        if len(crossings) > 20:
+            message += f"…and {len(crossings) - 20} more\n"
+
+        message += "\n📊 Check the dashboard for full details."
+
+        if self.email_enabled:
+            self.send_email_alert(
+                subject=f"Budget Alert: {len(crossings)} budgets crossed a threshold",
+                body=message.replace('\n', '<br>')
+            )
+
+        if self.slack_enabled:
+            self.send_slack_alert(message)
+
     def send_daily_cost_report(self, daily_cost: float, recommendations: List[Dict], alert_config: Dict = None):
         """
         Send daily cost report with recommendations
@@ -0,0 +1,340 @@
+import fnmatch
+import logging
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.allocation_model import AllocationRule, CostAllocation
+from src.models.cost_model import CloudCost
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("direct", "fixed", "proportional")
+UNALLOCATED = "unallocated"
+CHARGEBACK_GROUPS = {"team": "team", "service": "service", "account": "account_id"}
+# Days allocated per batch when rebuilding all history
+REBUILD_CHUNK_DAYS = 31
+
+
+def parse_targets(method: str, targets: str) -> List[Tuple[str, float]]:
+    """
+    Parse a rule's targets into (team, weight) pairs; fixed weights are normalized to sum to 1.
+
+    Proportional rules return an empty list for "*" (every team with directly allocated cost).
+
+    Raises:
+        ValueError: On an unknown method or malformed targets
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {', '.join(METHODS)}")
+    parts = [part.strip() for part in (targets or "").split(",") if part.strip()]
+    if not parts:
+        raise ValueError("targets must name at least one team")
+
+    if method == "direct":
+        if len(parts) != 1 or ":" in parts[0]:
+            raise ValueError("direct rules allocate to exactly one team")
+        return [(parts[0], 1.0)]
+
+    if method == "proportional":
+        if parts == ["*"]:
+            return []
+        if any(":" in part or part == "*" for part in parts):
+            raise ValueError("proportional targets are team names or '*'")
+        return [(team, 1.0) for team in parts]
+
+    weights = []
+    for part in parts:
+        team, _, weight = part.rpartition(":")
+        try:
+            weights.append((team.strip(), float(weight)))
+        except ValueError:
+            raise ValueError(f"fixed targets are 'team:weight' pairs, got '{part}'")
+        if not team.strip() or weights[-1][1] <= 0:
+            raise ValueError(f"fixed targets need a team and a positive weight, got '{part}'")
+    total = sum(weight for _, weight in weights)
+    return [(team, weight / total) for team, weight in weights]
+
+
+def _encode(values: Sequence[Optional[str]]) -> Tuple[List[str], np.ndarray]:
+    """Dictionary-encode values (None as "") into (distinct values, integer codes)."""
+    index: Dict[str, int] = {}
+    codes = np.fromiter((index.setdefault(value or "", len(index)) for value in values),
+                        dtype=np.int64, count=len(values))
+    return list(index), codes
+
+
+class CompiledRules:
+    """
+    Allocation rules compiled once: glob patterns become regexes and targets are parsed.
+
+    Matching evaluates each pattern once per distinct service, account and
+    region, then assigns every cost row its first matching rule (by priority)
+    with array operations.
+    """
+
+    def __init__(self, rules: Iterable[AllocationRule]):
+        rules = sorted(rules, key=lambda rule: (rule.priority, rule.id))
+        # Plain values only; the rule objects belong to the session that loaded them
+        self.ids = [rule.id for rule in rules]
+        self.methods = [rule.method for rule in rules]
+        self.patterns = [
+            tuple(self._compile(pattern) for pattern in (rule.service_pattern, rule.account_pattern, rule.region_pattern))
+            for rule in rules
+        ]
+        self.targets = [parse_targets(rule.method, rule.targets) for rule in rules]
+        self.teams = sorted({team for targets in self.targets for team, _ in targets})
+
+    @staticmethod
+    def signature(rules: Iterable[AllocationRule]) -> Tuple:
+        return tuple(sorted(
+            (rule.id, rule.priority, rule.method, rule.service_pattern, rule.account_pattern,
+             rule.region_pattern, rule.targets)
+            for rule in rules
+        ))
+
+    @staticmethod
+    def _compile(pattern: Optional[str]):
+        return re.compile(fnmatch.translate(pattern)) if pattern else None
+
+    def match(self, services: Sequence[str], accounts: Sequence[str], regions: Sequence[Optional[str]]) -> np.ndarray:
+        """Index of the first matching rule for every row; -1 where no rule matches."""
+        columns = [_encode(values) for values in (services, accounts, regions)]
+        result = np.full(len(services), -1, dtype=np.int64)
+        for index, patterns in enumerate(self.patterns):
+            matched = np.ones(len(services), dtype=bool)
+            for pattern, (values, codes) in zip(patterns, columns):
+                if pattern is not None:
+                    distinct = np.array([bool(pattern.match(value)) for value in values], dtype=bool)
+                    matched &= distinct[codes]
+            result[(result == -1) & matched] = index
+        return result
+
+    def allocate(self, rows: Sequence[Tuple[date, str, str, Optional[str], float]]) -> List[Dict[str, Any]]:
+        """
+        Allocate grouped cost rows (date, service, account_id, region, cost).
+
+        Returns:
+            CostAllocation mappings per (date, team, service, account_id, rule)
+        """
+        if not rows:
+            return []
+        days, services, accounts, regions, costs = zip(*rows)
+        cost = np.array([c or 0.0 for c in costs], dtype=float)
+        day_values, day_codes = _encode([d.isoformat() for d in days])
+        service_values, service_codes = _encode(services)
+        account_values, account_codes = _encode(accounts)
+        rule_index = self.match(services, accounts, regions)
+
+        teams = self.teams + [UNALLOCATED]
+        team_ids = {team: i for i, team in enumerate(teams)}
+        # Allocated parts: source row, team, cost and rule of each
+        parts_row, parts_team, parts_cost, parts_rule = [], [], [], []
+
+        def emit(selected: np.ndarray, team: int, amounts: np.ndarray, rule: int):
+            parts_row.append(selected)
+            parts_team.append(np.full(len(selected), team))
+            parts_cost.append(amounts)
+            parts_rule.append(np.full(len(selected), rule))
+
+        for index, method in enumerate(self.methods):
+            if method == "proportional":
+                continue
+            selected = np.flatnonzero(rule_index == index)
+            for team, weight in self.targets[index]:
+                emit(selected, team_ids[team], cost[selected] * weight, index)
+
+        # Direct and fixed cost per (day, team) drives the proportional splits
+        direct = np.zeros((len(day_values), len(teams)))
+        if parts_row:
+            np.add.at(direct, (day_codes[np.concatenate(parts_row)], np.concatenate(parts_team)),
+                      np.concatenate(parts_cost))
+
+        for index, method in enumerate(self.methods):
+            selected = np.flatnonzero(rule_index == index)
+            if method != "proportional" or not len(selected):
+                continue
+            targets = [team_ids[team] for team, _ in self.targets[index]] or \
+                [team_ids[team] for team in self.teams if direct[:, team_ids[team]].any()]
+            if not targets:
+                emit(selected, team_ids[UNALLOCATED], cost[selected], -1)
+                continue
+            weights = direct[day_codes[selected]][:, targets]
+            totals = weights.sum(axis=1, keepdims=True)
+            # Days without direct cost for any target split evenly
+            weights = np.where(totals > 0, weights / np.where(totals > 0, totals, 1), 1.0 / len(targets))
+            for column, team in enumerate(targets):
+                emit(selected, team, cost[selected] * weights[:, column], index)
+
+        unmatched = np.flatnonzero(rule_index == -1)
+        emit(unmatched, team_ids[UNALLOCATED], cost[unmatched], -1)
+
+        row = np.concatenate(parts_row)
+        keys = np.column_stack([day_codes[row], np.concatenate(parts_team), service_codes[row],
+                                account_codes[row], np.concatenate(parts_rule)])
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        totals = np.bincount(inverse.ravel(), weights=np.concatenate(parts_cost), minlength=len(unique))
+
+        return [
+            {
+                "date": date.fromisoformat(day_values[day]),
+                "team": teams[team],
+                "service": service_values[service] or "unknown",
+                "account_id": account_values[account] or "unknown",
+                "cost": float(total),
+                "rule_id": self.ids[rule] if rule >= 0 else None,
+            }
+            for (day, team, service, account, rule), total in zip(unique.tolist(), totals)
+            if total != 0
+        ]
+
+
+class AllocationService:
+    """
+    Charges costs back to teams with the stored allocation rules.
+
+    Allocations are computed in one vectorized batch per ingestion for the
+    touched dates (and for all history when the rules change) and stored in
+    `cost_allocations`, so chargeback reports are indexed aggregate reads.
+    """
+
+    _compiled: Optional[CompiledRules] = None
+    _signature: Optional[Tuple] = None
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def compiled_rules(self) -> Optional[CompiledRules]:
+        """The current rules, recompiled only when they changed; None when there are no rules."""
+        rules = list(self.db.query(AllocationRule).all())
+        if not rules:
+            return None
+        signature = CompiledRules.signature(rules)
+        if signature != AllocationService._signature:
+            AllocationService._compiled = CompiledRules(rules)
+            AllocationService._signature = signature
+        return AllocationService._compiled
+
+    def refresh_dates(self, dates: Iterable[date], commit: bool = True) -> int:
+        """
+        Recompute the allocations of the given dates.
+
+        Returns:
+            Number of allocation rows written
+        """
+        dates = set(dates)
+        compiled = self.compiled_rules()
+        if not dates or compiled is None:
+            return 0
+
+        rows = self.db.query(
+            CloudCost.date, CloudCost.service, CloudCost.account_id, CloudCost.region, func.sum(CloudCost.cost)
+        ).filter(
+            CloudCost.date.in_(dates)
+        ).group_by(CloudCost.date, CloudCost.service, CloudCost.account_id, CloudCost.region).all()
+        allocations = compiled.allocate(rows)
+
+        self.db.query(CostAllocation).filter(CostAllocation.date.in_(dates)).delete(synchronize_session=False)
+        if allocations:
+            self.db.bulk_insert_mappings(CostAllocation, allocations)
+        if commit:
+            self.db.commit()
+        return len(allocations)
+
+    def rebuild_all(self) -> int:
+        """
+        Recompute allocations for all raw history, one chunk of days at a time.
+
+        Months compacted by the retention job have no raw rows left, so their
+        monthly allocations are kept as they are.
+        """
+        bounds = self.db.query(func.min(CloudCost.date), func.max(CloudCost.date)).first()
+        written = 0
+        if bounds and bounds[0] is not None:
+            self.db.query(CostAllocation).filter(CostAllocation.date >= bounds[0]).delete(synchronize_session=False)
+        if bounds and bounds[0] is not None and self.compiled_rules() is not None:
+            start = bounds[0]
+            while start <= bounds[1]:
+                end = min(start + timedelta(days=REBUILD_CHUNK_DAYS - 1), bounds[1])
+                written += self.refresh_dates(
+                    [start + timedelta(days=i) for i in range((end - start).days + 1)], commit=False
+                )
+                start = end + timedelta(days=1)
+        self.db.commit()
+        logger.info("Rebuilt %d cost allocations", written)
+        return written
+
+    def create_rule(self, name: str, method: str, targets: str, priority: int = 100,
+                    service_pattern: Optional[str] = None, account_pattern: Optional[str] = None,
+                    region_pattern: Optional[str] = None) -> AllocationRule:
+        """
+        Validate and store a rule, then reallocate all history.
+
+        Raises:
+            ValueError: On an unknown method or malformed targets
+        """
+        parse_targets(method, targets)
+        rule = AllocationRule(name=name, method=method, targets=targets, priority=priority,
+                              service_pattern=service_pattern or None, account_pattern=account_pattern or None,
+                              region_pattern=region_pattern or None)
+        self.db.add(rule)
+        self.db.commit()
+        self.db.refresh(rule)
+        self.rebuild_all()
+        return rule
+
+    def delete_rule(self, rule_id: int) -> bool:
+        deleted = self.db.query(AllocationRule).filter(AllocationRule.id == rule_id).delete(synchronize_session=False)
+        if not deleted:
+            return False
+        self.db.commit()
+        self.rebuild_all()
+        return True
+
+    def chargeback(self, start_date: date, end_date: date, group_by: str = "team",
+                   team: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Allocated cost between two days grouped by team, service or account.
+
+        Raises:
+            ValueError: On an unknown group_by
+        """
+        if group_by not in CHARGEBACK_GROUPS:
+            raise ValueError(f"group_by must be one of {', '.join(CHARGEBACK_GROUPS)}")
+
+        column = getattr(CostAllocation, CHARGEBACK_GROUPS[group_by])
+        query = self.db.query(column, func.sum(CostAllocation.cost))
+        if team is not None:
+            query = query.filter(CostAllocation.team == team)
+        rows = query.filter(
+            CostAllocation.date.between(start_date, end_date)
+        ).group_by(column).order_by(func.sum(CostAllocation.cost).desc()).all()
+
+        total = sum(cost or 0.0 for _, cost in rows)
+        return {
+            "start_date": start_date.isoformat(),
+            "end_date": end_date.isoformat(),
+            "group_by": group_by,
+            "team": team,
+            "total": round(total, 2),
+            "items": [
+                {"key": key, "cost": round(cost or 0.0, 2),
+                 "percent": round((cost or 0.0) / total * 100, 2) if total else 0.0}
+                for key, cost in rows
+            ],
+        }
+
+
+def serialize_rule(rule: AllocationRule) -> Dict[str, Any]:
+    return {
+        "id": rule.id,
+        "name": rule.name,
+        "priority": rule.priority,
+        "method": rule.method,
+        "service_pattern": rule.service_pattern,
+        "account_pattern": rule.account_pattern,
+        "region_pattern": rule.region_pattern,
+        "targets": rule.targets,
+    }
@@ -1,117 +1,217 @@
-from typing import List, Dict, Any
-from sqlalchemy.orm import Session
-from src.models.cost_model import CloudCost
-from datetime import datetime, timedelta
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+import numpy as np
+from sqlalchemy.orm import Session, sessionmaker
+from src.services.cost_cube import CostCube, CubeSnapshot
+from datetime import date, datetime, timedelta
+
+logger = logging.getLogger(__name__)
+
+# Usage below these levels marks an EC2 instance as idle / an RDS instance as underused
+IDLE_EC2_USAGE_THRESHOLD = 5.0
+UNDERUSED_RDS_USAGE_THRESHOLD = 10.0
+# A detector still running after this many seconds is reported as timed out and contributes nothing
+DETECTOR_TIMEOUT_SECONDS = float(os.getenv("DETECTOR_TIMEOUT_SECONDS", "30"))
+DETECTOR_CONCURRENCY = int(os.getenv("DETECTOR_CONCURRENCY", "4"))
+
+# Shared inputs a detector can declare; each is loaded once per run, before the detectors start.
+# "session" is special: every detector declaring it gets a session of its own.
+INPUT_LOADERS: Dict[str, Callable[[Session], Any]] = {
+    "cube": CostCube.snapshot_for,
+}
+
+
+class Detector(NamedTuple):
+    category: str  # Key of the detector's findings in get_all_recommendations
+    method: str  # AnomalyDetector method producing the findings
+    needs: Tuple[str, ...]
+    timeout: float
+
+
+# Registered detectors, in result order
+DETECTORS: List[Detector] = []
+
+
+def register_detector(category: str, needs: Tuple[str, ...] = ("cube",),
+                      timeout: Optional[float] = None) -> Callable:
+    """Register an AnomalyDetector method as the detector of a recommendation category."""
+    def decorate(method: Callable) -> Callable:
+        unknown = [need for need in needs if need != "session" and need not in INPUT_LOADERS]
+        if unknown:
+            raise ValueError(f"Unknown detector inputs: {', '.join(unknown)}")
+        DETECTORS.append(Detector(category, method.__name__, tuple(needs), timeout or DETECTOR_TIMEOUT_SECONDS))
+        return method
+    return decorate
+
 
 class AnomalyDetector:
+    """
+    Detects idle resources and cost spikes from the shared cost cube.
+
+    Findings are per (day, service, account) cell of the cube; usage is the
+    mean usage of the records in a cell. Detectors are registered with
+    `register_detector`; `get_all_recommendations` loads their declared
+    inputs once and runs them concurrently, each with its own timeout.
+    """
+
     def __init__(self, db: Session):
         self.db = db
+        self._cube = None
+        self.session: Optional[Session] = None
+        # Per category: seconds, status ("ok", "timeout" or "error") and number of findings of the last run
+        self.timings: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def cube(self) -> CubeSnapshot:
+        if self._cube is None:
+            self._cube = CostCube.snapshot_for(self.db)
+        return self._cube
+
+    def _low_usage_cells(self, pattern: str, since: date, threshold: float) -> np.ndarray:
+        """(day, service, account) indices of matching cells with mean usage below the threshold."""
+        cube = self.cube
+        days = cube.day_slice(since, cube.last_day or since)
+        services = np.flatnonzero(cube.service_mask(pattern))
+        rows = cube.rows[days][:, services]
+        usage = cube.usage[days][:, services]
+        mean_usage = np.divide(usage, rows, out=np.zeros_like(usage), where=rows > 0)
+        cells = np.argwhere((rows > 0) & (mean_usage < threshold))
+        # Map slice positions back to cube day and service ids
+        cells[:, 0] += days.start
+        cells[:, 1] = services[cells[:, 1]]
+        return cells
+
+    def _cell(self, day: int, service: int, account: int) -> Dict[str, Any]:
+        cube = self.cube
+        return {
+            "service": cube.services[service],
+            "account_id": cube.accounts[account],
+            "date": cube.day_at(day).isoformat(),
+            "cost": float(cube.cost[day, service, account]),
+            "usage": float(cube.usage[day, service, account] / cube.rows[day, service, account]),
+        }
 
+    @register_detector("idle_instances")
     def detect_idle_instances(self) -> List[Dict[str, Any]]:
         """
         Detect EC2 instances with low CPU usage over the last 7 days.
         """
         seven_days_ago = datetime.now().date() - timedelta(days=7)
 
-        # Query for EC2 costs with low usage (assuming usage < 5% indicates idle)
-        idle_instances = self.db.query(CloudCost).filter(
-            CloudCost.service.like('%EC2%'),
-            CloudCost.date >= seven_days_ago,
-            CloudCost.usage < 5.0  # Assuming usage is in percentage or normalized
-        ).all()
-
         recommendations = []
-        for instance in idle_instances:
+        # Usage < 5% indicates idle (assuming usage is in percentage or normalized)
+        for day, service, account in self._low_usage_cells('EC2', seven_days_ago, IDLE_EC2_USAGE_THRESHOLD):
+            cell = self._cell(day, service, account)
             recommendations.append({
                 "type": "idle_ec2",
-                "service": instance.service,
-                "date": instance.date.isoformat(),
-                "cost": instance.cost,
-                "usage": instance.usage,
+                **cell,
                 "suggestion": "Stop or resize this idle EC2 instance",
-                "potential_savings": instance.cost * 30  # Monthly estimate
+                "potential_savings": cell["cost"] * 30  # Monthly estimate
             })
 
         return recommendations
 
+    @register_detector("underused_rds")
     def detect_underused_rds(self) -> List[Dict[str, Any]]:
         """
         Detect RDS instances with low storage utilization.
         """
-        recent_costs = self.db.query(CloudCost).filter(
-            CloudCost.service.like('%RDS%'),
-            CloudCost.date >= datetime.now().date() - timedelta(days=30)
-        ).all()
+        thirty_days_ago = datetime.now().date() - timedelta(days=30)
 
         recommendations = []
-        for cost in recent_costs:
-            # Assuming usage < 10% indicates underutilization
-            if cost.usage < 10.0:
-                recommendations.append({
-                    "type": "underused_rds",
-                    "service": cost.service,
-                    "date": cost.date.isoformat(),
-                    "cost": cost.cost,
-                    "usage": cost.usage,
-                    "suggestion": f"Reduce RDS storage from current to {cost.usage * 0.5:.1f}% utilization",
-                    "potential_savings": cost.cost * 0.3  # Estimate 30% savings
-                })
+        # Assuming usage < 10% indicates underutilization
+        for day, service, account in self._low_usage_cells('RDS', thirty_days_ago, UNDERUSED_RDS_USAGE_THRESHOLD):
+            cell = self._cell(day, service, account)
+            recommendations.append({
+                "type": "underused_rds",
+                **cell,
+                "suggestion": f"Reduce RDS storage from current to {cell['usage'] * 0.5:.1f}% utilization",
+                "potential_savings": cell["cost"] * 0.3  # Estimate 30% savings
+            })
 
         return recommendations
 
+    @register_detector("cost_spikes")
     def detect_cost_spikes(self) -> List[Dict[str, Any]]:
         """
-        Detect significant cost increases compared to previous periods.
+        Detect significant cost increases per service compared to the previous period.
         """
         thirty_days_ago = datetime.now().date() - timedelta(days=30)
         sixty_days_ago = datetime.now().date() - timedelta(days=60)
 
-        recent_costs = self.db.query(CloudCost).filter(
-            CloudCost.date >= thirty_days_ago
-        ).all()
-
-        previous_costs = self.db.query(CloudCost).filter(
-            CloudCost.date.between(sixty_days_ago, thirty_days_ago)
-        ).all()
-
-        # Group by service
-        recent_by_service = {}
-        previous_by_service = {}
-
-        for cost in recent_costs:
-            if cost.service not in recent_by_service:
-                recent_by_service[cost.service] = 0
-            recent_by_service[cost.service] += cost.cost
-
-        for cost in previous_costs:
-            if cost.service not in previous_by_service:
-                previous_by_service[cost.service] = 0
-            previous_by_service[cost.service] += cost.cost
+        cube = self.cube
+        if cube.first_day is None:
+            return []
+        # Per-service totals of both periods, over all accounts
+        recent = cube.cost[cube.day_slice(thirty_days_ago, cube.last_day)].sum(axis=(0, 2))
+        previous = cube.cost[cube.day_slice(sixty_days_ago, thirty_days_ago)].sum(axis=(0, 2))
+        present = cube.rows[cube.day_slice(thirty_days_ago, cube.last_day)].any(axis=(0, 2))
 
+        increase = np.divide(recent - previous, previous, out=np.zeros_like(recent), where=previous > 0) * 100
         recommendations = []
-        for service, recent_total in recent_by_service.items():
-            previous_total = previous_by_service.get(service, 0)
-            if previous_total > 0:
-                increase_percent = ((recent_total - previous_total) / previous_total) * 100
-                if increase_percent > 20:  # 20% increase threshold
-                    recommendations.append({
-                        "type": "cost_spike",
-                        "service": service,
-                        "recent_cost": recent_total,
-                        "previous_cost": previous_total,
-                        "increase_percent": increase_percent,
-                        "suggestion": f"Investigate {service} cost increase of {increase_percent:.1f}%",
-                        "potential_savings": 0  # Investigation needed
-                    })
+        # 20% increase threshold
+        for service_id in np.flatnonzero(present & (previous > 0) & (increase > 20)):
+            service = cube.services[service_id]
+            increase_percent = float(increase[service_id])
+            recommendations.append({
+                "type": "cost_spike",
+                "service": service,
+                "recent_cost": float(recent[service_id]),
+                "previous_cost": float(previous[service_id]),
+                "increase_percent": increase_percent,
+                "suggestion": f"Investigate {service} cost increase of {increase_percent:.1f}%",
+                "potential_savings": 0  # Investigation needed
+            })
 
         return recommendations
 
     def get_all_recommendations(self) -> Dict[str, List[Dict[str, Any]]]:
         """
         Get all types of recommendations.
+
+        Latency is bounded by the slowest detector (at most its timeout) rather
+        than the sum of all of them; a detector that fails or times out returns
+        no findings and is reported in `timings`.
         """
-        return {
-            "idle_instances": self.detect_idle_instances(),
-            "underused_rds": self.detect_underused_rds(),
-            "cost_spikes": self.detect_cost_spikes()
-        }
+        needs = {need for detector in DETECTORS for need in detector.needs if need != "session"}
+        inputs = {need: INPUT_LOADERS[need](self.db) for need in sorted(needs)}
+        self._cube = inputs.get("cube", self._cube)
+
+        pool = ThreadPoolExecutor(max_workers=DETECTOR_CONCURRENCY, thread_name_prefix="detector")
+        started = time.perf_counter()
+        futures = [(detector, pool.submit(self._run_detector, detector)) for detector in DETECTORS]
+        results: Dict[str, List[Dict[str, Any]]] = {}
+        self.timings = {}
+        for detector, future in futures:
+            remaining = max(0.0, started + detector.timeout - time.perf_counter())
+            try:
+                findings, seconds = future.result(timeout=remaining)
+                status = "ok"
+            except FutureTimeoutError:
+                findings, seconds, status = [], detector.timeout, "timeout"
+                logger.warning(f"Detector {detector.category} timed out after {detector.timeout}s")
+            except Exception:
+                findings, seconds, status = [], time.perf_counter() - started, "error"
+                logger.exception(f"Detector {detector.category} failed")
+            results[detector.category] = findings
+            self.timings[detector.category] = {"seconds": round(seconds, 6), "status": status, "findings": len(findings)}
+        # Timed-out detectors cannot be interrupted; their threads finish in the background
+        pool.shutdown(wait=False)
+        return results
+
+    def _run_detector(self, detector: Detector) -> Tuple[List[Dict[str, Any]], float]:
+        start = time.perf_counter()
+        # Sessions are not thread-safe: detectors querying the database get their own
+        worker = self
+        if "session" in detector.needs:
+            worker = type(self)(self.db)
+            worker._cube = self._cube
+            worker.session = sessionmaker(bind=self.db.get_bind())()
+        try:
+            return getattr(worker, detector.method)(), time.perf_counter() - start
+        finally:
+            if worker.session is not None:
+                worker.session.close()
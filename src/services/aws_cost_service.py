@@ -1,22 +1,103 @@
-import boto3
 import os
+import logging
+import threading
 from datetime import datetime, timedelta
-from typing import List, Dict, Any
-from botocore.exceptions import ClientError
+from typing import List, Dict, Any, Optional
+from src.services.cost_explorer_cache import COST_EXPLORER_CACHE_ENABLED, CostExplorerCache, cost_explorer_cache
+
+logger = logging.getLogger(__name__)
+
+GRANULARITY = 'DAILY'
+METRICS = ['UnblendedCost', 'UsageQuantity']
+GROUP_BY = [{'Type': 'DIMENSION', 'Key': 'SERVICE'}]
 
 class AWSCostService:
-    def __init__(self):
-        self.client = boto3.client(
-            'ce',
-            aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
-            aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
-            region_name='us-east-1'  # Default region for Cost Explorer
-        )
+    # Billed Cost Explorer requests made by this process
+    api_calls = 0
+    _api_calls_lock = threading.Lock()
+
+    def __init__(self, cache: Optional[CostExplorerCache] = None):
+        self._client = None
+        self.cache = cache or (cost_explorer_cache if COST_EXPLORER_CACHE_ENABLED else None)
+
+    @property
+    def client(self):
+        """Cost Explorer client, created (and boto3 imported) on first use."""
+        if self._client is None:
+            import boto3
+
+            self._client = boto3.client(
+                'ce',
+                aws_access_key_id=os.getenv('AWS_ACCESS_KEY_ID'),
+                aws_secret_access_key=os.getenv('AWS_SECRET_ACCESS_KEY'),
+                region_name='us-east-1'  # Default region for Cost Explorer
+            )
+        return self._client
+
+    def _fetch_results(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """
+        Call Cost Explorer (following pagination) and return its ResultsByTime entries.
+
+        A day's Groups can continue on the next page; entries of the same day
+        are merged so every returned day is complete.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        kwargs = {
+            'TimePeriod': {'Start': start_date, 'End': end_date},
+            'Granularity': GRANULARITY,
+            'Metrics': METRICS,
+            'GroupBy': GROUP_BY,
+        }
+        while True:
+            response = self.client.get_cost_and_usage(**kwargs)
+            with AWSCostService._api_calls_lock:
+                AWSCostService.api_calls += 1
+            for result in response['ResultsByTime']:
+                day = results.get(result['TimePeriod']['Start'])
+                if day is None:
+                    results[result['TimePeriod']['Start']] = {**result, 'Groups': list(result.get('Groups', []))}
+                else:
+                    day['Groups'].extend(result.get('Groups', []))
+                    day['Estimated'] = day.get('Estimated', False) or result.get('Estimated', False)
+            if not response.get('NextPageToken'):
+                return list(results.values())
+            kwargs['NextPageToken'] = response['NextPageToken']
+
+    def _cached_results(self, start_date: str, end_date: str, account_id: str) -> List[Dict[str, Any]]:
+        """
+        ResultsByTime for the period, reading final days from the cache and
+        fetching only the remaining days with a single call.
+        """
+        if self.cache is None:
+            return self._fetch_results(start_date, end_date)
+
+        first = datetime.strptime(start_date, '%Y-%m-%d').date()
+        last = datetime.strptime(end_date, '%Y-%m-%d').date()
+        days = [first + timedelta(days=i) for i in range((last - first).days)]
+        scope = CostExplorerCache.scope(account_id, GRANULARITY, GROUP_BY, METRICS)
+
+        by_day = self.cache.get_days(scope, days)
+        missing = [day for day in days if day not in by_day]
+        if missing:
+            fetched = {}
+            for result in self._fetch_results(min(missing).isoformat(),
+                                              (max(missing) + timedelta(days=1)).isoformat()):
+                fetched[datetime.strptime(result['TimePeriod']['Start'], '%Y-%m-%d').date()] = result
+            # Cache days without data too, so they are not billed again
+            for day in missing:
+                fetched.setdefault(day, CostExplorerCache.empty_result(day))
+            self.cache.store_days(scope, fetched)
+            by_day.update(fetched)
+
+        return [by_day[day] for day in days if day in by_day]
 
     def get_cost_and_usage(self, start_date: str, end_date: str) -> List[Dict[str, Any]]:
         """
         Fetch cost and usage data from AWS Cost Explorer.
 
+        Days older than the revision window are served from the local
+        response cache once fetched, so only the open window is billed again.
+
         Args:
             start_date: Start date in YYYY-MM-DD format
             end_date: End date in YYYY-MM-DD format
@@ -24,24 +105,12 @@ class AWSCostService:
         Returns:
             List of cost data dictionaries
         """
-        try:
-            response = self.client.get_cost_and_usage(
-                TimePeriod={
-                    'Start': start_date,
-                    'End': end_date
-                },
-                Granularity='DAILY',
-                Metrics=['UnblendedCost', 'UsageQuantity'],
-                GroupBy=[
-                    {
-                        'Type': 'DIMENSION',
-                        'Key': 'SERVICE'
-                    }
-                ]
-            )
+        from botocore.exceptions import ClientError
 
+        account_id = os.getenv('AWS_ACCOUNT_ID', 'default')
+        try:
             cost_data = []
-            for result in response['ResultsByTime']:
+            for result in self._cached_results(start_date, end_date, account_id):
                 date = result['TimePeriod']['Start']
                 for group in result['Groups']:
                     service = group['Keys'][0]
@@ -53,13 +122,13 @@ class AWSCostService:
                         'service': service,
                         'cost': cost,
                         'usage': usage,
-                        'account_id': os.getenv('AWS_ACCOUNT_ID', 'default')
+                        'account_id': account_id
                     })
 
             return cost_data
 
         except ClientError as e:
-            print(f"Error fetching AWS cost data: {e}")
+            logger.error(f"Error fetching AWS cost data: {e}")
             return []
 
     def get_yesterday_costs(self) -> List[Dict[str, Any]]:
@@ -71,3 +140,16 @@ class AWSCostService:
         end_date = (yesterday + timedelta(days=1)).strftime('%Y-%m-%d')
 
         return self.get_cost_and_usage(start_date, end_date)
+
+    def get_recent_costs(self, days: int = 3) -> List[Dict[str, Any]]:
+        """
+        Get cost data for the last `days` days including today.
+
+        Cost Explorer keeps revising recent days, so this window is re-fetched
+        by the intraday job.
+        """
+        today = datetime.now()
+        start_date = (today - timedelta(days=days)).strftime('%Y-%m-%d')
+        end_date = (today + timedelta(days=1)).strftime('%Y-%m-%d')
+
+        return self.get_cost_and_usage(start_date, end_date)
@@ -0,0 +1,181 @@
+import calendar
+import logging
+from functools import lru_cache
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import date
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.budget_model import Budget
+from src.models.cost_model import CloudCost
+from src.models.rollup_model import CostRollup
+from src.services.alert_service import AlertService
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=256)
+def parse_thresholds(thresholds: Optional[str]) -> Tuple[int, ...]:
+    """Parse a comma separated list of threshold percentages."""
+    return tuple(sorted(int(t) for t in (thresholds or "").split(",") if t.strip()))
+
+
+class SpendIndex:
+    """Month-to-date spend totals keyed for O(1) budget lookups."""
+
+    def __init__(self, rows: List[Tuple[str, str, float]]):
+        self.by_pair: Dict[Tuple[str, str], float] = {}
+        self.by_account: Dict[str, float] = {}
+        self.by_service: Dict[str, float] = {}
+        self.total = 0.0
+
+        for account_id, service, cost in rows:
+            cost = cost or 0.0
+            self.by_pair[(account_id, service)] = self.by_pair.get((account_id, service), 0.0) + cost
+            self.by_account[account_id] = self.by_account.get(account_id, 0.0) + cost
+            self.by_service[service] = self.by_service.get(service, 0.0) + cost
+            self.total += cost
+
+    def spend_for(self, account_id: Optional[str], service: Optional[str]) -> float:
+        if account_id and service:
+            return self.by_pair.get((account_id, service), 0.0)
+        if account_id:
+            return self.by_account.get(account_id, 0.0)
+        if service:
+            return self.by_service.get(service, 0.0)
+        return self.total
+
+
+class BudgetService:
+    """
+    Evaluates every stored budget against month-to-date spend in one batched pass.
+
+    Spend comes from one grouped rollup query and budgets from one column query;
+    percentages, forecasts and crossed thresholds are then computed as arrays.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_spend(self, month_start: date) -> SpendIndex:
+        """Read month-to-date spend per (account, service) from the monthly rollups."""
+        rows = self.db.query(
+            CostRollup.account_id, CostRollup.service, func.sum(CostRollup.cost)
+        ).filter(
+            CostRollup.granularity == "month",
+            CostRollup.period_start == month_start
+        ).group_by(CostRollup.account_id, CostRollup.service).all()
+        return SpendIndex(rows)
+
+    def _evaluate(self, as_of: Optional[date], tenant: Optional[str]) -> Dict[str, Any]:
+        """
+        Compute spend, forecast and crossed threshold for every budget as arrays.
+        """
+        if as_of is None:
+            as_of = self.db.query(func.max(CloudCost.date)).scalar() or date.today()
+
+        month_start = as_of.replace(day=1)
+        days_in_month = calendar.monthrange(as_of.year, as_of.month)[1]
+        spend = self.load_spend(month_start)
+
+        # Plain column tuples: evaluating thousands of budgets should not build ORM objects
+        query = self.db.query(
+            Budget.id, Budget.name, Budget.tenant, Budget.account_id, Budget.service, Budget.amount,
+            Budget.thresholds, Budget.last_alerted_period, Budget.last_alerted_threshold
+        )
+        if tenant:
+            query = query.filter(Budget.tenant == tenant)
+        budgets = query.all()
+
+        amount = np.array([b.amount or 0.0 for b in budgets], dtype=float)
+        mtd = np.array([spend.spend_for(b.account_id, b.service) for b in budgets], dtype=float)
+        forecast = mtd / as_of.day * days_in_month
+        with np.errstate(divide="ignore", invalid="ignore"):
+            percent = np.where(amount > 0, mtd / amount * 100, 0.0)
+            forecast_percent = np.where(amount > 0, forecast / amount * 100, 0.0)
+
+        # Highest threshold at or below the percentage used, per distinct threshold list
+        crossed = np.zeros(len(budgets), dtype=int)
+        threshold_strings = np.array([b.thresholds or "" for b in budgets], dtype=object)
+        for thresholds in set(threshold_strings):
+            levels = np.array(parse_thresholds(thresholds), dtype=int)
+            if not levels.size:
+                continue
+            mask = threshold_strings == thresholds
+            index = np.searchsorted(levels, percent[mask], side="right")
+            crossed[mask] = np.where(index > 0, levels[np.maximum(index - 1, 0)], 0)
+
+        return {
+            "as_of": as_of,
+            "period": month_start.strftime("%Y-%m"),
+            "budgets": budgets,
+            "mtd": mtd,
+            "forecast": forecast,
+            "percent": percent,
+            "forecast_percent": forecast_percent,
+            "crossed": crossed,
+        }
+
+    @staticmethod
+    def _status(result: Dict[str, Any], i: int) -> Dict[str, Any]:
+        budget = result["budgets"][i]
+        return {
+            "id": budget.id,
+            "name": budget.name,
+            "tenant": budget.tenant,
+            "account_id": budget.account_id,
+            "service": budget.service,
+            "amount": budget.amount,
+            "period": result["period"],
+            "month_to_date": round(float(result["mtd"][i]), 2),
+            "forecast_end_of_month": round(float(result["forecast"][i]), 2),
+            "percent_used": round(float(result["percent"][i]), 2),
+            "forecast_percent": round(float(result["forecast_percent"][i]), 2),
+            "threshold_crossed": int(result["crossed"][i]),
+        }
+
+    def evaluate_all(self, as_of: Optional[date] = None, tenant: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate budgets against month-to-date and forecasted end-of-month spend.
+
+        Args:
+            as_of: Last day with cost data (defaults to the latest ingested day)
+            tenant: Only evaluate this tenant's budgets
+
+        Returns:
+            One status dictionary per budget
+        """
+        result = self._evaluate(as_of, tenant)
+        return [self._status(result, i) for i in range(len(result["budgets"]))]
+
+    def check_thresholds(self, as_of: Optional[date] = None, send_alerts: bool = True) -> List[Dict[str, Any]]:
+        """
+        Find budgets that crossed a threshold not yet alerted this month and alert once.
+
+        Budgets already alerted for a later month are skipped, so evaluating a past
+        month never rewinds their alert state (which would re-alert the later month).
+
+        Returns:
+            Status dictionaries of the newly crossed budgets
+        """
+        result = self._evaluate(as_of, None)
+        period = result["period"]
+        budgets = result["budgets"]
+
+        last_period = np.array([b.last_alerted_period == period for b in budgets], dtype=bool)
+        later_period = np.array([(b.last_alerted_period or "") > period for b in budgets], dtype=bool)
+        last_threshold = np.array([b.last_alerted_threshold or 0 for b in budgets], dtype=int)
+        crossed = result["crossed"]
+        new = np.nonzero((crossed > 0) & ~later_period & ~(last_period & (last_threshold >= crossed)))[0]
+
+        crossings = [self._status(result, i) for i in new]
+        if send_alerts and crossings:
+            AlertService().send_budget_alerts(crossings)
+            self.db.bulk_update_mappings(Budget, [
+                {"id": c["id"], "last_alerted_period": period, "last_alerted_threshold": c["threshold_crossed"]}
+                for c in crossings
+            ])
+            self.db.commit()
+            logger.info(f"Sent budget alerts for {len(crossings)} threshold crossings")
+
+        return crossings
@@ -0,0 +1,287 @@
+import logging
+import os
+import threading
+import time
+import weakref
+from datetime import date, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+
+logger = logging.getLogger(__name__)
+
+# Most recent days held in memory; older history is read from the database
+CUBE_MAX_DAYS = int(os.getenv("COST_CUBE_MAX_DAYS", "400"))
+# Upper bound on day x service x account cells (about 20 bytes each); with many
+# services and accounts fewer days are held and older ranges are read from the database
+CUBE_MAX_CELLS = int(os.getenv("COST_CUBE_MAX_CELLS", "5000000"))
+# Reload after this many seconds so changes ingested by other workers show up
+CUBE_TTL_SECONDS = int(os.getenv("COST_CUBE_TTL_SECONDS", "300"))
+
+
+class CubeSnapshot:
+    """
+    Immutable state of a cube at one point in time.
+
+    Readers take one snapshot and slice it throughout, so a concurrent refresh
+    (which publishes a new snapshot) can never hand them arrays of different
+    shapes.
+    """
+
+    def __init__(self, first_day: Optional[date], complete_from: Optional[date], services: Iterable[str],
+                 accounts: Iterable[str], cost: np.ndarray, usage: np.ndarray, rows: np.ndarray):
+        self.first_day = first_day
+        # First day the cube holds completely; None when it holds all history
+        self.complete_from = complete_from
+        self.services: Tuple[str, ...] = tuple(services)
+        self.accounts: Tuple[str, ...] = tuple(accounts)
+        self.service_ids: Dict[str, int] = {service: i for i, service in enumerate(self.services)}
+        self.account_ids: Dict[str, int] = {account: i for i, account in enumerate(self.accounts)}
+        for array in (cost, usage, rows):
+            array.flags.writeable = False
+        self.cost = cost
+        self.usage = usage
+        self.rows = rows
+
+    @classmethod
+    def empty(cls, complete_from: Optional[date] = None) -> "CubeSnapshot":
+        return cls(None, complete_from, (), (), np.zeros((0, 0, 0)), np.zeros((0, 0, 0)),
+                   np.zeros((0, 0, 0), dtype=np.int32))
+
+    @property
+    def days(self) -> int:
+        return self.cost.shape[0]
+
+    @property
+    def last_day(self) -> Optional[date]:
+        return self.first_day + timedelta(days=self.days - 1) if self.first_day and self.days else None
+
+    def covers(self, start: date) -> bool:
+        """Whether every row from `start` on is held in the cube."""
+        return self.complete_from is None or start >= self.complete_from
+
+    def day_slice(self, start: date, end: date) -> slice:
+        """Index range of the days between start and end (inclusive), clipped to the cube."""
+        if self.first_day is None:
+            return slice(0, 0)
+        first = min(max((start - self.first_day).days, 0), self.days)
+        last = min(max((end - self.first_day).days + 1, 0), self.days)
+        return slice(first, max(first, last))
+
+    def day_at(self, index: int) -> date:
+        return self.first_day + timedelta(days=int(index))
+
+    def service_mask(self, pattern: str) -> np.ndarray:
+        """Boolean mask of services whose name contains `pattern`, ignoring case (SQLite LIKE '%pattern%')."""
+        pattern = pattern.lower()
+        return np.array([pattern in service.lower() for service in self.services], dtype=bool)
+
+    def service_totals(self, start: date, end: date) -> Dict[str, float]:
+        """Total cost per service between two days."""
+        days = self.day_slice(start, end)
+        totals = self.cost[days].sum(axis=(0, 2))
+        present = self.rows[days].any(axis=(0, 2))
+        return {self.services[i]: float(totals[i]) for i in np.flatnonzero(present)}
+
+    def total(self, start: date, end: date) -> float:
+        return float(self.cost[self.day_slice(start, end)].sum())
+
+    def monthly_totals(self) -> Dict[str, float]:
+        """
+        Total cost per calendar month ("YYYY-MM") with data in the cube.
+
+        When the cube does not hold all history, the month it was cut in is
+        partial and left out.
+        """
+        if self.first_day is None:
+            return {}
+        daily = self.cost.sum(axis=(1, 2))
+        present = self.rows.any(axis=(1, 2))
+        if self.complete_from is not None:
+            first_full = self.complete_from
+            if first_full.day != 1:
+                first_full = (first_full.replace(day=28) + timedelta(days=4)).replace(day=1)
+            present[:self.day_slice(self.first_day, first_full - timedelta(days=1)).stop] = False
+        months = np.array([self.day_at(i).strftime("%Y-%m") for i in range(self.days)])
+        return {month: float(daily[months == month].sum()) for month in np.unique(months[present])}
+
+
+class CostCube:
+    """
+    Dense in-memory cube of daily cost and usage per (day, service, account).
+
+    Service and account names are dictionary-encoded to integer ids, and
+    cost, usage and row counts are (day x service x account) arrays, so
+    analytic code slices views instead of materializing ORM objects. One
+    cube is shared per database engine; it is loaded lazily on first use and
+    refreshed for the touched dates after each ingestion. Cubes of the other
+    engines (read replicas) are invalidated by ingestion and reload on next use.
+
+    The arrays are bounded to CUBE_MAX_CELLS: the more services and accounts,
+    the fewer recent days are held. Readers check `covers` and query older
+    ranges from the database.
+
+    Loads and refreshes build new arrays and publish them as a new
+    `CubeSnapshot`; readers should take `snapshot` (or `snapshot_for`) once.
+    Attributes of the current snapshot can also be read from the cube itself.
+    """
+
+    _cubes: "weakref.WeakKeyDictionary" = weakref.WeakKeyDictionary()
+    _registry_lock = threading.Lock()
+
+    def __init__(self):
+        self.loaded_at = 0.0
+        self._lock = threading.Lock()
+        self.snapshot = CubeSnapshot.empty()
+
+    def __getattr__(self, name: str):
+        # Only called for attributes the cube itself lacks: the snapshot's read API
+        if name == "snapshot":
+            raise AttributeError(name)
+        return getattr(self.snapshot, name)
+
+    @classmethod
+    def for_session(cls, db: Session) -> "CostCube":
+        """Return the cube of the session's engine, loading it on first use or after the TTL."""
+        bind = db.get_bind()
+        with cls._registry_lock:
+            cube = cls._cubes.get(bind)
+            if cube is None:
+                cube = cls._cubes[bind] = cls()
+        if not cube.loaded_at or time.monotonic() - cube.loaded_at > CUBE_TTL_SECONDS:
+            cube.load(db)
+        return cube
+
+    @classmethod
+    def snapshot_for(cls, db: Session) -> CubeSnapshot:
+        """Current snapshot of the session engine's cube."""
+        return cls.for_session(db).snapshot
+
+    @classmethod
+    def refresh_loaded(cls, db: Session, dates: Iterable[date]):
+        """
+        Refresh the touched dates of the session engine's loaded cube; unloaded
+        cubes stay lazy. Cubes of other engines cannot be refreshed through this
+        session, so they are marked stale and reload on their next use.
+        """
+        bind = db.get_bind()
+        with cls._registry_lock:
+            cubes = list(cls._cubes.items())
+        for engine, cube in cubes:
+            if engine is not bind:
+                cube.loaded_at = 0.0
+            elif cube.loaded_at:
+                cube.refresh_dates(db, dates)
+
+    @staticmethod
+    def max_days(services: int, accounts: int) -> int:
+        """Days that fit in CUBE_MAX_CELLS with this many services and accounts, at most CUBE_MAX_DAYS."""
+        return min(CUBE_MAX_DAYS, CUBE_MAX_CELLS // max(services * accounts, 1))
+
+    def load(self, db: Session):
+        """Load the most recent days (at most CUBE_MAX_DAYS, within CUBE_MAX_CELLS) with one grouped query."""
+        first, last = db.query(func.min(CloudCost.date), func.max(CloudCost.date)).one()
+        rows = []
+        start = None
+        if last is not None:
+            start = last - timedelta(days=CUBE_MAX_DAYS - 1)
+            rows = self._query(db, CloudCost.date.between(start, last))
+            services = len({row[1] or "unknown" for row in rows})
+            accounts = len({row[2] or "unknown" for row in rows})
+            days = self.max_days(services, accounts)
+            if days < CUBE_MAX_DAYS:
+                logger.warning(
+                    f"Cost cube limited to {days} days: {services} services x {accounts} accounts "
+                    f"exceed COST_CUBE_MAX_CELLS={CUBE_MAX_CELLS} over {CUBE_MAX_DAYS} days"
+                )
+                start = last - timedelta(days=days - 1)
+                rows = [row for row in rows if row[0] >= start]
+        complete_from = start if last is not None and first < start else None
+        snapshot = self._apply(CubeSnapshot.empty(complete_from), rows, reset_days=())
+        with self._lock:
+            self.snapshot = snapshot
+            self.loaded_at = time.monotonic()
+
+    def refresh_dates(self, db: Session, dates: Iterable[date]):
+        """Recompute the cells of the given days from the database."""
+        dates = set(dates)
+        if not dates:
+            return
+        rows = self._query(db, CloudCost.date.in_(dates))
+        with self._lock:
+            self.snapshot = self._trim(self._apply(self.snapshot, rows, reset_days=dates))
+
+    @staticmethod
+    def _query(db: Session, condition) -> List[Tuple]:
+        return db.query(
+            CloudCost.date, CloudCost.service, CloudCost.account_id,
+            func.sum(CloudCost.cost), func.sum(CloudCost.usage), func.count(CloudCost.id)
+        ).filter(condition).group_by(CloudCost.date, CloudCost.service, CloudCost.account_id).all()
+
+    @staticmethod
+    def _encode(values: List[str], ids: Dict[str, int], value: str) -> int:
+        index = ids.get(value)
+        if index is None:
+            index = ids[value] = len(values)
+            values.append(value)
+        return index
+
+    def _apply(self, base: CubeSnapshot, rows: List[Tuple], reset_days: Iterable[date]) -> CubeSnapshot:
+        """New snapshot: `base` with the days in `reset_days` cleared and grouped rows written, grown as needed."""
+        reset_days = list(reset_days)
+        first_day, length, before = base.first_day, base.days, 0
+        days = [row[0] for row in rows] + reset_days
+        if days:
+            first, last = min(days), max(days)
+            if first_day is None:
+                first_day, length = first, (last - first).days + 1
+            else:
+                before = max((first_day - first).days, 0)
+                first_day -= timedelta(days=before)
+                length = max(length + before, (last - first_day).days + 1)
+
+        services, accounts = list(base.services), list(base.accounts)
+        service_ids, account_ids = dict(base.service_ids), dict(base.account_ids)
+        encoded = [
+            (
+                (day - first_day).days,
+                self._encode(services, service_ids, service or "unknown"),
+                self._encode(accounts, account_ids, account or "unknown"),
+                cost or 0.0, usage or 0.0, count
+            )
+            for day, service, account, cost, usage, count in rows
+        ]
+
+        # np.pad always allocates: the base snapshot's arrays are never written
+        pad = ((before, length - base.days - before),
+               (0, len(services) - len(base.services)), (0, len(accounts) - len(base.accounts)))
+        cost, usage, counts = np.pad(base.cost, pad), np.pad(base.usage, pad), np.pad(base.rows, pad)
+
+        for day in reset_days:
+            index = (day - first_day).days
+            cost[index] = 0.0
+            usage[index] = 0.0
+            counts[index] = 0
+
+        if encoded:
+            day_ix, service_ix, account_ix, cost_values, usage_values, count_values = (
+                np.array(column) for column in zip(*encoded)
+            )
+            cost[day_ix, service_ix, account_ix] = cost_values
+            usage[day_ix, service_ix, account_ix] = usage_values
+            counts[day_ix, service_ix, account_ix] = count_values
+
+        return CubeSnapshot(first_day, base.complete_from, services, accounts, cost, usage, counts)
+
+    @staticmethod
+    def _trim(snapshot: CubeSnapshot) -> CubeSnapshot:
+        """Drop the oldest days beyond `max_days` after the cube grew forward or wider."""
+        excess = snapshot.days - CostCube.max_days(len(snapshot.services), len(snapshot.accounts))
+        if excess <= 0:
+            return snapshot
+        first_day = snapshot.first_day + timedelta(days=excess)
+        return CubeSnapshot(first_day, first_day, snapshot.services, snapshot.accounts,
+                            snapshot.cost[excess:].copy(), snapshot.usage[excess:].copy(),
+                            snapshot.rows[excess:].copy())
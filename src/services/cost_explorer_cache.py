@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from src.models.database import PROJECT_ROOT
+
+COST_EXPLORER_CACHE_PATH = os.getenv(
+    "COST_EXPLORER_CACHE_PATH", os.path.join(PROJECT_ROOT, ".cache", "cost_explorer.sqlite")
+)
+COST_EXPLORER_CACHE_ENABLED = os.getenv("COST_EXPLORER_CACHE_ENABLED", "1") == "1"
+# Cost Explorer revises recent days for up to 72 hours; older days are final
+REVISION_WINDOW_DAYS = int(os.getenv("COST_EXPLORER_REVISION_DAYS", "3"))
+
+
+class CostExplorerCache:
+    """
+    Persistent cache of daily Cost Explorer results.
+
+    Entries are keyed by a query scope (account, granularity, group-by,
+    metrics) and the day they cover. Only final days, older than the
+    revision window, are stored, so cached entries never need invalidation
+    and only the open window is fetched again. Days without data are stored
+    too (as an entry without groups), so they are not queried again either.
+    """
+
+    def __init__(self, path: str = COST_EXPLORER_CACHE_PATH, revision_days: int = REVISION_WINDOW_DAYS):
+        self.path = path
+        self.revision_days = revision_days
+        self.hits = 0
+        self.misses = 0
+        self.stored = 0
+        self._lock = threading.Lock()
+        self._initialized = False
+
+    @staticmethod
+    def empty_result(day: date) -> Dict[str, Any]:
+        """ResultsByTime entry of a day Cost Explorer returned nothing for."""
+        return {"TimePeriod": {"Start": day.isoformat(), "End": (day + timedelta(days=1)).isoformat()},
+                "Groups": [], "Estimated": False}
+
+    @staticmethod
+    def scope(account_id: str, granularity: str, group_by: List[Dict[str, str]], metrics: Iterable[str]) -> str:
+        """Stable identifier of everything except the time period that shapes a response."""
+        key = json.dumps([account_id, granularity, group_by, sorted(metrics)], sort_keys=True)
+        return hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+
+    def is_final(self, day: date, today: Optional[date] = None) -> bool:
+        today = today or date.today()
+        return day < today - timedelta(days=self.revision_days)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Short-lived connection (commits on success); safe to use from any thread."""
+        conn = sqlite3.connect(self.path if self._initialized else self._initialize(), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _initialize(self) -> str:
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30)
+            try:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS results ("
+                    "scope TEXT NOT NULL, day TEXT NOT NULL, payload TEXT NOT NULL, "
+                    "fetched_at TEXT NOT NULL, PRIMARY KEY (scope, day))"
+                )
+                conn.commit()
+            finally:
+                conn.close()
+            self._initialized = True
+        return self.path
+
+    def get_days(self, scope: str, days: List[date]) -> Dict[date, Dict[str, Any]]:
+        """
+        Return the cached ResultsByTime entry of every requested day that is cached.
+        """
+        if not days:
+            return {}
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT day, payload FROM results WHERE scope = ? AND day BETWEEN ? AND ?",
+                (scope, min(days).isoformat(), max(days).isoformat())
+            ).fetchall()
+
+        wanted = set(days)
+        cached = {}
+        for day, payload in rows:
+            day = date.fromisoformat(day)
+            if day in wanted:
+                cached[day] = json.loads(payload)
+        with self._lock:
+            self.hits += len(cached)
+            self.misses += len(wanted) - len(cached)
+        return cached
+
+    def store_days(self, scope: str, results: Dict[date, Dict[str, Any]], today: Optional[date] = None) -> int:
+        """Store the final days among `results`; open days are skipped."""
+        final = [(day, result) for day, result in results.items() if self.is_final(day, today)]
+        if not final:
+            return 0
+        fetched_at = datetime.now().isoformat()
+        with self._connect() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO results (scope, day, payload, fetched_at) VALUES (?, ?, ?, ?)",
+                [(scope, day.isoformat(), json.dumps(result), fetched_at) for day, result in final]
+            )
+        with self._lock:
+            self.stored += len(final)
+        return len(final)
+
+    def stats(self) -> Dict[str, Any]:
+        entries = 0
+        if os.path.exists(self.path):
+            with self._connect() as conn:
+                entries = conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+        with self._lock:
+            hits, misses, stored = self.hits, self.misses, self.stored
+        return {
+            "enabled": COST_EXPLORER_CACHE_ENABLED,
+            "revision_window_days": self.revision_days,
+            "entries": entries,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate_percent": round(hits / (hits + misses) * 100, 2) if hits + misses else 0.0,
+            "stored": stored,
+        }
+
+
+# Global cache instance
+cost_explorer_cache = CostExplorerCache()
@@ -0,0 +1,283 @@
+import csv
+import gzip
+import logging
+import os
+import queue
+import re
+import threading
+import time
+from itertools import islice
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy.orm import Session
+from src.services.ingestion_service import IngestionService
+
+logger = logging.getLogger(__name__)
+
+# Line items parsed and aggregated per chunk (bounds parser memory)
+CUR_CHUNK_ROWS = int(os.getenv("CUR_CHUNK_ROWS", "100000"))
+# Aggregated chunks buffered between the parser and the database writer
+CUR_QUEUE_CHUNKS = int(os.getenv("CUR_QUEUE_CHUNKS", "2"))
+
+# CloudCost field -> candidate CUR columns, normalized (CUR 1.0 "lineItem/UsageStartDate"
+# and CUR 2.0 "line_item_usage_start_date" both become the latter), first present wins
+CUR_COLUMNS = {
+    "date": ("line_item_usage_start_date",),
+    "service": ("product_product_name", "line_item_product_code"),
+    "service_code": ("line_item_product_code",),
+    "account_id": ("line_item_usage_account_id",),
+    "region": ("product_region_code", "product_region"),
+    "cost": ("line_item_unblended_cost",),
+    "usage": ("line_item_usage_amount",),
+}
+REQUIRED_COLUMNS = ("date", "service", "account_id", "cost")
+
+Key = Tuple[str, str, str, Optional[str]]
+Chunk = Dict[Key, List[float]]
+_DONE = object()
+
+
+def normalize_column(name: str) -> str:
+    """CUR 1.0 and 2.0 column names in one form: "lineItem/UnblendedCost" -> "line_item_unblended_cost"."""
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])", "_", name.strip()).replace("/", "_").lower()
+
+
+def resolve_columns(header: List[str]) -> Dict[str, Optional[int]]:
+    """
+    Position of each CloudCost field in a CUR header (None when absent).
+
+    Raises:
+        ValueError: When a required column is missing
+    """
+    positions = {normalize_column(name): index for index, name in enumerate(header)}
+    resolved = {
+        field: next((positions[c] for c in candidates if c in positions), None)
+        for field, candidates in CUR_COLUMNS.items()
+    }
+    missing = [field for field in REQUIRED_COLUMNS if resolved[field] is None]
+    if missing:
+        raise ValueError(f"Not a Cost and Usage Report: no column for {', '.join(missing)}")
+    return resolved
+
+
+class CurImportService:
+    """
+    Streams AWS Cost and Usage Report files into cloud_costs.
+
+    A parser thread reads the file chunk by chunk (gzip/plain CSV, or Parquet
+    with pyarrow) and sums each chunk's line items per (day, service, account,
+    region); the calling thread merges the chunks into running totals and
+    upserts the keys each chunk touched, so parsing and writing overlap and
+    neither the file nor its line items are ever held in memory. Totals are
+    written through IngestionService.upsert_cost_records: stored rows are
+    replaced by the report's totals, so re-importing a report is idempotent
+    (until the last chunk is written, readers may see partial day totals).
+
+    One instance is one import run: running totals are kept across the files
+    it imports, so the part files of a report (which share keys) add up.
+    Import all parts of a report with the same instance, e.g. `import_files`.
+
+    Records are region-less by default, the key Cost Explorer ingestion writes,
+    so a day loaded by both sources is replaced rather than counted twice.
+    `include_region=True` keeps one row per region; do not combine it with
+    Cost Explorer ingestion for the same accounts.
+    """
+
+    def __init__(self, db: Session, chunk_rows: int = CUR_CHUNK_ROWS, include_region: bool = False):
+        self.db = db
+        self.chunk_rows = chunk_rows
+        self.include_region = include_region
+        # Accumulates touched dates across files until on_ingestion_complete
+        self.ingestion = IngestionService(db)
+        # Running totals of every file imported by this run
+        self.totals: Chunk = {}
+
+    def import_files(self, paths: List[str], refresh: bool = True) -> List[Dict[str, Any]]:
+        """Import the part files of one report; derived data is refreshed once after the last."""
+        stats = [self.import_file(path, refresh=False) for path in paths]
+        if refresh:
+            self.ingestion.on_ingestion_complete()
+        return stats
+
+    def import_file(self, path: str, refresh: bool = True) -> Dict[str, Any]:
+        """
+        Import one CUR file (.csv, .csv.gz or .parquet), adding to the totals of
+        the files this instance imported before.
+
+        Args:
+            refresh: Refresh rollups, drivers, cube, allocations and budgets afterwards
+
+        Returns:
+            Line items parsed, CloudCost records the file touched, row writes
+            (a record spread over several chunks is rewritten with each), timings
+            and line items per second
+        """
+        started = time.perf_counter()
+        chunks: "queue.Queue" = queue.Queue(maxsize=CUR_QUEUE_CHUNKS)
+        stop = threading.Event()
+        stats = {"file": path, "line_items": 0, "chunks": 0, "parse_seconds": 0.0}
+        producer = threading.Thread(target=self._produce, args=(path, chunks, stop, stats),
+                                    name="cur-parser", daemon=True)
+        producer.start()
+
+        totals = self.totals
+        keys = set()
+        rows_written = 0
+        write_seconds = 0.0
+        try:
+            while True:
+                chunk = chunks.get()
+                if chunk is _DONE:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+
+                write_start = time.perf_counter()
+                records = []
+                keys.update(chunk)
+                for key, (cost, usage) in chunk.items():
+                    total = totals.get(key)
+                    if total is None:
+                        total = totals[key] = [0.0, 0.0]
+                    total[0] += cost
+                    total[1] += usage
+                    records.append({"date": key[0], "service": key[1], "account_id": key[2], "region": key[3],
+                                    "cost": total[0], "usage": total[1]})
+                result = self.ingestion.upsert_cost_records(records)
+                rows_written += result["inserted"] + result["updated"]
+                write_seconds += time.perf_counter() - write_start
+
+                elapsed = time.perf_counter() - started
+                logger.info(f"CUR import: {stats['line_items']:,} line items, "
+                            f"{stats['line_items'] / elapsed:,.0f} rows/sec",
+                            extra={"file": path, "records": len(keys)})
+        finally:
+            stop.set()
+            producer.join()
+
+        if refresh:
+            self.ingestion.on_ingestion_complete()
+
+        seconds = time.perf_counter() - started
+        stats.update({
+            "records": len(keys),
+            "rows_written": rows_written,
+            "parse_seconds": round(stats["parse_seconds"], 3),
+            "write_seconds": round(write_seconds, 3),
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(stats["line_items"] / seconds, 1) if seconds else None,
+        })
+        return stats
+
+    def _produce(self, path: str, chunks: "queue.Queue", stop: threading.Event, stats: Dict[str, Any]):
+        """Parser thread: put aggregated chunks, then _DONE (or the exception that ended parsing)."""
+        item: Any = _DONE
+        try:
+            for chunk, line_items, seconds in self.iter_chunks(path):
+                stats["line_items"] += line_items
+                stats["chunks"] += 1
+                stats["parse_seconds"] += seconds
+                if not self._put(chunks, chunk, stop):
+                    return
+        except Exception as e:
+            item = e
+        self._put(chunks, item, stop)
+
+    @staticmethod
+    def _put(chunks: "queue.Queue", item: Any, stop: threading.Event) -> bool:
+        """Block until the writer takes the item; False when the writer gave up."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def iter_chunks(self, path: str) -> Iterator[Tuple[Chunk, int, float]]:
+        """(aggregated chunk, line items in it, seconds spent) for each chunk of the file."""
+        if path.endswith(".parquet"):
+            yield from self._parquet_chunks(path)
+        else:
+            yield from self._csv_chunks(path)
+
+    def _csv_chunks(self, path: str) -> Iterator[Tuple[Chunk, int, float]]:
+        opener = gzip.open if path.endswith(".gz") else open
+        with opener(path, "rt", newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            columns = resolve_columns(next(reader))
+            day, service, code, account = columns["date"], columns["service"], columns["service_code"], columns["account_id"]
+            cost, usage = columns["cost"], columns["usage"]
+            region = columns["region"] if self.include_region else None
+
+            while True:
+                start = time.perf_counter()
+                chunk: Chunk = {}
+                line_items = 0
+                for row in islice(reader, self.chunk_rows):
+                    line_items += 1
+                    key = (
+                        row[day][:10],
+                        row[service] or (row[code] if code is not None else ""),
+                        row[account],
+                        (row[region] or None) if region is not None else None,
+                    )
+                    row_cost = float(row[cost] or 0.0)
+                    row_usage = float(row[usage] or 0.0) if usage is not None else 0.0
+                    entry = chunk.get(key)
+                    if entry is None:
+                        chunk[key] = [row_cost, row_usage]
+                    else:
+                        entry[0] += row_cost
+                        entry[1] += row_usage
+                if not line_items:
+                    return
+                yield chunk, line_items, time.perf_counter() - start
+
+    def _parquet_chunks(self, path: str) -> Iterator[Tuple[Chunk, int, float]]:
+        try:
+            import pyarrow as pa
+            import pyarrow.compute as pc
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ValueError("Parquet reports require the 'pyarrow' package")
+
+        parquet = pq.ParquetFile(path)
+        names = parquet.schema_arrow.names
+        columns = resolve_columns(names)
+        wanted = {field: names[index] for field, index in columns.items() if index is not None}
+        if not self.include_region:
+            wanted.pop("region", None)
+
+        for batch in parquet.iter_batches(batch_size=self.chunk_rows, columns=sorted(set(wanted.values()))):
+            start = time.perf_counter()
+            day = batch.column(wanted["date"])
+            if pa.types.is_timestamp(day.type):
+                day = pc.cast(day, pa.date32())
+            else:
+                day = pc.utf8_slice_codeunits(pc.cast(day, pa.string()), 0, 10)
+            service = pc.cast(batch.column(wanted["service"]), pa.string())
+            if "service_code" in wanted:
+                code = pc.cast(batch.column(wanted["service_code"]), pa.string())
+                service = pc.if_else(pc.or_kleene(pc.is_null(service), pc.equal(service, "")), code, service)
+            table = pa.table({
+                "date": day,
+                "service": service,
+                "account_id": pc.cast(batch.column(wanted["account_id"]), pa.string()),
+                "region": (pc.cast(batch.column(wanted["region"]), pa.string()) if "region" in wanted
+                           else pa.nulls(batch.num_rows, pa.string())),
+                "cost": pc.cast(batch.column(wanted["cost"]), pa.float64()),
+                "usage": (pc.cast(batch.column(wanted["usage"]), pa.float64()) if "usage" in wanted
+                          else pa.nulls(batch.num_rows, pa.float64())),
+            })
+            grouped = table.group_by(["date", "service", "account_id", "region"]).aggregate(
+                [("cost", "sum"), ("usage", "sum")]
+            ).to_pydict()
+
+            chunk: Chunk = {}
+            for day_value, service_value, account_value, region_value, cost_sum, usage_sum in zip(
+                grouped["date"], grouped["service"], grouped["account_id"], grouped["region"],
+                grouped["cost_sum"], grouped["usage_sum"]
+            ):
+                key = (str(day_value)[:10], service_value or "", account_value or "", region_value or None)
+                chunk[key] = [cost_sum or 0.0, usage_sum or 0.0]
+            yield chunk, batch.num_rows, time.perf_counter() - start
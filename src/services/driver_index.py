@@ -0,0 +1,171 @@
+from typing import List, Dict, Any, Iterable, Optional
+from datetime import date, timedelta
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+from src.models.driver_model import CostDriver
+
+# Window name -> number of days compared against the same number of days before
+WINDOWS = {"dod": 1, "wow": 7}
+DIMENSIONS = {"service": "service", "account": "account_id"}
+# Ranks kept per (as_of, window, dimension, direction); bounds the index size
+MAX_RANK = 100
+# Backfills touching many dates only refresh the most recent ones
+MAX_REFRESH_DATES = 14
+
+
+class DriverIndexService:
+    """
+    Precomputed top-K index of day-over-day and week-over-week cost changes.
+
+    Deltas are computed once per ingested day and stored ranked by absolute
+    delta, so "what changed" queries read at most K rows through an index.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh_dates(self, dates: Iterable[date]) -> int:
+        """
+        Refresh the index for ingested dates and the later days whose windows include them.
+        """
+        dates = set(dates)
+        if not dates:
+            return 0
+
+        # A day's windows reach back 2 * longest window days, so later days that
+        # already have data need their entries recomputed too
+        reach = timedelta(days=2 * max(WINDOWS.values()) - 1)
+        later_days = self.db.query(CloudCost.date).filter(
+            CloudCost.date.between(min(dates), max(dates) + reach)
+        ).distinct().all()
+        affected = set(dates)
+        affected.update(
+            row[0] for row in later_days
+            if any(day <= row[0] <= day + reach for day in dates)
+        )
+
+        written = 0
+        for as_of in sorted(affected)[-MAX_REFRESH_DATES:]:
+            written += self.refresh(as_of, commit=False)
+        self.db.commit()
+        return written
+
+    def refresh(self, as_of: Optional[date] = None, commit: bool = True) -> int:
+        """
+        Recompute the index entries for one day (defaults to the latest day with data).
+
+        Returns:
+            Number of index rows written
+        """
+        if as_of is None:
+            as_of = self.db.query(func.max(CloudCost.date)).scalar()
+            if as_of is None:
+                return 0
+
+        longest = max(WINDOWS.values())
+        first_day = as_of - timedelta(days=2 * longest - 1)
+        rows = []
+
+        for dimension, field in DIMENSIONS.items():
+            column = getattr(CloudCost, field)
+            daily = self.db.query(
+                CloudCost.date, column, func.sum(CloudCost.cost)
+            ).filter(
+                CloudCost.date.between(first_day, as_of)
+            ).group_by(CloudCost.date, column).all()
+
+            for window, days in WINDOWS.items():
+                rows.extend(self._rank_window(daily, as_of, window, days, dimension))
+
+        self.db.query(CostDriver).filter(CostDriver.as_of == as_of).delete(synchronize_session=False)
+        if rows:
+            self.db.bulk_insert_mappings(CostDriver, rows)
+        if commit:
+            self.db.commit()
+        return len(rows)
+
+    @staticmethod
+    def _rank_window(daily: List, as_of: date, window: str, days: int, dimension: str) -> List[Dict[str, Any]]:
+        """Compare the last `days` days to the `days` before and rank the deltas."""
+        current_start = as_of - timedelta(days=days - 1)
+        previous_start = current_start - timedelta(days=days)
+
+        current: Dict[str, float] = {}
+        previous: Dict[str, float] = {}
+        for day, key, cost in daily:
+            key = key or "unknown"
+            if current_start <= day <= as_of:
+                current[key] = current.get(key, 0.0) + (cost or 0.0)
+            elif previous_start <= day < current_start:
+                previous[key] = previous.get(key, 0.0) + (cost or 0.0)
+
+        changes = []
+        for key in set(current) | set(previous):
+            now, before = current.get(key, 0.0), previous.get(key, 0.0)
+            if now != before:
+                changes.append((key, now, before, now - before))
+
+        rows = []
+        for direction, selected in (("increase", [c for c in changes if c[3] > 0]),
+                                    ("decrease", [c for c in changes if c[3] < 0])):
+            selected.sort(key=lambda c: abs(c[3]), reverse=True)
+            for rank, (key, now, before, delta) in enumerate(selected[:MAX_RANK], start=1):
+                rows.append({
+                    "as_of": as_of,
+                    "window": window,
+                    "dimension": dimension,
+                    "direction": direction,
+                    "rank": rank,
+                    "key": key,
+                    "current_cost": now,
+                    "previous_cost": before,
+                    "delta": delta,
+                    "delta_percent": (delta / before * 100) if before else None,
+                })
+        return rows
+
+    def top_drivers(self, window: str = "dod", dimension: str = "service", k: int = 10,
+                    as_of: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Return the top-K increases and decreases from the index.
+
+        Raises:
+            ValueError: On an unknown window or dimension, or K outside 1..MAX_RANK
+        """
+        if window not in WINDOWS:
+            raise ValueError(f"window must be one of {', '.join(WINDOWS)}")
+        if dimension not in DIMENSIONS:
+            raise ValueError(f"dimension must be one of {', '.join(DIMENSIONS)}")
+        if not 1 <= k <= MAX_RANK:
+            raise ValueError(f"k must be between 1 and {MAX_RANK}")
+
+        if as_of is None:
+            as_of = self.db.query(func.max(CostDriver.as_of)).scalar()
+
+        entries = []
+        if as_of is not None:
+            entries = self.db.query(CostDriver).filter(
+                CostDriver.as_of == as_of,
+                CostDriver.window == window,
+                CostDriver.dimension == dimension,
+                CostDriver.rank <= k
+            ).order_by(CostDriver.direction, CostDriver.rank).all()
+
+        def serialize(entry: CostDriver) -> Dict[str, Any]:
+            return {
+                "rank": entry.rank,
+                "key": entry.key,
+                "current_cost": round(entry.current_cost, 2),
+                "previous_cost": round(entry.previous_cost, 2),
+                "delta": round(entry.delta, 2),
+                "delta_percent": round(entry.delta_percent, 2) if entry.delta_percent is not None else None,
+            }
+
+        return {
+            "as_of": as_of.isoformat() if as_of else None,
+            "window": window,
+            "dimension": dimension,
+            "increases": [serialize(e) for e in entries if e.direction == "increase"],
+            "decreases": [serialize(e) for e in entries if e.direction == "decrease"],
+        }
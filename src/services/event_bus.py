@@ -0,0 +1,146 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+TOPICS = ("costs", "rollups", "anomalies", "budgets")
+# Events buffered per subscriber before the oldest ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+REDIS_CHANNEL = "cloud-cost-events"
+
+
+class Subscriber:
+    """One open dashboard connection: a bounded queue on the server's event loop."""
+
+    def __init__(self, user: str, topics: Set[str], loop: asyncio.AbstractEventLoop):
+        self.user = user
+        self.topics = topics
+        self.loop = loop
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.dropped = 0
+
+    def offer(self, event: Dict[str, Any]):
+        """Enqueue an event, dropping the oldest one when the client falls behind."""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class EventBus:
+    """
+    In-process pub/sub fanning events out to subscribed dashboards.
+
+    Publishing is thread-safe: jobs and sync handlers run in worker threads,
+    so events are handed to each subscriber's event loop with
+    call_soon_threadsafe. Idle subscribers cost one pending queue read.
+    """
+
+    def __init__(self):
+        self._subscribers: Dict[int, Subscriber] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.published = 0
+
+    def subscribe(self, user: str, topics: Optional[Iterable[str]] = None) -> Tuple[int, Subscriber]:
+        """Register a subscriber on the running event loop."""
+        subscriber = Subscriber(user, set(topics or TOPICS), asyncio.get_running_loop())
+        with self._lock:
+            subscription_id = next(self._ids)
+            self._subscribers[subscription_id] = subscriber
+        return subscription_id, subscriber
+
+    def unsubscribe(self, subscription_id: int):
+        with self._lock:
+            self._subscribers.pop(subscription_id, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, topic: str, data: Dict[str, Any], users: Optional[Iterable[str]] = None):
+        """
+        Publish an event to every subscriber of `topic`, or only to `users` when given.
+        """
+        self._dispatch({"topic": topic, "data": data, "users": list(users) if users is not None else None})
+
+    def _dispatch(self, event: Dict[str, Any]):
+        self.published += 1
+        users = set(event["users"]) if event.get("users") is not None else None
+        payload = {"topic": event["topic"], "data": event["data"]}
+
+        with self._lock:
+            targets = [
+                s for s in self._subscribers.values()
+                if event["topic"] in s.topics and (users is None or s.user in users)
+            ]
+        for subscriber in targets:
+            try:
+                subscriber.loop.call_soon_threadsafe(subscriber.offer, payload)
+            except RuntimeError:
+                # The subscriber's loop has shut down
+                pass
+
+
+class RedisEventBus(EventBus):
+    """
+    Event bus shared by several workers through a Redis channel.
+
+    Every worker publishes to the channel and a listener thread per worker
+    dispatches received events to that worker's local subscribers.
+    """
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(redis_url)
+        self._listener: Optional[threading.Thread] = None
+
+    def publish(self, topic: str, data: Dict[str, Any], users: Optional[Iterable[str]] = None):
+        event = {"topic": topic, "data": data, "users": list(users) if users is not None else None}
+        try:
+            self._redis.publish(REDIS_CHANNEL, json.dumps(event, default=str))
+        except Exception as e:
+            logger.error(f"Failed to publish event to Redis, delivering locally: {e}")
+            self._dispatch(event)
+
+    def subscribe(self, user: str, topics: Optional[Iterable[str]] = None) -> Tuple[int, Subscriber]:
+        self._ensure_listener()
+        return super().subscribe(user, topics)
+
+    def _ensure_listener(self):
+        with self._lock:
+            if self._listener is None or not self._listener.is_alive():
+                self._listener = threading.Thread(target=self._listen, name="event-bus-redis", daemon=True)
+                self._listener.start()
+
+    def _listen(self):
+        pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(REDIS_CHANNEL)
+        for message in pubsub.listen():
+            try:
+                self._dispatch(json.loads(message["data"]))
+            except Exception as e:
+                logger.error(f"Invalid event received from Redis: {e}")
+
+
+def format_sse(topic: str, data: Dict[str, Any]) -> str:
+    """Format one Server-Sent Events message."""
+    return f"event: {topic}\ndata: {json.dumps(data, default=str, separators=(',', ':'))}\n\n"
+
+
+def create_event_bus() -> EventBus:
+    """Use Redis when EVENT_BUS_BACKEND=redis (multi-worker deployments), else in-process."""
+    if os.getenv("EVENT_BUS_BACKEND", "memory") == "redis":
+        return RedisEventBus(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return EventBus()
+
+
+# Global event bus instance
+event_bus = create_event_bus()
@@ -0,0 +1,268 @@
+import csv
+import hashlib
+import io
+import logging
+import os
+from itertools import islice
+from typing import List, Dict, Any, Iterable, Set
+from datetime import date, datetime
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+from src.models.partitioning import ensure_partitions, is_postgres
+from src.services.rollup_service import ROLLUP_GRANULARITIES, RollupService, period_start
+from src.services.driver_index import DriverIndexService
+from src.services.allocation_service import AllocationService
+from src.services.budget_service import BudgetService
+from src.services.cost_cube import CostCube
+from src.services.event_bus import event_bus
+
+logger = logging.getLogger(__name__)
+
+# Records per COPY round trip (and per transaction) of a bulk load
+COPY_BATCH_SIZE = int(os.getenv("COPY_BATCH_SIZE", "50000"))
+COPY_COLUMNS = ("date", "service", "cost", "usage", "account_id", "region", "payload_hash")
+STAGING_TABLE = "cloud_costs_staging"
+# The date range bounds the anti-join to the batch's partitions; without it the
+# planner hashes every partition of cloud_costs to look for stored keys
+COPY_INSERT_SQL = f"""
+WITH inserted AS (
+    INSERT INTO cloud_costs ({", ".join(COPY_COLUMNS)})
+    SELECT DISTINCT ON (s.date, s.service, s.account_id, s.region) {", ".join("s." + c for c in COPY_COLUMNS)}
+    FROM {STAGING_TABLE} s
+    WHERE NOT EXISTS (
+        SELECT 1 FROM cloud_costs c
+        WHERE c.date BETWEEN :first AND :last
+          AND c.date = s.date AND c.service = s.service AND c.account_id = s.account_id
+          AND c.region IS NOT DISTINCT FROM s.region
+    )
+    RETURNING date
+)
+SELECT date, count(*) FROM inserted GROUP BY date
+"""
+
+
+def payload_hash(data: Dict[str, Any]) -> str:
+    """Fingerprint of the mutable part of a cost record (cost and usage)."""
+    payload = f"{float(data['cost']):.10g}|{float(data.get('usage') or 0.0):.10g}"
+    return hashlib.blake2b(payload.encode(), digest_size=8).hexdigest()
+
+
+class IngestionService:
+    """Stores fetched cost records and refreshes the data derived from them."""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.touched_dates: Set[date] = set()
+
+    def store_cost_records(self, cost_data: List[Dict[str, Any]]) -> int:
+        """
+        Insert cost records that are not stored yet.
+
+        Existing (date, service, account_id, region) keys are looked up with a
+        single query for the whole batch instead of one query per record.
+
+        Returns:
+            Number of new records stored
+        """
+        if not cost_data:
+            return 0
+
+        dates = {datetime.strptime(data['date'], '%Y-%m-%d').date() for data in cost_data}
+        ensure_partitions(self.db, dates)
+        existing = {
+            (row.date, row.service, row.account_id, row.region)
+            for row in self.db.query(
+                CloudCost.date, CloudCost.service, CloudCost.account_id, CloudCost.region
+            ).filter(CloudCost.date.in_(dates)).all()
+        }
+
+        stored_count = 0
+        stored_dates = set()
+        for data in cost_data:
+            record_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            key = (record_date, data['service'], data['account_id'], data.get('region'))
+            if key in existing:
+                continue
+
+            self.db.add(CloudCost(
+                date=record_date,
+                service=data['service'],
+                cost=data['cost'],
+                usage=data['usage'],
+                account_id=data['account_id'],
+                region=data.get('region'),
+                payload_hash=payload_hash(data)
+            ))
+            existing.add(key)
+            stored_dates.add(record_date)
+            stored_count += 1
+
+        RollupService(self.db).mark_stale(stored_dates)
+        self.db.commit()
+        self.touched_dates.update(stored_dates)
+        return stored_count
+
+    def upsert_cost_records(self, cost_data: List[Dict[str, Any]]) -> Dict[str, int]:
+        """
+        Insert new records and update revised ones, skipping unchanged records.
+
+        Each (date, service, account_id, region) payload is hashed; records whose
+        hash matches the stored one are skipped entirely, so only real deltas are
+        written and only their dates are refreshed downstream.
+
+        Returns:
+            Counts of fetched, unchanged, inserted and updated records
+        """
+        counts = {"fetched": len(cost_data), "unchanged": 0, "inserted": 0, "updated": 0}
+        if not cost_data:
+            return counts
+
+        dates = {datetime.strptime(data['date'], '%Y-%m-%d').date() for data in cost_data}
+        ensure_partitions(self.db, dates)
+        existing = {
+            (row.date, row.service, row.account_id, row.region): (row.id, row.payload_hash)
+            for row in self.db.query(
+                CloudCost.id, CloudCost.date, CloudCost.service, CloudCost.account_id,
+                CloudCost.region, CloudCost.payload_hash
+            ).filter(CloudCost.date.in_(dates)).all()
+        }
+
+        inserts = []
+        updates = []
+        written_dates = set()
+        for data in cost_data:
+            record_date = datetime.strptime(data['date'], '%Y-%m-%d').date()
+            key = (record_date, data['service'], data['account_id'], data.get('region'))
+            fingerprint = payload_hash(data)
+            stored = existing.get(key)
+
+            if stored and stored[1] == fingerprint:
+                counts["unchanged"] += 1
+                continue
+
+            values = {
+                "cost": data['cost'],
+                "usage": data['usage'],
+                "payload_hash": fingerprint,
+            }
+            if stored:
+                updates.append({"id": stored[0], **values})
+            else:
+                inserts.append({
+                    "date": record_date,
+                    "service": data['service'],
+                    "account_id": data['account_id'],
+                    "region": data.get('region'),
+                    **values
+                })
+            existing[key] = (stored[0] if stored else None, fingerprint)
+            written_dates.add(record_date)
+
+        if inserts:
+            self.db.bulk_insert_mappings(CloudCost, inserts)
+        if updates:
+            self.db.bulk_update_mappings(CloudCost, updates)
+        RollupService(self.db).mark_stale(written_dates)
+        self.db.commit()
+        self.touched_dates.update(written_dates)
+
+        counts["inserted"] = len(inserts)
+        counts["updated"] = len(updates)
+        return counts
+
+    def bulk_load_cost_records(self, cost_data: Iterable[Dict[str, Any]]) -> int:
+        """
+        Load a large backfill, skipping records that are already stored.
+
+        On PostgreSQL each batch of COPY_BATCH_SIZE records is streamed with
+        COPY into a temporary staging table and moved into cloud_costs by a
+        single INSERT ... SELECT; other databases go through store_cost_records.
+        `cost_data` may be a generator, only one batch is held in memory.
+
+        Returns:
+            Number of new records stored
+        """
+        stored_count = 0
+        records = iter(cost_data)
+        while True:
+            batch = list(islice(records, COPY_BATCH_SIZE))
+            if not batch:
+                return stored_count
+            if is_postgres(self.db.get_bind()):
+                stored_count += self._copy_batch(batch)
+            else:
+                stored_count += self.store_cost_records(batch)
+
+    def _copy_batch(self, batch: List[Dict[str, Any]]) -> int:
+        dates = {datetime.strptime(data['date'], '%Y-%m-%d').date() for data in batch}
+        ensure_partitions(self.db, dates)
+
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for data in batch:
+            writer.writerow((
+                data['date'], data['service'], data['cost'], data['usage'],
+                data['account_id'], data.get('region'), payload_hash(data)
+            ))
+        buffer.seek(0)
+
+        connection = self.db.connection()
+        connection.execute(text(
+            f"CREATE TEMPORARY TABLE IF NOT EXISTS {STAGING_TABLE} "
+            "(date DATE, service VARCHAR(100), cost FLOAT, usage FLOAT, "
+            "account_id VARCHAR(50), region VARCHAR(50), payload_hash VARCHAR(16)) ON COMMIT DELETE ROWS"
+        ))
+        with connection.connection.driver_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {STAGING_TABLE} ({', '.join(COPY_COLUMNS)}) FROM STDIN WITH (FORMAT csv)", buffer
+            )
+        inserted = connection.execute(text(COPY_INSERT_SQL), {"first": min(dates), "last": max(dates)}).all()
+        RollupService(self.db).mark_stale(day for day, _ in inserted)
+        self.db.commit()
+
+        self.touched_dates.update(day for day, _ in inserted)
+        return sum(count for _, count in inserted)
+
+    def on_ingestion_complete(self):
+        """Refresh derived data for the dates touched by this ingestion run."""
+        if not self.touched_dates:
+            return
+
+        RollupService(self.db).refresh(self.touched_dates)
+        DriverIndexService(self.db).refresh_dates(self.touched_dates)
+        CostCube.refresh_loaded(self.db, self.touched_dates)
+        AllocationService(self.db).refresh_dates(self.touched_dates)
+        logger.info(f"Refreshed rollups, cost drivers, cost cube and allocations for {len(self.touched_dates)} ingested dates")
+
+        # Budgets alert on the current period only: a backfill or late revision of
+        # an older month must not re-evaluate (and re-alert) that month
+        latest = self.db.query(func.max(CloudCost.date)).scalar()
+        crossings = []
+        if latest is not None and max(self.touched_dates) >= latest.replace(day=1):
+            crossings = BudgetService(self.db).check_thresholds(as_of=latest)
+        self.publish_deltas(crossings)
+        self.touched_dates = set()
+
+    def publish_deltas(self, crossings: List[Dict[str, Any]]):
+        """Push compact deltas for the touched dates to subscribed dashboards."""
+        dates = sorted(self.touched_dates)
+        totals = self.db.query(CloudCost.date, func.sum(CloudCost.cost)).filter(
+            CloudCost.date.in_(dates)
+        ).group_by(CloudCost.date).all()
+
+        event_bus.publish("costs", {
+            "dates": [d.isoformat() for d in dates],
+            "daily_totals": {day.isoformat(): round(cost or 0.0, 2) for day, cost in totals},
+        })
+        event_bus.publish("rollups", {
+            granularity: sorted({period_start(d, granularity).isoformat() for d in dates})
+            for granularity in ROLLUP_GRANULARITIES
+        })
+
+        # Budget crossings only go to the tenant owning the budget
+        by_tenant: Dict[str, List[Dict[str, Any]]] = {}
+        for crossing in crossings:
+            by_tenant.setdefault(crossing["tenant"], []).append(crossing)
+        for tenant, tenant_crossings in by_tenant.items():
+            event_bus.publish("budgets", {"crossings": tenant_crossings}, users=[tenant])
@@ -0,0 +1,211 @@
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+from sqlalchemy.orm import Session
+from src.models.job_model import JOB_RUN_STATUSES, JobRun
+
+logger = logging.getLogger(__name__)
+
+MAX_ERROR_LENGTH = 4000
+MAX_RUNS_LIMIT = 500
+
+
+class JobTelemetry:
+    """Counters and phase timings a job reports about its current run."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.started_at = datetime.now(timezone.utc)
+        self.rows_fetched = 0
+        self.rows_upserted = 0
+        self.api_calls = 0
+        self.alerts = 0
+        self.phases: Dict[str, float] = {}
+
+    def add(self, rows_fetched: int = 0, rows_upserted: int = 0, api_calls: int = 0, alerts: int = 0):
+        self.rows_fetched += rows_fetched
+        self.rows_upserted += rows_upserted
+        self.api_calls += api_calls
+        self.alerts += alerts
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time a phase of the job; repeated phases accumulate."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(self.phases.get(name, 0.0) + time.perf_counter() - start, 6)
+
+
+class JobRunTracker:
+    """
+    Persists one JobRun row per scheduled run.
+
+    Jobs open `telemetry(job_id)` to report rows, API calls, alerts and phase
+    timings; the APScheduler listener picks that up when the run ends (or
+    records a missed or skipped run) and writes the row with its own session,
+    so a failing job never loses its run record. Telemetry of a run outside
+    the scheduler (CLI, API) is never attributed to a scheduled run.
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], Session]] = None):
+        self._session_factory = session_factory
+        self._lock = threading.Lock()
+        self._submitted: Dict[str, datetime] = {}
+        # Telemetry of runs that just ended, until the listener records them
+        self._finished: Dict[str, JobTelemetry] = {}
+
+    @contextmanager
+    def telemetry(self, job_id: str) -> Iterator[JobTelemetry]:
+        """Telemetry of the current run of `job_id` (the scheduler's job id)."""
+        telemetry = JobTelemetry(job_id)
+        try:
+            yield telemetry
+        finally:
+            with self._lock:
+                self._finished[job_id] = telemetry
+
+    def listener(self, event):
+        """APScheduler listener for submitted, executed, failed, missed and max-instances events."""
+        # Imported here so the API does not load APScheduler
+        from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_MISSED, EVENT_JOB_SUBMITTED
+
+        now = datetime.now(timezone.utc)
+        if event.code == EVENT_JOB_SUBMITTED:
+            with self._lock:
+                self._submitted[event.job_id] = now
+            return
+
+        if event.code == EVENT_JOB_MAX_INSTANCES:
+            # The previous run is still going: leave its telemetry alone
+            self.record(event.job_id, "skipped", started_at=now, scheduled_at=event.scheduled_run_times[0])
+            return
+        if event.code == EVENT_JOB_MISSED:
+            self.record(event.job_id, "missed", started_at=now, scheduled_at=event.scheduled_run_time)
+            return
+
+        with self._lock:
+            submitted = self._submitted.pop(event.job_id, None)
+            telemetry = self._finished.pop(event.job_id, None)
+        # Left by a run outside the scheduler that started before this run was due
+        if telemetry is not None and event.scheduled_run_time is not None and \
+                telemetry.started_at < event.scheduled_run_time:
+            telemetry = None
+        error = None
+        if event.exception is not None:
+            error = f"{event.exception!r}\n{event.traceback or ''}"[:MAX_ERROR_LENGTH]
+        self.record(
+            event.job_id, "error" if event.exception is not None else "success",
+            started_at=telemetry.started_at if telemetry else submitted or now,
+            finished_at=now, scheduled_at=event.scheduled_run_time, telemetry=telemetry, error=error
+        )
+
+    def record(self, job_id: str, status: str, started_at: datetime, finished_at: Optional[datetime] = None,
+               scheduled_at: Optional[datetime] = None, telemetry: Optional[JobTelemetry] = None,
+               error: Optional[str] = None):
+        """Write a run row; failures are logged, never raised into the scheduler."""
+        if self._session_factory is None:
+            from src.models.database import SessionLocal
+            self._session_factory = SessionLocal
+
+        db = self._session_factory()
+        try:
+            db.add(JobRun(
+                job_id=job_id,
+                status=status,
+                scheduled_at=scheduled_at,
+                started_at=started_at,
+                finished_at=finished_at,
+                duration_seconds=(finished_at - started_at).total_seconds() if finished_at else None,
+                rows_fetched=telemetry.rows_fetched if telemetry else 0,
+                rows_upserted=telemetry.rows_upserted if telemetry else 0,
+                api_calls=telemetry.api_calls if telemetry else 0,
+                alerts=telemetry.alerts if telemetry else 0,
+                error=error,
+                phases=json.dumps(telemetry.phases) if telemetry and telemetry.phases else None,
+            ))
+            db.commit()
+        except Exception:
+            logger.exception(f"Could not record {status} run of job {job_id}")
+        finally:
+            db.close()
+
+
+class JobRunService:
+    """Run history and duration percentiles of the scheduled jobs."""
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def report(self, job_id: Optional[str] = None, days: int = 30, limit: int = 50) -> Dict[str, Any]:
+        """
+        Latest runs plus per-job statistics over the last `days` days.
+
+        Raises:
+            ValueError: On days < 1 or a limit outside 1..MAX_RUNS_LIMIT
+        """
+        if days < 1:
+            raise ValueError("days must be at least 1")
+        if not 1 <= limit <= MAX_RUNS_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_RUNS_LIMIT}")
+
+        query = self.db.query(JobRun).filter(JobRun.started_at >= datetime.now(timezone.utc) - timedelta(days=days))
+        if job_id is not None:
+            query = query.filter(JobRun.job_id == job_id)
+        runs = list(query.order_by(JobRun.started_at.desc(), JobRun.id.desc()).all())
+
+        by_job: Dict[str, List[JobRun]] = {}
+        for run in runs:
+            by_job.setdefault(run.job_id, []).append(run)
+        return {
+            "days": days,
+            "jobs": {job: self._summary(runs_of_job) for job, runs_of_job in sorted(by_job.items())},
+            "runs": [self.serialize(run) for run in runs[:limit]],
+        }
+
+    @staticmethod
+    def _summary(runs: List[JobRun]) -> Dict[str, Any]:
+        counts = {status: sum(1 for run in runs if run.status == status)
+                  for status in JOB_RUN_STATUSES}
+        durations = np.array([run.duration_seconds for run in runs if run.duration_seconds is not None])
+        finished = [run for run in runs if run.status == "success" and run.duration_seconds]
+        busy = sum(run.duration_seconds for run in finished)
+        rows = sum(run.rows_upserted or 0 for run in finished)
+
+        summary: Dict[str, Any] = {"runs": len(runs), **counts, "last_status": runs[0].status}
+        for name, q in (("p50", 50), ("p95", 95), ("p99", 99)):
+            summary[f"duration_{name}_seconds"] = round(float(np.percentile(durations, q)), 3) if durations.size else None
+        summary["duration_max_seconds"] = round(float(durations.max()), 3) if durations.size else None
+        summary["rows_upserted"] = rows
+        summary["rows_per_second"] = round(rows / busy, 1) if busy else None
+        return summary
+
+    @staticmethod
+    def serialize(run: JobRun) -> Dict[str, Any]:
+        duration = run.duration_seconds
+        return {
+            "id": run.id,
+            "job_id": run.job_id,
+            "status": run.status,
+            "scheduled_at": run.scheduled_at.isoformat() if run.scheduled_at else None,
+            "started_at": run.started_at.isoformat() if run.started_at else None,
+            "finished_at": run.finished_at.isoformat() if run.finished_at else None,
+            "duration_seconds": round(duration, 3) if duration is not None else None,
+            "rows_fetched": run.rows_fetched or 0,
+            "rows_upserted": run.rows_upserted or 0,
+            "rows_per_second": round((run.rows_upserted or 0) / duration, 1) if duration else None,
+            "api_calls": run.api_calls or 0,
+            "alerts": run.alerts or 0,
+            "error": run.error,
+            "phases": json.loads(run.phases) if run.phases else {},
+        }
+
+
+# Global tracker shared by the scheduler and the jobs
+job_runs = JobRunTracker()
@@ -0,0 +1,204 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "json" for structured output, "text" for human readable local development output
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+# Records per second allowed from a single call site before INFO/DEBUG records are dropped
+LOG_RATE_LIMIT = float(os.getenv("LOG_RATE_LIMIT", "50"))
+# Fraction of INFO/DEBUG records kept per logger, e.g. "src.services.monitoring_service=0.1"
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
+# Records buffered for the writer thread; beyond this records are dropped, never blocking callers
+LOG_QUEUE_SIZE = 10_000
+
+correlation_id: ContextVar[Optional[str]] = ContextVar("correlation_id", default=None)
+
+# LogRecord attributes that are not user supplied `extra` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_TRACEBACK_FORMATTER = logging.Formatter()
+_listener: Optional[logging.handlers.QueueListener] = None
+_handler: Optional[logging.Handler] = None
+# Root handlers replaced by configure_logging, put back by shutdown_logging
+_replaced_handlers: List[logging.Handler] = []
+_lock = threading.Lock()
+
+
+def new_correlation_id(incoming: Optional[str] = None) -> str:
+    """Use the caller's request id when given, otherwise generate one, and bind it to this context."""
+    value = incoming or uuid.uuid4().hex
+    correlation_id.set(value)
+    return value
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line with the message, context and any `extra` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class ContextFilter(logging.Filter):
+    """Attach the correlation id while still on the logging thread (context is not shared with the writer)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.correlation_id = correlation_id.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Bound the volume of INFO/DEBUG records.
+
+    Each call site may emit at most `rate_limit` records per second, and
+    loggers listed in `sample_rates` keep only that fraction of records.
+    The next record let through from a call site reports how many were
+    suppressed. WARNING and above are never dropped. Records arrive from
+    any thread, so the per-call-site windows are updated under a lock.
+    """
+
+    def __init__(self, rate_limit: float = LOG_RATE_LIMIT, sample_rates: Optional[Dict[str, float]] = None):
+        super().__init__()
+        self.rate_limit = rate_limit
+        self.sample_rates = sample_rates or {}
+        self._windows: Dict[Tuple[str, int], list] = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+
+        rate = self.sample_rates.get(record.name)
+        if rate is not None and random.random() >= rate:
+            return False
+
+        # Fixed one-second window per call site: [window start, count, suppressed]
+        site = (record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(site)
+            if window is None or now - window[0] >= 1.0:
+                suppressed = window[2] if window else 0
+                window = self._windows[site] = [now, 0, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+            if window[1] >= self.rate_limit:
+                window[2] += 1
+                return False
+            window[1] += 1
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records when the writer falls behind instead of raising."""
+
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Merge args and render tracebacks to text so the record pickles and crosses threads safely."""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _TRACEBACK_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+
+def parse_sample_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            name, rate = item.split("=", 1)
+            rates[name.strip()] = float(rate)
+    return rates
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """
+    Route all logging through a bounded queue to a writer thread.
+
+    Callers only pay for filtering and enqueueing; formatting and I/O happen
+    on the QueueListener thread. Safe to call more than once.
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is not None:
+            return
+
+        stream = logging.StreamHandler(sys.stdout)
+        if fmt == "json":
+            stream.setFormatter(JsonFormatter())
+        else:
+            stream.setFormatter(logging.Formatter(
+                "%(asctime)s %(levelname)s %(name)s [%(correlation_id)s] %(message)s"
+            ))
+
+        handler = NonBlockingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(LOG_RATE_LIMIT, parse_sample_rates(LOG_SAMPLE_RATES)))
+
+        # Replace console handlers left by basicConfig or an earlier configuration
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            if type(existing) in (logging.StreamHandler, NonBlockingQueueHandler):
+                root.removeHandler(existing)
+                _replaced_handlers.append(existing)
+        root.addHandler(handler)
+        _handler = handler
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(handler.queue, stream, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """
+    Flush queued records, stop the writer thread and put back the root
+    handlers configure_logging replaced, so later records are still written.
+    """
+    global _listener, _handler
+    with _lock:
+        if _listener is None:
+            return
+        root = logging.getLogger()
+        root.removeHandler(_handler)
+        for handler in _replaced_handlers:
+            root.addHandler(handler)
+        _replaced_handlers.clear()
+        _handler = None
+        _listener.stop()
+        _listener = None
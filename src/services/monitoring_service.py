@@ -1,10 +1,12 @@
 import time
 import logging
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from src.models.database import get_db
 from src.models.cost_model import CloudCost
+from src.models.partitioning import estimated_row_count
+from src.services.cost_cube import CostCube
 
 logger = logging.getLogger(__name__)
 
@@ -13,7 +15,8 @@ class MonitoringService:
         self.performance_metrics = {}
         self.cost_savings_log = []
 
-    def log_api_performance(self, endpoint: str, method: str, response_time: float, status_code: int):
+    def log_api_performance(self, endpoint: str, method: str, response_time: float, status_code: int,
+                            query_stats=None, query_budget: Optional[int] = None):
         """
         Log API endpoint performance metrics
         """
@@ -23,7 +26,13 @@ class MonitoringService:
                 'total_time': 0,
                 'avg_time': 0,
                 'status_codes': {},
-                'last_called': None
+                'last_called': None,
+                'db_statements': 0,
+                'max_db_statements': 0,
+                'db_time': 0,
+                'db_rows': 0,
+                'query_budget': None,
+                'over_budget_calls': 0
             }
 
         metrics = self.performance_metrics[endpoint]
@@ -36,7 +45,24 @@ class MonitoringService:
             metrics['status_codes'][status_code] = 0
         metrics['status_codes'][status_code] += 1
 
-        logger.info(f"API Performance - {method} {endpoint}: {response_time:.3f}s, Status: {status_code}")
+        if query_stats is not None:
+            metrics['db_statements'] += query_stats.statements
+            metrics['max_db_statements'] = max(metrics['max_db_statements'], query_stats.statements)
+            metrics['db_time'] += query_stats.db_time
+            metrics['db_rows'] += query_stats.rows
+            metrics['avg_db_statements'] = metrics['db_statements'] / metrics['calls']
+            if query_budget is not None:
+                metrics['query_budget'] = query_budget
+                if query_stats.statements > query_budget:
+                    metrics['over_budget_calls'] += 1
+                    logger.warning(
+                        f"Query budget exceeded - {method} {endpoint}: "
+                        f"{query_stats.statements} statements, budget {query_budget}"
+                    )
+
+        logger.info("API Performance - %s %s: %.3fs, Status: %s", method, endpoint, response_time, status_code,
+                    extra={"endpoint": endpoint, "method": method, "duration_ms": round(response_time * 1000, 2),
+                           "status_code": status_code})
 
     def get_performance_report(self) -> Dict[str, Any]:
         """
@@ -67,14 +93,17 @@ class MonitoringService:
         else:
             logger.info(f"Recommendation Generated - {recommendation_type}: Potential savings ${potential_savings:.2f}")
 
-    def calculate_total_savings(self, days: int = 30) -> Dict[str, Any]:
+    def calculate_total_savings(self, days: int = 30, db: Optional[Session] = None) -> Dict[str, Any]:
         """
-        Calculate total cost savings over the specified period
+        Calculate total cost savings over the specified period, including stored recommendations when a session is given
         """
         cutoff_date = datetime.now() - timedelta(days=days)
 
         # Filter savings log for the period
         period_savings = [entry for entry in self.cost_savings_log if entry['timestamp'] >= cutoff_date]
+        if db is not None:
+            from src.services.recommendation_service import RecommendationService
+            period_savings += RecommendationService(db).ledger_entries(cutoff_date)
 
         total_potential = sum(entry['potential_savings'] for entry in period_savings)
         total_actual = sum(entry['actual_savings'] for entry in period_savings)
@@ -107,27 +136,30 @@ class MonitoringService:
         """
         try:
             # Check database connectivity
-            cost_count = db.query(CloudCost).count()
+            cost_count = estimated_row_count(db, CloudCost)
             db_healthy = True
         except Exception as e:
             cost_count = 0
             db_healthy = False
             logger.error(f"Database health check failed: {e}")
 
-        # Get recent cost data
-        recent_costs = db.query(CloudCost).filter(
-            CloudCost.date >= datetime.now().date() - timedelta(days=7)
-        ).all()
-
-        total_recent_cost = sum(cost.cost for cost in recent_costs)
+        # Get recent cost data from the shared cost cube
+        total_recent_cost = 0.0
+        has_recent_costs = False
+        if db_healthy:
+            cube = CostCube.snapshot_for(db)
+            seven_days_ago = datetime.now().date() - timedelta(days=7)
+            recent_days = cube.day_slice(seven_days_ago, cube.last_day or seven_days_ago)
+            total_recent_cost = float(cube.cost[recent_days].sum())
+            has_recent_costs = bool(cube.rows[recent_days].any())
 
         return {
             'database_healthy': db_healthy,
             'total_cost_records': cost_count,
             'recent_costs_7d': round(total_recent_cost, 2),
-            'avg_daily_cost_7d': round(total_recent_cost / 7, 2) if recent_costs else 0,
+            'avg_daily_cost_7d': round(total_recent_cost / 7, 2) if has_recent_costs else 0,
             'performance_metrics': self.get_performance_report(),
-            'cost_savings': self.calculate_total_savings(),
+            'cost_savings': self.calculate_total_savings(db=db if db_healthy else None),
             'timestamp': datetime.now().isoformat()
         }
 
@@ -0,0 +1,316 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+SRC_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_HZ = 100
+MAX_HZ = 1000
+MAX_SECONDS = 300
+MAX_STACK_DEPTH = 128
+
+Frame = Tuple[str, str, int]
+
+# Set while a request matched by the route rule is in flight
+_profiled_request: ContextVar[bool] = ContextVar("profiled_request", default=False)
+
+
+class SamplingProfiler:
+    """
+    Low-overhead statistical profiler sampling every thread's stack at a fixed rate.
+
+    A daemon thread wakes `hz` times per second, walks sys._current_frames()
+    and counts identical stacks, so profiled code runs unmodified. Stacks
+    without a frame from this application (idle server and pool threads) are
+    dropped. Profiles can be captured for N seconds, or only while requests
+    matching a route pattern are in flight, for a sampled fraction of them;
+    route profiles sample only the threads running those requests (see
+    `profile_thread`), not unrelated requests served concurrently.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._hz = DEFAULT_HZ
+        self._deadline: Optional[float] = None
+        self._active_requests = 0
+        # Thread id -> profiled requests it is currently running (route mode)
+        self._threads: Counter = Counter()
+        # Set when stop() returned without joining; the sampler publishes on exit
+        self._finish_pending = False
+        self.route_rule: Optional[Dict[str, Any]] = None
+        self.profile: Optional[Dict[str, Any]] = None
+        self.started_at: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: float, hz: int = DEFAULT_HZ):
+        """
+        Sample all threads for `seconds` seconds.
+
+        Raises:
+            ValueError: On out-of-range settings or when a capture is already running
+        """
+        self._validate(seconds, hz)
+        with self._lock:
+            if self.running:
+                raise ValueError("A profile capture is already running")
+            self._begin(hz, deadline=time.monotonic() + seconds)
+
+    def profile_route(self, pattern: str, sample_rate: float = 0.1, hz: int = DEFAULT_HZ,
+                      seconds: float = 60):
+        """
+        Sample only while requests whose path matches `pattern` are in flight.
+
+        Only `sample_rate` of the matching requests are profiled; the rule
+        expires after `seconds`.
+        """
+        self._validate(seconds, hz)
+        if not 0 < sample_rate <= 1:
+            raise ValueError("sample_rate must be between 0 and 1")
+        try:
+            compiled = re.compile(pattern)
+        except re.error as e:
+            raise ValueError(f"Invalid route pattern: {e}")
+
+        with self._lock:
+            if self.running:
+                raise ValueError("A profile capture is already running")
+            self.route_rule = {
+                "pattern": compiled,
+                "sample_rate": sample_rate,
+                "hz": hz,
+                "expires": time.monotonic() + seconds,
+                "requests": 0,
+            }
+            self._stacks = Counter()
+            self.started_at = datetime.now()
+
+    def stop(self, wait: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Stop any capture or route rule and publish the collected profile.
+
+        With `wait=False` the sampler thread is signalled but not joined and
+        publishes the profile itself as it exits (for callers on the event loop).
+        """
+        with self._lock:
+            self.route_rule = None
+            thread = self._thread
+            self._stop.set()
+            if not wait and thread is not None:
+                self._finish_pending = True
+                return self.profile
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        self._finish()
+        return self.profile
+
+    @contextmanager
+    def profile_request(self, path: str):
+        """Sample while this request runs if it matches the active route rule."""
+        rule = self.route_rule
+        if rule is None or not self._matches(rule, path):
+            yield
+            return
+
+        with self._lock:
+            rule["requests"] += 1
+            self._active_requests += 1
+            if not self.running:
+                self._begin(rule["hz"], deadline=None, reset=False)
+        token = _profiled_request.set(True)
+        try:
+            yield
+        finally:
+            _profiled_request.reset(token)
+            with self._lock:
+                self._active_requests -= 1
+
+    @contextmanager
+    def profile_thread(self):
+        """
+        Sample the current thread while it works on a request being profiled.
+
+        Called around the endpoint (which runs in a worker thread for sync
+        routes); a no-op outside a request matched by `profile_request`.
+        """
+        if not _profiled_request.get():
+            yield
+            return
+
+        thread_id = threading.get_ident()
+        with self._lock:
+            self._threads[thread_id] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._threads[thread_id] -= 1
+                if not self._threads[thread_id]:
+                    del self._threads[thread_id]
+
+    def _matches(self, rule: Dict[str, Any], path: str) -> bool:
+        if time.monotonic() > rule["expires"]:
+            # Runs on the event loop: do not wait for the sampler thread
+            self.stop(wait=False)
+            return False
+        return bool(rule["pattern"].search(path)) and random.random() < rule["sample_rate"]
+
+    @staticmethod
+    def _validate(seconds: float, hz: int):
+        if not 0 < seconds <= MAX_SECONDS:
+            raise ValueError(f"seconds must be between 0 and {MAX_SECONDS}")
+        if not 1 <= hz <= MAX_HZ:
+            raise ValueError(f"hz must be between 1 and {MAX_HZ}")
+
+    def _begin(self, hz: int, deadline: Optional[float], reset: bool = True):
+        if reset:
+            self._stacks = Counter()
+            self.started_at = datetime.now()
+        self._hz = hz
+        self._deadline = deadline
+        self._finish_pending = False
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        interval = 1.0 / self._hz
+        own_id = threading.get_ident()
+        stop = self._stop
+
+        route_mode = self._deadline is None
+
+        while not stop.wait(interval):
+            if not route_mode and time.monotonic() >= self._deadline:
+                break
+            frames = sys._current_frames()
+            if route_mode:
+                with self._lock:
+                    # Exit once no matching request is in flight; the next one restarts sampling
+                    if self._active_requests == 0:
+                        self._thread = None
+                        break
+                    sampled = [frames[thread_id] for thread_id in self._threads if thread_id in frames]
+            else:
+                sampled = [frame for thread_id, frame in frames.items() if thread_id != own_id]
+            for frame in sampled:
+                stack = self._walk(frame)
+                if stack:
+                    self._stacks[stack] += 1
+
+        with self._lock:
+            if self._thread is threading.current_thread():
+                self._thread = None
+            finish = self._finish_pending or (not route_mode and not stop.is_set())
+            self._finish_pending = False
+        if finish:
+            self._finish()
+
+    @staticmethod
+    def _walk(frame) -> Optional[Tuple[Frame, ...]]:
+        """Root-first stack of (function, file, line), or None without application frames."""
+        stack: List[Frame] = []
+        in_app = False
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            code = frame.f_code
+            if code.co_filename.startswith(SRC_ROOT) and code.co_filename != __file__:
+                in_app = True
+            stack.append((code.co_name, code.co_filename, code.co_firstlineno))
+            frame = frame.f_back
+        return tuple(reversed(stack)) if in_app else None
+
+    def _finish(self):
+        with self._lock:
+            stacks = self._stacks
+            self._stacks = Counter()
+        if not stacks and self.profile is not None and self.started_at is None:
+            return
+        self.profile = {
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "finished_at": datetime.now().isoformat(),
+            "hz": self._hz,
+            "samples": sum(stacks.values()),
+            "stacks": stacks,
+        }
+        self.started_at = None
+
+    def status(self) -> Dict[str, Any]:
+        rule = self.route_rule
+        if rule is not None and time.monotonic() > rule["expires"]:
+            self.stop()
+            rule = None
+        return {
+            "running": self.running,
+            "hz": self._hz if self.running else None,
+            "route_rule": {
+                "pattern": rule["pattern"].pattern,
+                "sample_rate": rule["sample_rate"],
+                "hz": rule["hz"],
+                "expires_in_seconds": round(max(rule["expires"] - time.monotonic(), 0.0), 1),
+                "profiled_requests": rule["requests"],
+            } if rule else None,
+            "last_profile_samples": self.profile["samples"] if self.profile else None,
+        }
+
+
+def _frame_name(frame: Frame) -> str:
+    name, filename, line = frame
+    return f"{name} ({os.path.relpath(filename, os.path.dirname(SRC_ROOT))}:{line})"
+
+
+def to_collapsed(profile: Dict[str, Any]) -> str:
+    """Brendan Gregg's collapsed-stack format, one `root;...;leaf count` line per stack."""
+    lines = [
+        f"{';'.join(_frame_name(frame) for frame in stack)} {count}"
+        for stack, count in profile["stacks"].most_common()
+    ]
+    return "\n".join(lines) + ("\n" if lines else "")
+
+
+def to_speedscope(profile: Dict[str, Any], name: str = "cloud-cost-optimizer") -> Dict[str, Any]:
+    """Speedscope file with one sampled profile weighted by sample count."""
+    frames: List[Dict[str, Any]] = []
+    index: Dict[Frame, int] = {}
+    samples = []
+    weights = []
+    for stack, count in profile["stacks"].items():
+        sample = []
+        for frame in stack:
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame[0], "file": frame[1], "line": frame[2]})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(count)
+
+    interval = 1.0 / profile["hz"]
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [{
+            "type": "sampled",
+            "name": name,
+            "unit": "seconds",
+            "startValue": 0,
+            "endValue": round(sum(weights) * interval, 6),
+            "samples": samples,
+            "weights": [round(w * interval, 6) for w in weights],
+        }],
+        "exporter": "cloud-cost-optimizer",
+    }
+
+
+# Global profiler instance
+profiler = SamplingProfiler()
@@ -0,0 +1,151 @@
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Response headers carrying the per-request figures
+STATEMENTS_HEADER = "X-DB-Statements"
+DB_TIME_HEADER = "X-DB-Time"
+ROWS_HEADER = "X-DB-Rows"
+BUDGET_HEADER = "X-DB-Query-Budget"
+
+
+class QueryStats:
+    """SQL statements, database time and rows fetched within one request or block."""
+
+    def __init__(self):
+        self.statements = 0
+        self.db_time = 0.0
+        self.rows = 0
+        self.by_statement: Counter = Counter()
+
+    def repeated(self, minimum: int = 2):
+        """Statements executed at least `minimum` times, the usual sign of an N+1 pattern."""
+        return [(sql, count) for sql, count in self.by_statement.most_common() if count >= minimum]
+
+    def headers(self) -> Dict[str, str]:
+        return {
+            STATEMENTS_HEADER: str(self.statements),
+            DB_TIME_HEADER: f"{self.db_time:.6f}",
+            ROWS_HEADER: str(self.rows),
+        }
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+class _CountingCursor:
+    """DBAPI cursor proxy counting the rows fetched through it."""
+
+    def __init__(self, cursor, stats: QueryStats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def fetchone(self):
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._stats.rows += 1
+        return row
+
+    def fetchmany(self, *args, **kwargs):
+        rows = self._cursor.fetchmany(*args, **kwargs)
+        self._stats.rows += len(rows)
+        return rows
+
+    def fetchall(self):
+        rows = self._cursor.fetchall()
+        self._stats.rows += len(rows)
+        return rows
+
+    def __iter__(self):
+        for row in self._cursor:
+            self._stats.rows += 1
+            yield row
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    if stats is None or not conn.info.get("query_start"):
+        return
+
+    stats.db_time += time.perf_counter() - conn.info["query_start"].pop()
+    stats.statements += 1
+    stats.by_statement[statement] += 1
+    # Results are built from the context's cursor right after this event
+    if context is not None and cursor.description is not None:
+        context.cursor = _CountingCursor(cursor, stats)
+
+
+def start_tracking() -> Any:
+    """Start collecting statistics in the current context; returns a reset token."""
+    return _current.set(QueryStats())
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def stop_tracking(token: Any) -> QueryStats:
+    stats = _current.get()
+    _current.reset(token)
+    return stats
+
+
+@contextmanager
+def track_queries():
+    """Collect statistics for the statements executed inside the block."""
+    token = start_tracking()
+    stats = _current.get()
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def query_budget(max_statements: int) -> Callable:
+    """
+    Declare the maximum number of SQL statements an endpoint may run.
+
+    Applied below the route decorator; the monitoring middleware reports the
+    budget in the X-DB-Query-Budget header next to the measured count.
+    """
+    def decorate(endpoint: Callable) -> Callable:
+        endpoint.query_budget = max_statements
+        return endpoint
+    return decorate
+
+
+def endpoint_budget(endpoint: Optional[Callable]) -> Optional[int]:
+    return getattr(endpoint, "query_budget", None)
+
+
+def assert_query_budget(response, max_statements: Optional[int] = None):
+    """
+    Test helper: fail when a response ran more statements than its budget.
+
+    The budget is the endpoint's declared one unless `max_statements` is given.
+    """
+    statements = int(response.headers[STATEMENTS_HEADER])
+    budget = max_statements
+    if budget is None and BUDGET_HEADER in response.headers:
+        budget = int(response.headers[BUDGET_HEADER])
+    if budget is None:
+        raise AssertionError("Endpoint declares no query budget")
+    if statements > budget:
+        raise AssertionError(
+            f"{response.request.method} {response.request.url.path} ran {statements} SQL statements; "
+            f"the budget is {budget}"
+        )
@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+_REDIS_TOKEN_BUCKET = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or burst
+local ts = tonumber(state[2]) or now
+tokens = math.min(burst, tokens + math.max(now - ts, 0) * rate)
+local retry_after = 0
+local allowed = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    allowed = 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+
+class TokenBucketLimiter:
+    """
+    In-process token buckets: `burst` requests at once, refilled at `rate` per second.
+
+    A bucket idle for `burst / rate` seconds is full again, the same as a
+    missing one, so such buckets are pruned (at most every PRUNE_INTERVAL
+    seconds) like the Redis keys expire.
+    """
+
+    PRUNE_INTERVAL = 60.0
+
+    def __init__(self):
+        # key -> (tokens, last update, time the bucket is full again)
+        self._buckets: Dict[str, Tuple[float, float, float]] = {}
+        self._lock = threading.Lock()
+        self._pruned_at = time.monotonic()
+
+    def acquire(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        """
+        Take one token from the bucket for `key`.
+
+        Returns:
+            Whether the request is allowed, and the seconds until a token is available if not
+        """
+        now = time.monotonic()
+        with self._lock:
+            if now - self._pruned_at >= self.PRUNE_INTERVAL:
+                self._buckets = {k: bucket for k, bucket in self._buckets.items() if bucket[2] > now}
+                self._pruned_at = now
+            tokens, last, _ = self._buckets.get(key, (float(burst), now, now))
+            tokens = min(float(burst), tokens + (now - last) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now, now + burst / rate)
+            return (True, 0.0) if allowed else (False, (1 - tokens) / rate)
+
+    def reset(self):
+        with self._lock:
+            self._buckets.clear()
+
+
+class RedisTokenBucketLimiter(TokenBucketLimiter):
+    """Token buckets shared by all workers, updated atomically by a Lua script."""
+
+    def __init__(self, redis_url: str):
+        super().__init__()
+        import redis
+
+        self._redis = redis.Redis.from_url(redis_url)
+        self._script = self._redis.register_script(_REDIS_TOKEN_BUCKET)
+
+    def acquire(self, key: str, rate: float, burst: int) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after = self._script(keys=[f"ratelimit:{key}"], args=[rate, burst, time.time()])
+            return bool(int(allowed)), float(retry_after)
+        except Exception as e:
+            # Fail open to per-worker limits rather than rejecting every request
+            logger.error(f"Redis rate limiter unavailable, using in-process buckets: {e}")
+            return super().acquire(key, rate, burst)
+
+
+class ConcurrencyLimiter:
+    """Caps the number of in-flight requests per route; excess requests are shed, never queued."""
+
+    def __init__(self):
+        self._active: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def try_acquire(self, name: str, limit: int) -> bool:
+        with self._lock:
+            if self._active.get(name, 0) >= limit:
+                return False
+            self._active[name] = self._active.get(name, 0) + 1
+            return True
+
+    def release(self, name: str):
+        with self._lock:
+            self._active[name] -= 1
+
+    def active(self, name: str) -> int:
+        return self._active.get(name, 0)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one execution.
+
+    The first caller runs the function; callers arriving while it runs wait
+    and receive the same result (or exception).
+    """
+
+    def __init__(self):
+        self._calls: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def run(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = {"done": threading.Event(), "result": None, "error": None}
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call["done"].wait()
+            if call["error"] is not None:
+                raise call["error"]
+            return call["result"]
+
+        try:
+            call["result"] = fn()
+            return call["result"]
+        except Exception as e:
+            call["error"] = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call["done"].set()
+
+
+def create_rate_limiter() -> TokenBucketLimiter:
+    """Use Redis when RATE_LIMIT_BACKEND=redis (multi-worker deployments), else in-process."""
+    if os.getenv("RATE_LIMIT_BACKEND", "memory") == "redis":
+        return RedisTokenBucketLimiter(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    return TokenBucketLimiter()
+
+
+# Global limiter instances
+rate_limiter = create_rate_limiter()
+concurrency_limiter = ConcurrencyLimiter()
+cost_fetch_flight = SingleFlight()
@@ -0,0 +1,203 @@
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import or_
+from sqlalchemy.orm import Session
+from src.models.recommendation_model import RECOMMENDATION_STATUSES, Recommendation
+from src.services.anomaly_detection import AnomalyDetector
+
+logger = logging.getLogger(__name__)
+
+# Detector category (as returned by get_all_recommendations) of each recommendation type
+CATEGORIES = {"idle_ec2": "idle_instances", "underused_rds": "underused_rds", "cost_spike": "cost_spikes"}
+DAYS_PER_MONTH = 30
+# Share of an underused RDS instance's cost saved by downsizing it
+RDS_DOWNSIZE_SAVINGS = 0.3
+MAX_LIST_LIMIT = 500
+
+Key = Tuple[str, str, str]
+
+
+class RecommendationService:
+    """
+    Persistent, deduplicated recommendations with a lifecycle.
+
+    The anomaly job folds the detector's per-day findings into one row per
+    (type, service, account) with a monthly savings estimate, so reads are a
+    single indexed query. Rows that are no longer detected are removed while
+    still open; acknowledged and implemented ones are kept for the savings
+    ledger.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        # Per-detector timings of the last refresh (see AnomalyDetector.timings)
+        self.detector_timings: Dict[str, Dict[str, Any]] = {}
+
+    @staticmethod
+    def consolidate(findings: Dict[str, List[Dict[str, Any]]]) -> Dict[Key, Dict[str, Any]]:
+        """Fold per-day detector findings into one entry per (type, service, account)."""
+        merged: Dict[Key, Dict[str, Any]] = {}
+        for recs in findings.values():
+            for rec in recs:
+                key = (rec["type"], rec["service"], rec.get("account_id") or "unknown")
+                entry = merged.get(key)
+                if entry is None:
+                    entry = merged[key] = {
+                        "type": rec["type"], "service": key[1], "account_id": key[2],
+                        "suggestion": rec["suggestion"], "cost": 0.0, "usage": None,
+                        "previous_cost": rec.get("previous_cost"), "change_percent": rec.get("increase_percent"),
+                        "occurrences": 0, "days": [],
+                    }
+                entry["cost"] += rec.get("cost", rec.get("recent_cost", 0.0))
+                entry["occurrences"] += 1
+                if "date" in rec:
+                    entry["days"].append(date.fromisoformat(rec["date"]))
+                if rec.get("usage") is not None:
+                    entry["usage"] = (entry["usage"] or 0.0) + rec["usage"]
+
+        for entry in merged.values():
+            days = entry.pop("days")
+            entry["first_seen"] = min(days) if days else date.today()
+            entry["last_seen"] = max(days) if days else date.today()
+            if entry["usage"] is not None:
+                entry["usage"] /= entry["occurrences"]
+            # Savings are a monthly run rate of the average flagged day, not a sum over days
+            daily_cost = entry["cost"] / entry["occurrences"]
+            if entry["type"] == "idle_ec2":
+                entry["potential_savings"] = daily_cost * DAYS_PER_MONTH
+            elif entry["type"] == "underused_rds":
+                entry["potential_savings"] = daily_cost * DAYS_PER_MONTH * RDS_DOWNSIZE_SAVINGS
+            else:
+                entry["potential_savings"] = 0.0
+        return merged
+
+    def refresh(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Run the detectors and upsert the store.
+
+        Returns:
+            Open recommendations by detector category, most valuable first
+        """
+        detector = AnomalyDetector(self.db)
+        detected = self.consolidate(detector.get_all_recommendations())
+        self.detector_timings = detector.timings
+        # A detector that failed or timed out found nothing; its open rows are not stale
+        incomplete = {category for category, timing in detector.timings.items() if timing["status"] != "ok"}
+        now = datetime.now()
+
+        existing = {(r.type, r.service, r.account_id): r for r in self.db.query(Recommendation).all()}
+        inserts = []
+        for key, entry in detected.items():
+            row = existing.get(key)
+            if row is None:
+                inserts.append({**entry, "status": "open", "created_at": now, "updated_at": now})
+                continue
+            for field, value in entry.items():
+                if field != "first_seen":
+                    setattr(row, field, value)
+            row.updated_at = now
+
+        stale = [row.id for key, row in existing.items()
+                 if key not in detected and row.status == "open" and CATEGORIES[row.type] not in incomplete]
+        if stale:
+            self.db.query(Recommendation).filter(Recommendation.id.in_(stale)).delete(synchronize_session=False)
+        if inserts:
+            self.db.bulk_insert_mappings(Recommendation, inserts)
+        self.db.commit()
+        logger.info("Recommendations refreshed: %d detected, %d new, %d resolved",
+                    len(detected), len(inserts), len(stale))
+
+        by_category: Dict[str, List[Dict[str, Any]]] = {category: [] for category in CATEGORIES.values()}
+        for row in self.list(status="open", limit=MAX_LIST_LIMIT):
+            by_category[CATEGORIES[row["type"]]].append(row)
+        return by_category
+
+    def list(self, status: Optional[str] = "open", type: Optional[str] = None,
+             account_id: Optional[str] = None, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        Stored recommendations, highest potential savings first.
+
+        Raises:
+            ValueError: On an unknown status or type, or a limit outside 1..MAX_LIST_LIMIT
+        """
+        if status is not None and status not in RECOMMENDATION_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(RECOMMENDATION_STATUSES)}")
+        if type is not None and type not in CATEGORIES:
+            raise ValueError(f"type must be one of {', '.join(CATEGORIES)}")
+        if not 1 <= limit <= MAX_LIST_LIMIT:
+            raise ValueError(f"limit must be between 1 and {MAX_LIST_LIMIT}")
+
+        query = self.db.query(Recommendation)
+        if status is not None:
+            query = query.filter(Recommendation.status == status)
+        if type is not None:
+            query = query.filter(Recommendation.type == type)
+        if account_id is not None:
+            query = query.filter(Recommendation.account_id == account_id)
+        rows = query.order_by(Recommendation.potential_savings.desc(), Recommendation.id).limit(limit).all()
+        return [self.serialize(row) for row in rows]
+
+    def set_status(self, recommendation_id: int, status: str) -> Optional[Dict[str, Any]]:
+        """
+        Move a recommendation through its lifecycle; returns None when it does not exist.
+
+        Raises:
+            ValueError: On an unknown status
+        """
+        if status not in RECOMMENDATION_STATUSES:
+            raise ValueError(f"status must be one of {', '.join(RECOMMENDATION_STATUSES)}")
+        row = self.db.query(Recommendation).filter(Recommendation.id == recommendation_id).first()
+        if row is None:
+            return None
+
+        now = datetime.now()
+        row.status = status
+        row.updated_at = now
+        if status == "acknowledged" and row.acknowledged_at is None:
+            row.acknowledged_at = now
+        if status == "implemented":
+            row.acknowledged_at = row.acknowledged_at or now
+            row.implemented_at = now
+        elif row.implemented_at is not None:
+            # Reopened or demoted: the savings are no longer realized
+            row.implemented_at = None
+        self.db.commit()
+        return self.serialize(row)
+
+    def ledger_entries(self, since: datetime) -> List[Dict[str, Any]]:
+        """Savings ledger entries (MonitoringService format) for recommendations created or implemented since."""
+        rows = self.db.query(Recommendation).filter(
+            or_(Recommendation.created_at >= since, Recommendation.implemented_at >= since)
+        ).all()
+        return [
+            {
+                "timestamp": row.implemented_at or row.created_at,
+                "recommendation_type": row.type,
+                "potential_savings": row.potential_savings or 0.0,
+                "implemented": row.status == "implemented",
+                "actual_savings": (row.potential_savings or 0.0) if row.status == "implemented" else 0,
+            }
+            for row in rows
+        ]
+
+    @staticmethod
+    def serialize(row: Recommendation) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "type": row.type,
+            "service": row.service,
+            "account_id": row.account_id,
+            "status": row.status,
+            "suggestion": row.suggestion,
+            "cost": round(row.cost or 0.0, 2),
+            "usage": round(row.usage, 2) if row.usage is not None else None,
+            "previous_cost": round(row.previous_cost, 2) if row.previous_cost is not None else None,
+            "change_percent": round(row.change_percent, 2) if row.change_percent is not None else None,
+            "potential_savings": round(row.potential_savings or 0.0, 2),
+            "occurrences": row.occurrences,
+            "first_seen": row.first_seen.isoformat() if row.first_seen else None,
+            "last_seen": row.last_seen.isoformat() if row.last_seen else None,
+            "acknowledged_at": row.acknowledged_at.isoformat() if row.acknowledged_at else None,
+            "implemented_at": row.implemented_at.isoformat() if row.implemented_at else None,
+        }
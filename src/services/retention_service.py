@@ -0,0 +1,232 @@
+import csv
+import gzip
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+from src.models.allocation_model import CostAllocation
+from src.models.cost_model import CloudCost
+from src.models.database import PROJECT_ROOT
+from src.models.driver_model import CostDriver
+from src.models.partitioning import drop_partitions_before
+from src.models.rollup_model import CompactedMonth, CostRollup
+from src.services.rollup_service import period_end
+
+logger = logging.getLogger(__name__)
+
+# Raw daily rows are kept this many months; older months survive as monthly rollups
+RETENTION_RAW_MONTHS = int(os.getenv("RETENTION_RAW_MONTHS", "13"))
+# Monthly rollups older than this many months are archived to files (0 keeps them forever)
+RETENTION_AGGREGATE_MONTHS = int(os.getenv("RETENTION_AGGREGATE_MONTHS", "60"))
+RETENTION_ARCHIVE_DIR = os.getenv("RETENTION_ARCHIVE_DIR", os.path.join(PROJECT_ROOT, "archive"))
+# Rows deleted per transaction, so writers are never blocked for long
+RETENTION_CHUNK_SIZE = int(os.getenv("RETENTION_CHUNK_SIZE", "5000"))
+RETENTION_VACUUM = os.getenv("RETENTION_VACUUM", "1") == "1"
+
+ARCHIVE_COLUMNS = ("period_start", "service", "account_id", "region", "cost", "usage", "row_count")
+MAINTAINED_TABLES = ("cloud_costs", "cost_rollups", "cost_drivers", "cost_allocations")
+
+
+def add_months(day: date, months: int) -> date:
+    """First day of the month `months` away from the month containing `day`."""
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+class RetentionService:
+    """
+    Applies the retention tiers to cost data.
+
+    Raw rows older than RETENTION_RAW_MONTHS are compacted into monthly
+    rollups (weekly rollups, drivers and daily allocations of those months
+    are compacted or dropped too). Monthly rollups older than
+    RETENTION_AGGREGATE_MONTHS are written to gzip CSV files and removed.
+    Deletes run in small committed chunks, followed by VACUUM/ANALYZE.
+    """
+
+    def __init__(self, db: Session, archive_dir: str = RETENTION_ARCHIVE_DIR,
+                 chunk_size: int = RETENTION_CHUNK_SIZE):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.chunk_size = chunk_size
+
+    def run(self, today: Optional[date] = None, vacuum: bool = RETENTION_VACUUM) -> Dict[str, Any]:
+        today = today or date.today()
+        raw_cutoff = add_months(today, -RETENTION_RAW_MONTHS)
+        stats: Dict[str, Any] = {"raw_cutoff": raw_cutoff.isoformat(), "archive_cutoff": None}
+
+        stats.update(self.compact_raw(raw_cutoff))
+        # Weeks ending before the cutoff; the week straddling it still has raw days
+        stats["deleted_weekly_rollups"] = self._delete_chunked(
+            CostRollup, (CostRollup.granularity == "week") & (CostRollup.period_start < raw_cutoff - timedelta(days=6))
+        )
+        stats["deleted_drivers"] = self._delete_chunked(CostDriver, CostDriver.as_of < raw_cutoff)
+        stats["compacted_allocations"] = self.compact_allocations(raw_cutoff)
+
+        stats["archived_rollups"] = 0
+        if RETENTION_AGGREGATE_MONTHS > 0:
+            archive_cutoff = add_months(today, -RETENTION_AGGREGATE_MONTHS)
+            stats["archive_cutoff"] = archive_cutoff.isoformat()
+            stats["archived_rollups"] = self.archive_rollups(archive_cutoff)
+
+        removed = stats["deleted_raw_rows"] + stats["archived_rollups"]
+        stats["maintenance"] = self.maintain(vacuum=vacuum and removed > 0)
+        return stats
+
+    def compact_raw(self, cutoff: date) -> Dict[str, Any]:
+        """
+        Fold raw rows before the cutoff into monthly rollups, one month at a time.
+
+        A month is first recorded in `compacted_months` with its rollups
+        cleared (in one transaction); each chunk of its raw rows is then added
+        to the rollups and deleted in one transaction. Every raw row of a
+        compacted month is therefore outside its rollups, whether it was left
+        by an interrupted run or arrived later, and is folded in exactly once.
+
+        Returns:
+            Months compacted, partitions dropped and raw rows deleted
+        """
+        first = self.db.query(func.min(CloudCost.date)).filter(CloudCost.date < cutoff).scalar()
+        stats: Dict[str, Any] = {"compacted_months": 0, "dropped_partitions": [], "deleted_raw_rows": 0}
+        month = add_months(first, 0) if first else cutoff
+        while month < cutoff:
+            condition = CloudCost.date.between(month, period_end(month, "month"))
+            if self.db.query(CloudCost.id).filter(condition).first() is not None:
+                if self.db.get(CompactedMonth, month) is None:
+                    # Until now the rollups were derived from the raw rows about to be folded in
+                    self.db.query(CostRollup).filter(
+                        CostRollup.granularity == "month", CostRollup.period_start == month
+                    ).delete(synchronize_session=False)
+                    self.db.add(CompactedMonth(month=month))
+                    self.db.commit()
+
+                while True:
+                    ids = [row[0] for row in self.db.query(CloudCost.id).filter(condition).limit(self.chunk_size)]
+                    if not ids:
+                        break
+                    self._fold_chunk(month, ids)
+                    stats["deleted_raw_rows"] += len(ids)
+
+                # Reclaim the emptied partitions on PostgreSQL
+                dropped, dropped_rows = drop_partitions_before(self.db, add_months(month, 1))
+                stats["dropped_partitions"] += dropped
+                stats["deleted_raw_rows"] += dropped_rows
+                stats["compacted_months"] += 1
+            month = add_months(month, 1)
+        return stats
+
+    def _fold_chunk(self, month: date, ids: List[int]):
+        """Add raw rows to their month's rollups and delete them, in one transaction."""
+        rows = self.db.query(
+            CloudCost.service, CloudCost.account_id, CloudCost.region,
+            func.sum(CloudCost.cost), func.sum(CloudCost.usage), func.count(CloudCost.id)
+        ).filter(CloudCost.id.in_(ids)).group_by(CloudCost.service, CloudCost.account_id, CloudCost.region).all()
+
+        existing = {
+            (rollup.service, rollup.account_id, rollup.region): rollup
+            for rollup in self.db.query(CostRollup).filter(
+                CostRollup.granularity == "month", CostRollup.period_start == month,
+                CostRollup.service.in_({row[0] for row in rows})
+            )
+        }
+        for service, account_id, region, cost, usage, count in rows:
+            rollup = existing.get((service, account_id, region))
+            if rollup is None:
+                self.db.add(CostRollup(granularity="month", period_start=month, service=service,
+                                       account_id=account_id, region=region, cost=cost or 0.0,
+                                       usage=usage or 0.0, row_count=count))
+            else:
+                rollup.cost += cost or 0.0
+                rollup.usage += usage or 0.0
+                rollup.row_count += count
+
+        self.db.query(CloudCost).filter(CloudCost.id.in_(ids)).delete(synchronize_session=False)
+        self.db.commit()
+
+    def compact_allocations(self, cutoff: date) -> int:
+        """Fold daily allocations before the cutoff into one row per month (dated the 1st)."""
+        first = self.db.query(func.min(CostAllocation.date)).filter(CostAllocation.date < cutoff).scalar()
+        written = 0
+        month = add_months(first, 0) if first else cutoff
+        while month < cutoff:
+            end = period_end(month, "month")
+            daily = self.db.query(CostAllocation.id).filter(
+                CostAllocation.date.between(month + timedelta(days=1), end)
+            ).first()
+            if daily is None:
+                # Already compacted by an earlier run
+                month = add_months(month, 1)
+                continue
+            rows = self.db.query(
+                CostAllocation.team, CostAllocation.service, CostAllocation.account_id, CostAllocation.rule_id,
+                func.sum(CostAllocation.cost)
+            ).filter(
+                CostAllocation.date.between(month, end)
+            ).group_by(
+                CostAllocation.team, CostAllocation.service, CostAllocation.account_id, CostAllocation.rule_id
+            ).all()
+            self.db.query(CostAllocation).filter(
+                CostAllocation.date.between(month, end)
+            ).delete(synchronize_session=False)
+            self.db.bulk_insert_mappings(CostAllocation, [
+                {"date": month, "team": team, "service": service, "account_id": account_id,
+                 "rule_id": rule_id, "cost": cost or 0.0}
+                for team, service, account_id, rule_id, cost in rows
+            ])
+            self.db.commit()
+            written += len(rows)
+            month = add_months(month, 1)
+        return written
+
+    def archive_rollups(self, cutoff: date) -> int:
+        """Move monthly rollups before the cutoff into one gzip CSV file per month."""
+        months = [row[0] for row in self.db.query(CostRollup.period_start).filter(
+            CostRollup.granularity == "month", CostRollup.period_start < cutoff
+        ).distinct().order_by(CostRollup.period_start).all()]
+
+        archived = 0
+        os.makedirs(self.archive_dir, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        for month in months:
+            condition = (CostRollup.granularity == "month") & (CostRollup.period_start == month)
+            rows = self.db.query(*(getattr(CostRollup, column) for column in ARCHIVE_COLUMNS)).filter(condition).all()
+            # One file per run, so a run interrupted after writing never overwrites archived rows
+            path = os.path.join(self.archive_dir, f"cost_rollups_{month:%Y-%m}_{stamp}.csv.gz")
+            with gzip.open(path + ".tmp", "wt", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(ARCHIVE_COLUMNS)
+                writer.writerows(rows)
+            os.replace(path + ".tmp", path)
+            archived += self._delete_chunked(CostRollup, condition)
+        return archived
+
+    def _delete_chunked(self, model, condition) -> int:
+        """Delete matching rows by primary key in committed chunks of `chunk_size`."""
+        deleted = 0
+        while True:
+            ids = [row[0] for row in self.db.query(model.id).filter(condition).limit(self.chunk_size).all()]
+            if not ids:
+                return deleted
+            self.db.query(model).filter(model.id.in_(ids)).delete(synchronize_session=False)
+            self.db.commit()
+            deleted += len(ids)
+
+    def maintain(self, vacuum: bool = True) -> List[str]:
+        """Refresh planner statistics and (when rows were removed) reclaim space."""
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            statements = [f"VACUUM (ANALYZE) {table}" if vacuum else f"ANALYZE {table}" for table in MAINTAINED_TABLES]
+        elif dialect == "sqlite":
+            statements = (["VACUUM"] if vacuum else []) + ["ANALYZE"]
+        else:
+            return []
+
+        # VACUUM cannot run inside a transaction
+        with self.db.get_bind().connect() as conn:
+            conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+            for statement in statements:
+                conn.execute(text(statement))
+        logger.info("Database maintenance: %s", "; ".join(statements))
+        return statements
@@ -0,0 +1,163 @@
+from typing import Dict, Iterable, List, Tuple
+from datetime import date, timedelta
+from sqlalchemy import delete, func
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+from src.models.rollup_model import CompactedMonth, CostRollup, RollupPeriod
+
+ROLLUP_GRANULARITIES = ("week", "month")
+
+
+def period_start(day: date, granularity: str) -> date:
+    """Return the first day of the week (Monday) or month containing `day`."""
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    return day
+
+
+def period_end(start: date, granularity: str) -> date:
+    """Return the last day of the period beginning at `start`."""
+    if granularity == "week":
+        return start + timedelta(days=6)
+    if granularity == "month":
+        next_month = (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+        return next_month - timedelta(days=1)
+    return start
+
+
+def period_starts(start: date, end: date, granularity: str) -> List[date]:
+    """First days of the periods from the one containing `start` through the one containing `end`."""
+    starts = []
+    current = period_start(start, granularity)
+    while current <= end:
+        starts.append(current)
+        current = period_end(current, granularity) + timedelta(days=1)
+    return starts
+
+
+class RollupService:
+    """
+    Maintains weekly and monthly rollups of `cloud_costs`.
+
+    Monthly rollups of compacted months (see RetentionService) hold rows that
+    no longer exist raw and are never rebuilt. Rebuilt periods are recorded
+    in `rollup_periods`; writers of raw rows clear them with `mark_stale`.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def refresh(self, dates: Iterable[date]) -> int:
+        """
+        Recompute the rollup periods touched by the given dates.
+
+        Returns:
+            Number of rollup rows written
+        """
+        dates = set(dates)
+        if not dates:
+            return 0
+
+        written = 0
+        for granularity in ROLLUP_GRANULARITIES:
+            starts = {period_start(d, granularity) for d in dates}
+            for start in sorted(starts):
+                written += self._rebuild_range(granularity, start, period_end(start, granularity))
+
+        self.db.commit()
+        return written
+
+    def mark_stale(self, dates: Iterable[date]):
+        """Clear the rollup periods of the given dates; commits with the caller's transaction."""
+        dates = set(dates)
+        if not dates:
+            return
+        for granularity in ROLLUP_GRANULARITIES:
+            self.db.execute(delete(RollupPeriod).where(
+                RollupPeriod.granularity == granularity,
+                RollupPeriod.period_start.in_(sorted({period_start(d, granularity) for d in dates}))
+            ))
+
+    def rebuild_all(self) -> int:
+        """Recompute every rollup from the raw daily rows."""
+        bounds = self.db.query(func.min(CloudCost.date), func.max(CloudCost.date)).first()
+        if not bounds or bounds[0] is None:
+            return 0
+
+        written = 0
+        for granularity in ROLLUP_GRANULARITIES:
+            start = period_start(bounds[0], granularity)
+            end = period_end(period_start(bounds[1], granularity), granularity)
+            written += self._rebuild_range(granularity, start, end)
+
+        self.db.commit()
+        return written
+
+    def _rebuild_range(self, granularity: str, start: date, end: date) -> int:
+        """Replace the rollups of one granularity between two period boundaries."""
+        daily = self.db.query(
+            CloudCost.date,
+            CloudCost.service,
+            CloudCost.account_id,
+            CloudCost.region,
+            func.sum(CloudCost.cost),
+            func.sum(CloudCost.usage),
+            func.count(CloudCost.id)
+        ).filter(
+            CloudCost.date.between(start, end)
+        ).group_by(
+            CloudCost.date, CloudCost.service, CloudCost.account_id, CloudCost.region
+        ).all()
+
+        compacted = set()
+        if granularity == "month":
+            compacted = {month for (month,) in self.db.query(CompactedMonth.month).filter(
+                CompactedMonth.month.between(start, end))}
+
+        totals: Dict[Tuple, List[float]] = {}
+        for day, service, account_id, region, cost, usage, count in daily:
+            key = (period_start(day, granularity), service, account_id, region)
+            if key[0] in compacted:
+                continue
+            if key not in totals:
+                totals[key] = [0.0, 0.0, 0]
+            totals[key][0] += cost or 0.0
+            totals[key][1] += usage or 0.0
+            totals[key][2] += count
+
+        stale = self.db.query(CostRollup).filter(
+            CostRollup.granularity == granularity,
+            CostRollup.period_start.between(start, end)
+        )
+        if compacted:
+            stale = stale.filter(CostRollup.period_start.notin_(compacted))
+        stale.delete(synchronize_session=False)
+
+        rows = [
+            {
+                "granularity": granularity,
+                "period_start": key[0],
+                "service": key[1],
+                "account_id": key[2],
+                "region": key[3],
+                "cost": values[0],
+                "usage": values[1],
+                "row_count": values[2],
+            }
+            for key, values in totals.items()
+        ]
+        if rows:
+            self.db.bulk_insert_mappings(CostRollup, rows)
+
+        self.db.query(RollupPeriod).filter(
+            RollupPeriod.granularity == granularity,
+            RollupPeriod.period_start.between(start, end)
+        ).delete(synchronize_session=False)
+        self.db.bulk_insert_mappings(RollupPeriod, [
+            {"granularity": granularity, "period_start": start_of_period}
+            for start_of_period in period_starts(start, end, granularity)
+        ])
+
+        return len(rows)
@@ -0,0 +1,228 @@
+from typing import Dict, Any, Optional, Sequence
+from datetime import date, timedelta
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from src.models.cost_model import CloudCost
+from src.services.anomaly_detection import IDLE_EC2_USAGE_THRESHOLD, UNDERUSED_RDS_USAGE_THRESHOLD
+from src.services.cost_cube import CostCube, CubeSnapshot
+
+# Spend categories the scenario transforms act on (rows of the history matrix)
+CATEGORIES = ("ec2_idle", "ec2", "rds_underused", "rds", "other")
+EC2_IDLE, EC2, RDS_UNDERUSED, RDS, OTHER = range(len(CATEGORIES))
+
+# Commitment coverage (fraction of median eligible daily spend) -> discount on the
+# committed amount, interpolated linearly between points
+DISCOUNT_CURVES = {
+    "reserved_1yr": ((0.0, 0.25, 0.5, 0.75, 1.0), (0.0, 0.30, 0.33, 0.35, 0.36)),
+    "reserved_3yr": ((0.0, 0.25, 0.5, 0.75, 1.0), (0.0, 0.50, 0.54, 0.57, 0.60)),
+    "savings_plan_1yr": ((0.0, 0.25, 0.5, 0.75, 1.0), (0.0, 0.22, 0.25, 0.27, 0.28)),
+    "savings_plan_3yr": ((0.0, 0.25, 0.5, 0.75, 1.0), (0.0, 0.42, 0.46, 0.49, 0.51)),
+}
+# Moving one instance size down roughly halves the cost of an underused RDS instance
+RDS_DOWNSIZE_SAVINGS = 0.5
+DEFAULT_SPOT_DISCOUNT = 0.7
+MAX_SCENARIOS = 200_000
+# Scenarios evaluated per batch, bounding the (scenario x day) temporaries
+SCENARIO_BATCH_SIZE = 4096
+DAYS_PER_MONTH = 30
+
+
+def service_kinds(services: Sequence[str]) -> np.ndarray:
+    """EC2, RDS or OTHER per service name, by whether it contains "EC2" or "RDS" (ignoring case)."""
+    names = [service.lower() for service in services]
+    return np.array([EC2 if "ec2" in name else RDS if "rds" in name else OTHER for name in names], dtype=int)
+
+
+def categorize(kinds: np.ndarray, below_idle: np.ndarray, below_underused: np.ndarray) -> np.ndarray:
+    """
+    Scenario category of spend from its service kind and whether its usage is
+    below the idle EC2 / underused RDS thresholds (arrays broadcast together).
+    """
+    return np.select(
+        [(kinds == EC2) & below_idle, kinds == EC2, (kinds == RDS) & below_underused, kinds == RDS],
+        [EC2_IDLE, EC2, RDS_UNDERUSED, RDS],
+        default=OTHER
+    )
+
+
+class SimulationEngine:
+    """
+    Vectorized what-if simulation of savings scenarios over historical spend.
+
+    History is loaded once as a (category x day) matrix; every scenario
+    combination is then evaluated at once with NumPy broadcasting, giving a
+    (scenario x day) cost matrix.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+
+    def load_history(self, days: int = 90, end_date: Optional[date] = None) -> np.ndarray:
+        """
+        Load daily spend per scenario category.
+
+        Slices the shared cost cube when it holds the window and falls back to
+        one grouped query otherwise.
+
+        Returns:
+            Array of shape (len(CATEGORIES), days)
+        """
+        end_date = end_date or date.today()
+        start_date = end_date - timedelta(days=days - 1)
+
+        cube = CostCube.snapshot_for(self.db)
+        if cube.covers(start_date):
+            return self._history_from_cube(cube, start_date, days)
+
+        below_idle = CloudCost.usage < IDLE_EC2_USAGE_THRESHOLD
+        below_underused = CloudCost.usage < UNDERUSED_RDS_USAGE_THRESHOLD
+        rows = self.db.query(
+            CloudCost.date, CloudCost.service, below_idle, below_underused, func.sum(CloudCost.cost)
+        ).filter(
+            CloudCost.date.between(start_date, end_date)
+        ).group_by(CloudCost.date, CloudCost.service, below_idle, below_underused).all()
+
+        history = np.zeros((len(CATEGORIES), days))
+        if not rows:
+            return history
+        day, service, idle, underused, cost = zip(*rows)
+        category = categorize(service_kinds([name or "unknown" for name in service]),
+                              np.array(idle, dtype=bool), np.array(underused, dtype=bool))
+        np.add.at(history, (category, [(d - start_date).days for d in day]),
+                  [value or 0.0 for value in cost])
+        return history
+
+    @staticmethod
+    def _history_from_cube(cube: CubeSnapshot, start_date: date, days: int) -> np.ndarray:
+        """Categorize every (day, service, account) cell by its mean usage and sum per day."""
+        history = np.zeros((len(CATEGORIES), days))
+        window = cube.day_slice(start_date, start_date + timedelta(days=days - 1))
+        if window.stop <= window.start:
+            return history
+
+        cost = cube.cost[window]
+        rows = cube.rows[window]
+        usage = np.divide(cube.usage[window], rows, out=np.zeros_like(cost), where=rows > 0)
+        category = categorize(service_kinds(cube.services)[None, :, None],
+                              usage < IDLE_EC2_USAGE_THRESHOLD, usage < UNDERUSED_RDS_USAGE_THRESHOLD)
+
+        offset = (cube.day_at(window.start) - start_date).days
+        for index in range(len(CATEGORIES)):
+            history[index, offset:offset + cost.shape[0]] = np.where(category == index, cost, 0.0).sum(axis=(1, 2))
+        return history
+
+    @staticmethod
+    def scenario_grid(stop_idle: Sequence[float], commitment_coverage: Sequence[float],
+                      commitment_plans: Sequence[str], spot_fraction: Sequence[float],
+                      rds_downsize: Sequence[float]) -> Dict[str, np.ndarray]:
+        """Expand parameter lists into one array per parameter (their cartesian product)."""
+        for plan in commitment_plans:
+            if plan not in DISCOUNT_CURVES:
+                raise ValueError(f"Unknown commitment plan '{plan}'; use one of {', '.join(DISCOUNT_CURVES)}")
+        for name, values in (("stop_idle", stop_idle), ("commitment_coverage", commitment_coverage),
+                             ("spot_fraction", spot_fraction), ("rds_downsize", rds_downsize)):
+            if not values or any(v < 0 or v > 1 for v in values):
+                raise ValueError(f"{name} values must be between 0 and 1")
+
+        count = (len(stop_idle) * len(commitment_coverage) * len(commitment_plans)
+                 * len(spot_fraction) * len(rds_downsize))
+        if count > MAX_SCENARIOS:
+            raise ValueError(f"{count} scenarios requested; the limit is {MAX_SCENARIOS}")
+
+        plan_index = [list(DISCOUNT_CURVES).index(plan) for plan in commitment_plans]
+        grids = np.meshgrid(stop_idle, commitment_coverage, plan_index, spot_fraction, rds_downsize,
+                            indexing="ij")
+        names = ("stop_idle", "commitment_coverage", "plan_index", "spot_fraction", "rds_downsize")
+        return {name: grid.ravel() for name, grid in zip(names, grids)}
+
+    @staticmethod
+    def evaluate(history: np.ndarray, scenarios: Dict[str, np.ndarray],
+                 spot_discount: float = DEFAULT_SPOT_DISCOUNT) -> np.ndarray:
+        """
+        Apply every scenario to the history.
+
+        Returns:
+            Array of shape (scenarios,) with the simulated total cost per scenario
+        """
+        count = len(scenarios["stop_idle"])
+        if count > SCENARIO_BATCH_SIZE:
+            return np.concatenate([
+                SimulationEngine.evaluate(
+                    history,
+                    {name: values[start:start + SCENARIO_BATCH_SIZE] for name, values in scenarios.items()},
+                    spot_discount
+                )
+                for start in range(0, count, SCENARIO_BATCH_SIZE)
+            ])
+
+        column = {name: values[:, None] for name, values in scenarios.items()}
+
+        # Stopping idle EC2 removes that share of idle spend
+        ec2 = history[EC2] + history[EC2_IDLE] * (1 - column["stop_idle"])
+        # Spot shifts a share of the remaining on-demand EC2 spend at a discount
+        spot_cost = ec2 * column["spot_fraction"] * (1 - spot_discount)
+        ec2_on_demand = ec2 * (1 - column["spot_fraction"])
+        # Downsizing underused RDS instances
+        rds = history[RDS] + history[RDS_UNDERUSED] * (1 - column["rds_downsize"] * RDS_DOWNSIZE_SAVINGS)
+
+        # Commitments cover a fixed daily amount of EC2 + RDS spend: the committed
+        # amount is paid (discounted) every day, anything above it is on-demand
+        eligible = ec2_on_demand + rds
+        commitment = column["commitment_coverage"] * np.median(eligible, axis=1, keepdims=True)
+        discount = np.zeros_like(commitment)
+        for index, (xs, ys) in enumerate(DISCOUNT_CURVES.values()):
+            mask = column["plan_index"] == index
+            discount = np.where(mask, np.interp(column["commitment_coverage"], xs, ys), discount)
+        committed_cost = commitment * (1 - discount) + np.maximum(eligible - commitment, 0)
+
+        return (committed_cost + spot_cost + history[OTHER]).sum(axis=1)
+
+    def rank_scenarios(self, days: int = 90, stop_idle: Sequence[float] = (0.0, 0.5, 1.0),
+                       commitment_coverage: Sequence[float] = (0.0, 0.25, 0.5, 0.75, 1.0),
+                       commitment_plans: Sequence[str] = tuple(DISCOUNT_CURVES),
+                       spot_fraction: Sequence[float] = (0.0, 0.2, 0.4),
+                       rds_downsize: Sequence[float] = (0.0, 0.5, 1.0),
+                       spot_discount: float = DEFAULT_SPOT_DISCOUNT,
+                       top_n: int = 20) -> Dict[str, Any]:
+        """
+        Evaluate every combination of the given parameters and rank them by savings.
+
+        Returns:
+            Dictionary with the baseline monthly cost and the top scenarios
+        """
+        if not 0 <= spot_discount < 1:
+            raise ValueError("spot_discount must be between 0 and 1")
+        if top_n < 1:
+            raise ValueError("top_n must be at least 1")
+
+        history = self.load_history(days)
+        scenarios = self.scenario_grid(stop_idle, commitment_coverage, commitment_plans,
+                                       spot_fraction, rds_downsize)
+        totals = self.evaluate(history, scenarios, spot_discount)
+
+        baseline = float(history.sum())
+        monthly_factor = DAYS_PER_MONTH / days
+        savings = baseline - totals
+        top = np.argsort(-savings)[:top_n]
+        plans = list(DISCOUNT_CURVES)
+
+        return {
+            "days": days,
+            "scenarios_evaluated": int(totals.size),
+            "baseline_monthly_cost": round(baseline * monthly_factor, 2),
+            "scenarios": [
+                {
+                    "rank": rank + 1,
+                    "stop_idle": float(scenarios["stop_idle"][i]),
+                    "commitment_coverage": float(scenarios["commitment_coverage"][i]),
+                    "commitment_plan": plans[int(scenarios["plan_index"][i])],
+                    "spot_fraction": float(scenarios["spot_fraction"][i]),
+                    "rds_downsize": float(scenarios["rds_downsize"][i]),
+                    "monthly_cost": round(float(totals[i]) * monthly_factor, 2),
+                    "monthly_savings": round(float(savings[i]) * monthly_factor, 2),
+                    "savings_percent": round(float(savings[i]) / baseline * 100, 2) if baseline else 0.0,
+                }
+                for rank, i in enumerate(top)
+            ],
+        }
@@ -0,0 +1,74 @@
+import json
+from datetime import date, timedelta
+from src.models.cost_model import CloudCost
+from src.services import ai_recommendations
+from src.services.ai_recommendations import AIRecommendationService, estimate_tokens
+from src.services.cost_cube import CostCube
+
+def _seed(db_session):
+    today = date.today()
+    for offset in range(60):
+        day = today - timedelta(days=offset)
+        for account, scale in (("111", 1.0), ("222", 3.0)):
+            db_session.add(CloudCost(date=day, service="Amazon EC2", cost=10.0 * scale * (2 if offset < 30 else 1),
+                                     usage=50.0, account_id=account))
+            db_session.add(CloudCost(date=day, service="Amazon S3", cost=2.0 * scale, usage=50.0, account_id=account))
+    # One spike in account 111
+    db_session.add(CloudCost(date=today - timedelta(days=3), service="AWS Lambda", cost=500.0, usage=1.0, account_id="111"))
+    db_session.commit()
+
+def test_account_summaries_have_drivers_trends_and_anomalies(db_session):
+    _seed(db_session)
+    summaries = AIRecommendationService().build_account_summaries(CostCube.snapshot_for(db_session))
+
+    # Most expensive account first
+    assert [s["account_id"] for s in summaries] == ["222", "111"]
+    account = summaries[1]
+    assert account["period"]["days"] == 30
+    assert account["top_drivers"][0]["service"] == "Amazon EC2"
+    assert account["top_drivers"][0]["change_percent"] == 100.0
+    assert account["anomalies"][0]["date"] == (date.today() - timedelta(days=3)).isoformat()
+    assert account["anomalies"][0]["main_service"] == "AWS Lambda"
+
+def test_prompt_is_trimmed_to_the_token_budget():
+    summary = {"account_id": "1", "top_drivers": [{"service": f"Service {i}", "cost": i} for i in range(50)],
+               "anomalies": [{"date": "2024-01-01"}] * 3}
+    text = AIRecommendationService()._prepare_cost_summary(summary, token_budget=300)
+
+    assert estimate_tokens(text) + estimate_tokens(ai_recommendations.SYSTEM_PROMPT) <= 300
+    trimmed = json.loads(text)
+    assert len(trimmed["anomalies"]) == 1 and 0 < len(trimmed["top_drivers"]) < 50
+    assert len(summary["top_drivers"]) == 50
+
+def test_accounts_are_analyzed_concurrently_with_structured_output(db_session):
+    _seed(db_session)
+    prompts = []
+
+    def complete(messages):
+        account = json.loads(messages[-1]["content"])["account_id"]
+        prompts.append(account)
+        if account == "111":
+            raise TimeoutError("upstream timeout")
+        reply = {"recommendations": [{"title": f"Rightsize {i}", "description": "...", "service": "Amazon EC2",
+                                      "estimated_monthly_savings": "120.5", "priority": "HIGH"} for i in range(7)]}
+        return f"```json\n{json.dumps(reply)}\n```", {"prompt_tokens": 100, "completion_tokens": 40}
+
+    before = ai_recommendations.ai_usage.stats()
+    results = AIRecommendationService(complete=complete).generate_ai_recommendations(db_session)
+
+    assert sorted(prompts) == ["111", "222"]
+    # No 5-item cap; failures of one account do not drop the others
+    assert len([r for r in results if r["type"] == "ai_recommendation"]) == 7
+    assert results[-1] == {"type": "error", "account_id": "111", "message": "AI analysis failed: upstream timeout"}
+    assert results[0]["potential_savings"] == 120.5 and results[0]["priority"] == "high"
+    stats = ai_recommendations.ai_usage.stats()
+    assert stats["requests"] - before["requests"] == 2
+    assert stats["errors"] - before["errors"] == 1
+    assert stats["prompt_tokens"] - before["prompt_tokens"] == 100
+
+def test_plain_text_replies_fall_back_to_line_parsing():
+    reply = "Here you go:\n1. Use Savings Plans: commit to steady EC2 spend\n2) Delete old snapshots\n   in every region"
+    parsed = AIRecommendationService()._parse_ai_response(reply)
+
+    assert [r["title"] for r in parsed] == ["Use Savings Plans", "Delete old snapshots"]
+    assert parsed[1]["description"] == "Delete old snapshots in every region"
@@ -0,0 +1,86 @@
+from datetime import date
+from unittest.mock import MagicMock, patch
+import pytest
+from fastapi.testclient import TestClient
+from src.api.auth_routes import get_current_user
+from src.main import app
+from src.models.allocation_model import CostAllocation
+from src.models.database import get_db, get_read_db
+from src.services.allocation_service import AllocationService, parse_targets
+from src.services.ingestion_service import IngestionService
+
+DAY = date(2024, 5, 1)
+
+def _ingest(db, records):
+    ingestion = IngestionService(db)
+    ingestion.store_cost_records([
+        {"date": DAY.isoformat(), "usage": 1.0, "region": "us-east-1", **record} for record in records
+    ])
+    ingestion.on_ingestion_complete()
+
+def _rules(db):
+    service = AllocationService(db)
+    service.create_rule("payments EC2", "direct", "payments", priority=10, account_pattern="111*")
+    service.create_rule("search EC2", "direct", "search", priority=10, account_pattern="222*")
+    service.create_rule("shared data", "fixed", "payments:3,search:1", priority=20, service_pattern="Amazon RDS")
+    service.create_rule("shared S3", "proportional", "*", priority=30, service_pattern="Amazon S3")
+    return service
+
+def test_parse_targets():
+    assert parse_targets("fixed", "a:60, b:40") == [("a", 0.6), ("b", 0.4)]
+    assert parse_targets("proportional", "*") == []
+    for method, targets in (("direct", "a,b"), ("fixed", "a:0"), ("fixed", "a"), ("split", "a")):
+        with pytest.raises(ValueError):
+            parse_targets(method, targets)
+
+def test_rules_are_applied_after_ingestion(db_session):
+    service = _rules(db_session)
+    _ingest(db_session, [
+        {"service": "Amazon EC2", "cost": 75.0, "account_id": "111000"},
+        {"service": "Amazon EC2", "cost": 25.0, "account_id": "222000"},
+        {"service": "Amazon RDS", "cost": 40.0, "account_id": "333000"},
+        {"service": "Amazon S3", "cost": 20.0, "account_id": "333000"},
+        {"service": "AWS Lambda", "cost": 5.0, "account_id": "999000"},
+    ])
+
+    report = service.chargeback(DAY, DAY)
+    by_team = {item["key"]: item["cost"] for item in report["items"]}
+    # payments: 75 direct + 30 fixed; S3 split by direct+fixed cost 105 vs 35
+    assert by_team == {"payments": 120.0, "search": 40.0, "unallocated": 5.0}
+    assert report["total"] == 165.0
+
+    s3 = service.chargeback(DAY, DAY, group_by="service", team="search")
+    assert {item["key"]: item["cost"] for item in s3["items"]}["Amazon S3"] == 5.0
+
+def test_rule_changes_reallocate_history(db_session):
+    _ingest(db_session, [{"service": "Amazon EC2", "cost": 10.0, "account_id": "111000"}])
+    service = AllocationService(db_session)
+    # No rules: nothing is allocated
+    assert db_session.query(CostAllocation).count() == 0
+
+    rule_id = service.create_rule("all", "direct", "platform").id
+    assert service.chargeback(DAY, DAY)["items"][0]["key"] == "platform"
+
+    assert service.delete_rule(rule_id)
+    assert not service.delete_rule(rule_id)
+    assert db_session.query(CostAllocation).count() == 0
+
+def test_chargeback_endpoints(db_session):
+    _rules(db_session)
+    _ingest(db_session, [{"service": "Amazon EC2", "cost": 10.0, "account_id": "111000"}])
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="alice")
+    try:
+        client = TestClient(app)
+        response = client.get("/chargeback?start_date=2024-05-01&end_date=2024-05-31")
+        assert response.json()["items"] == [{"key": "payments", "cost": 10.0, "percent": 100.0}]
+        assert client.get("/chargeback?group_by=region").status_code == 400
+        assert [r["name"] for r in client.get("/allocation/rules").json()][0] == "payments EC2"
+
+        rule = {"name": "bad", "method": "fixed", "targets": "a"}
+        assert client.post("/allocation/rules", json=rule).status_code == 403
+        with patch('src.api.auth_routes.ADMIN_USERS', {"alice"}):
+            assert client.post("/allocation/rules", json=rule).status_code == 400
+            assert client.delete("/allocation/rules/999").status_code == 404
+    finally:
+        app.dependency_overrides = {}
@@ -1,7 +1,7 @@
 import pytest
 from fastapi.testclient import TestClient
 from src.main import app
-from src.models.database import get_db
+from src.models.database import get_db, get_read_db
 from src.api.auth_routes import get_current_user
 from unittest.mock import MagicMock, patch
 
@@ -23,7 +23,7 @@ def test_costs_daily_endpoint():
     mock_session.query.return_value.all.return_value = []
 
     # Override the dependencies
-    app.dependency_overrides[get_db] = lambda: mock_session
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: mock_session
     app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
 
     response = client.get("/costs/daily")
@@ -33,12 +33,13 @@ def test_costs_daily_endpoint():
     # Clean up
     app.dependency_overrides = {}
 
-@patch('src.services.anomaly_detection.AnomalyDetector')
-def test_recommendations_endpoint(mock_detector_class):
-    # Mock the AnomalyDetector class
-    mock_detector = MagicMock()
-    mock_detector.get_all_recommendations.return_value = []
-    mock_detector_class.return_value = mock_detector
+@patch('src.api.routes.RecommendationService')
+def test_recommendations_endpoint(mock_service_class):
+    # Mock the recommendation store
+    mock_service = MagicMock()
+    mock_service.list.return_value = []
+    mock_service_class.return_value = mock_service
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: MagicMock()
 
     # Mock auth
     app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
@@ -46,6 +47,7 @@ def test_recommendations_endpoint(mock_detector_class):
     response = client.get("/recommendations")
     assert response.status_code == 200
     assert isinstance(response.json(), list)
+    mock_service.list.assert_called_once_with(status="open", type=None, account_id=None, limit=100)
 
     # Clean up
     app.dependency_overrides = {}
@@ -71,24 +73,80 @@ def test_aws_cost_service():
     assert service is not None
 
 @patch('src.services.aws_cost_service.AWSCostService.get_yesterday_costs')
-def test_costs_fetch_endpoint(mock_get_costs):
+def test_costs_fetch_endpoint(mock_get_costs, db_session):
     # Mock the AWS service
     mock_get_costs.return_value = [
         {'date': '2023-01-01', 'service': 'EC2', 'cost': 10.0, 'usage': 5.0, 'account_id': '123456789'}
     ]
 
-    # Mock the database session and auth
-    mock_session = MagicMock()
-    mock_session.add.return_value = None
-    mock_session.commit.return_value = None
-
-    # Override the dependencies
-    app.dependency_overrides[get_db] = lambda: mock_session
+    # Ingest into the test database; mock auth
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
     app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
 
     response = client.post("/costs/fetch")
     assert response.status_code == 200
-    assert "Successfully fetched" in response.json()["message"]
+    assert response.json()["message"] == "Successfully fetched 1 cost records (1 new)"
+
+    # Clean up
+    app.dependency_overrides = {}
+
+def test_costs_aggregate_rejects_unknown_group_by():
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: MagicMock()
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
+
+    response = client.get("/costs/aggregate?group_by=team")
+    assert response.status_code == 400
+
+    # Clean up
+    app.dependency_overrides = {}
+
+def test_costs_daily_content_negotiation():
+    import msgpack
+    from datetime import date
+
+    mock_session = MagicMock()
+    mock_session.query.return_value.all.return_value = [
+        (1, date(2023, 1, 1), 'EC2', 10.0, 5.0, '123456789')
+    ]
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: mock_session
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
+
+    response = client.get("/costs/daily")
+    assert response.json() == [{"id": 1, "date": "2023-01-01", "service": "EC2", "cost": 10.0,
+                                "usage": 5.0, "account_id": "123456789"}]
+
+    response = client.get("/costs/daily", headers={"Accept": "application/msgpack"})
+    assert response.headers["content-type"] == "application/msgpack"
+    assert msgpack.unpackb(response.content)["service"] == ["EC2"]
+
+    response = client.get("/costs/daily?format=xml")
+    assert response.status_code == 406
+
+    # The highest q-value wins, whatever the header order; q=0 is never picked
+    response = client.get("/costs/daily", headers={"Accept": "application/msgpack;q=0.1, application/json;q=1"})
+    assert response.headers["content-type"] == "application/json"
+    response = client.get("/costs/daily", headers={"Accept": "application/json;q=0, application/msgpack;q=0.2"})
+    assert response.headers["content-type"] == "application/msgpack"
+
+    # Clean up
+    app.dependency_overrides = {}
+
+def test_costs_daily_without_pyarrow_refuses_arrow(monkeypatch):
+    from src.api import responses
+    from src.api.responses import ARROW_MEDIA_TYPE as ARROW
+    monkeypatch.setattr(responses, "pa", None)
+    mock_session = MagicMock()
+    mock_session.query.return_value.all.return_value = []
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: mock_session
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="test")
+
+    response = client.get("/costs/daily?format=arrow")
+    assert response.status_code == 406
+    assert "pyarrow" in response.json()["detail"]
+    assert client.get("/costs/daily", headers={"Accept": ARROW}).status_code == 406
+    # With an acceptable alternative the response falls back to JSON
+    response = client.get("/costs/daily", headers={"Accept": f"{ARROW}, application/json;q=0.5"})
+    assert response.status_code == 200 and response.json() == []
 
     # Clean up
     app.dependency_overrides = {}
@@ -0,0 +1,68 @@
+from datetime import date, timedelta
+from unittest.mock import patch
+from src.models.budget_model import Budget
+from src.services.budget_service import BudgetService
+from src.services.ingestion_service import IngestionService
+
+def _ingest(db, start, days, cost):
+    records = [{'date': (start + timedelta(days=i)).isoformat(), 'service': service, 'cost': cost,
+                'usage': 1.0, 'account_id': '123'}
+               for i in range(days) for service in ("EC2", "S3")]
+    ingestion = IngestionService(db)
+    ingestion.store_cost_records(records)
+    ingestion.on_ingestion_complete()
+
+@patch('src.services.budget_service.AlertService.send_budget_alerts')
+def test_threshold_crossings_are_alerted_once(mock_send, db_session):
+    db_session.add_all([
+        Budget(name="EC2", tenant="team", account_id="123", service="EC2", amount=100.0),
+        Budget(name="Everything", tenant="team", amount=1000.0),
+    ])
+    db_session.commit()
+
+    # 6 days x $10 of EC2 = 60% of the EC2 budget, 12% of the total budget
+    _ingest(db_session, date(2024, 4, 1), 6, 10.0)
+    assert mock_send.call_count == 1
+    crossings = mock_send.call_args[0][0]
+    assert [(c["name"], c["threshold_crossed"]) for c in crossings] == [("EC2", 50)]
+    assert crossings[0]["forecast_end_of_month"] == 300.0
+
+    # Re-evaluating without new spend does not alert again
+    assert BudgetService(db_session).check_thresholds(as_of=date(2024, 4, 6)) == []
+    assert mock_send.call_count == 1
+
+    # Crossing the next threshold alerts again
+    _ingest(db_session, date(2024, 4, 7), 3, 10.0)
+    assert mock_send.call_count == 2
+    assert mock_send.call_args[0][0][0]["threshold_crossed"] == 80
+
+@patch('src.services.budget_service.AlertService.send_budget_alerts')
+def test_backfilling_a_prior_month_does_not_realert_the_current_one(mock_send, db_session):
+    db_session.add(Budget(name="EC2", tenant="team", account_id="123", service="EC2", amount=100.0))
+    db_session.commit()
+    _ingest(db_session, date(2024, 4, 1), 6, 10.0)
+    assert mock_send.call_count == 1
+
+    # March history arrives late and would cross 100% of March's budget
+    _ingest(db_session, date(2024, 3, 1), 12, 10.0)
+    assert mock_send.call_count == 1
+    budget = db_session.query(Budget).one()
+    assert (budget.last_alerted_period, budget.last_alerted_threshold) == ("2024-04", 50)
+
+    # Evaluating March explicitly does not rewind April's alert state either
+    assert BudgetService(db_session).check_thresholds(as_of=date(2024, 3, 12)) == []
+    _ingest(db_session, date(2024, 4, 7), 1, 1.0)
+    assert mock_send.call_count == 1
+
+@patch('src.services.budget_service.AlertService.send_budget_alerts')
+def test_evaluate_many_budgets_in_one_pass(mock_send, db_session):
+    _ingest(db_session, date(2024, 4, 1), 10, 10.0)
+    db_session.add_all([Budget(name=f"b{i}", tenant="t", service="S3", amount=float(i + 1)) for i in range(2000)])
+    db_session.commit()
+
+    statuses = BudgetService(db_session).evaluate_all(as_of=date(2024, 4, 10))
+
+    assert len(statuses) == 2000
+    assert statuses[-1]["month_to_date"] == 100.0
+    assert statuses[-1]["percent_used"] == 5.0
+    mock_send.assert_not_called()
@@ -0,0 +1,136 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from src.models.cost_model import CloudCost
+from src.services import cost_cube
+from src.services.anomaly_detection import AnomalyDetector
+from src.services.cost_cube import CostCube, CubeSnapshot
+from src.services.ingestion_service import IngestionService
+from src.services.simulation_engine import SimulationEngine
+
+def _seed(db_session, days=10):
+    today = date.today()
+    for offset in range(days):
+        day = today - timedelta(days=offset)
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=20.0, usage=1.0, account_id="1", region="us-east-1"))
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=10.0, usage=3.0, account_id="1", region="eu-west-1"))
+        db_session.add(CloudCost(date=day, service="Amazon RDS", cost=8.0, usage=50.0, account_id="2"))
+    db_session.commit()
+
+def test_cube_is_dictionary_encoded_and_shared_per_engine(db_session):
+    _seed(db_session)
+    cube = CostCube.for_session(db_session)
+
+    assert sorted(cube.services) == ["Amazon EC2", "Amazon RDS"]
+    assert cube.cost.shape == (10, 2, 2)
+    ec2, account = cube.service_ids["Amazon EC2"], cube.account_ids["1"]
+    # Regions of one (day, service, account) cell are summed
+    assert cube.cost[-1, ec2, account] == 30.0
+    assert cube.rows[-1, ec2, account] == 2
+    assert cube.total(date.today() - timedelta(days=9), date.today()) == pytest.approx(380.0)
+    assert CostCube.for_session(db_session) is cube
+
+def test_ingestion_refreshes_a_loaded_cube(db_session):
+    _seed(db_session)
+    cube = CostCube.for_session(db_session)
+    tomorrow = (date.today() + timedelta(days=1)).isoformat()
+
+    service = IngestionService(db_session)
+    service.upsert_cost_records([
+        {"date": tomorrow, "service": "AWS Lambda", "cost": 4.0, "usage": 9.0, "account_id": "3"},
+        {"date": date.today().isoformat(), "service": "Amazon RDS", "cost": 12.0, "usage": 50.0,
+         "account_id": "2", "region": "eu-west-1"},
+    ])
+    service.on_ingestion_complete()
+
+    assert cube.days == 11
+    assert cube.cost[-1, cube.service_ids["AWS Lambda"], cube.account_ids["3"]] == 4.0
+    assert cube.cost[-2, cube.service_ids["Amazon RDS"], cube.account_ids["2"]] == 20.0
+
+def test_cube_window_is_bounded(db_session, monkeypatch):
+    monkeypatch.setattr(cost_cube, "CUBE_MAX_DAYS", 5)
+    _seed(db_session)
+    cube = CostCube.for_session(db_session)
+
+    assert cube.days == 5
+    assert cube.covers(date.today() - timedelta(days=4))
+    assert not cube.covers(date.today() - timedelta(days=9))
+
+def test_cube_cells_are_bounded(db_session, monkeypatch):
+    monkeypatch.setattr(cost_cube, "CUBE_MAX_CELLS", 12)
+    _seed(db_session)
+    with monkeypatch.context() as patch:
+        patch.setattr(CubeSnapshot, "covers", lambda self, start: False)
+        from_sql = SimulationEngine(db_session).load_history(days=10)
+    cube = CostCube.for_session(db_session)
+
+    # 2 services x 2 accounts leave room for 3 days; older history comes from the database
+    assert cube.cost.shape == (3, 2, 2)
+    assert not cube.covers(date.today() - timedelta(days=3))
+    assert np.allclose(SimulationEngine(db_session).load_history(days=10), from_sql)
+
+    service = IngestionService(db_session)
+    service.upsert_cost_records([{"date": (date.today() + timedelta(days=1)).isoformat(), "service": "AWS Lambda",
+                                  "cost": 4.0, "usage": 9.0, "account_id": "3"}])
+    service.on_ingestion_complete()
+
+    # A third service and account leave room for one day
+    assert cube.cost.shape == (1, 3, 3)
+    assert cube.first_day == date.today() + timedelta(days=1)
+
+def test_service_mask_ignores_case(db_session):
+    db_session.add_all([
+        CloudCost(date=date.today(), service=service, cost=1.0, usage=1.0, account_id="1")
+        for service in ("Amazon EC2", "ec2-other", "Amazon RDS")
+    ])
+    db_session.commit()
+    cube = CostCube.snapshot_for(db_session)
+
+    assert {cube.services[i] for i in np.flatnonzero(cube.service_mask("EC2"))} == {"Amazon EC2", "ec2-other"}
+
+def test_detectors_read_cube_cells(db_session):
+    _seed(db_session)
+    idle = AnomalyDetector(db_session).detect_idle_instances()
+
+    # Mean usage of the two EC2 regions is 2.0, below the idle threshold
+    assert len(idle) == 8
+    assert {r["account_id"] for r in idle} == {"1"}
+    assert idle[0]["cost"] == 30.0 and idle[0]["usage"] == 2.0
+
+def test_simulation_history_matches_sql_fallback(db_session, monkeypatch):
+    _seed(db_session)
+    from_cube = SimulationEngine(db_session).load_history(days=10)
+
+    monkeypatch.setattr(CubeSnapshot, "covers", lambda self, start: False)
+    from_sql = SimulationEngine(db_session).load_history(days=10)
+
+    # Row-level and cell-level categorization agree when regions share a category
+    assert np.allclose(from_cube.sum(axis=0), from_sql.sum(axis=0))
+
+def test_refreshes_publish_new_snapshots(db_session):
+    _seed(db_session)
+    cube = CostCube.for_session(db_session)
+    before = cube.snapshot
+
+    service = IngestionService(db_session)
+    service.upsert_cost_records([{"date": (date.today() + timedelta(days=1)).isoformat(), "service": "AWS Lambda",
+                                  "cost": 4.0, "usage": 9.0, "account_id": "3"}])
+    service.on_ingestion_complete()
+
+    # Readers holding the old snapshot keep consistent, unchanged arrays
+    assert before.cost.shape == before.rows.shape == (10, 2, 2)
+    assert "AWS Lambda" not in before.service_ids
+    assert not before.cost.flags.writeable
+    assert cube.snapshot is not before and cube.snapshot.cost.shape == (11, 3, 3)
+
+def test_monthly_totals_leave_out_the_truncated_month(db_session, monkeypatch):
+    monkeypatch.setattr(cost_cube, "CUBE_MAX_DAYS", 40)
+    for day in (date(2025, 1, 10), date(2025, 1, 28), date(2025, 2, 1), date(2025, 2, 20), date(2025, 3, 5)):
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=10.0, usage=1.0, account_id="1"))
+    db_session.commit()
+
+    snapshot = CostCube.snapshot_for(db_session)
+
+    # The 40-day window starts on Jan 25: January (only its 28th is held) is partial
+    assert snapshot.complete_from == date(2025, 1, 25)
+    assert snapshot.monthly_totals() == {"2025-02": 20.0, "2025-03": 10.0}
@@ -0,0 +1,85 @@
+from datetime import date, timedelta
+from unittest.mock import MagicMock
+from src.services.aws_cost_service import AWSCostService
+from src.services.cost_explorer_cache import CostExplorerCache
+
+def _results(start, end):
+    day = date.fromisoformat(start)
+    results = []
+    while day < date.fromisoformat(end):
+        results.append({
+            "TimePeriod": {"Start": day.isoformat(), "End": (day + timedelta(days=1)).isoformat()},
+            "Groups": [{"Keys": ["Amazon EC2"], "Metrics": {
+                "UnblendedCost": {"Amount": "12.5"}, "UsageQuantity": {"Amount": "3"}}}],
+        })
+        day += timedelta(days=1)
+    return results
+
+def _service(tmp_path):
+    service = AWSCostService(cache=CostExplorerCache(str(tmp_path / "ce.sqlite"), revision_days=3))
+    service._client = MagicMock()
+    service._client.get_cost_and_usage.side_effect = lambda **kw: {
+        "ResultsByTime": _results(kw["TimePeriod"]["Start"], kw["TimePeriod"]["End"])
+    }
+    return service
+
+def test_final_days_are_served_from_cache(tmp_path):
+    service = _service(tmp_path)
+    start = (date.today() - timedelta(days=30)).isoformat()
+    end = (date.today() - timedelta(days=20)).isoformat()
+
+    first = service.get_cost_and_usage(start, end)
+    assert len(first) == 10
+    assert service.client.get_cost_and_usage.call_count == 1
+
+    # A new process with the same cache file makes no API call
+    again = _service(tmp_path)
+    assert again.get_cost_and_usage(start, end) == first
+    assert again.client.get_cost_and_usage.call_count == 0
+    assert again.cache.stats()["hits"] == 10
+
+def test_only_the_open_window_is_refetched(tmp_path):
+    service = _service(tmp_path)
+    start = (date.today() - timedelta(days=10)).isoformat()
+    end = (date.today() + timedelta(days=1)).isoformat()
+
+    assert len(service.get_cost_and_usage(start, end)) == 11
+    assert len(service.get_cost_and_usage(start, end)) == 11
+
+    second_call = service.client.get_cost_and_usage.call_args_list[1].kwargs["TimePeriod"]
+    # Days within the 3 day revision window (and today) stay open
+    assert second_call == {"Start": (date.today() - timedelta(days=3)).isoformat(), "End": end}
+    stats = service.cache.stats()
+    assert stats["entries"] == 7
+    assert stats["hits"] == 7 and stats["misses"] == 15
+
+def test_days_split_across_pages_are_merged_before_caching(tmp_path):
+    service = _service(tmp_path)
+    start = (date.today() - timedelta(days=30)).isoformat()
+    end = (date.today() - timedelta(days=29)).isoformat()
+    (day,) = _results(start, end)
+    rds = {"Keys": ["Amazon RDS"], "Metrics": {"UnblendedCost": {"Amount": "7"}, "UsageQuantity": {"Amount": "1"}}}
+    pages = [{"ResultsByTime": [day], "NextPageToken": "2"},
+             {"ResultsByTime": [{**day, "Groups": [rds]}]}]
+    service._client.get_cost_and_usage.side_effect = lambda **kw: pages.pop(0)
+
+    first = service.get_cost_and_usage(start, end)
+    # Served from the cache: the cached day holds both pages' groups
+    assert service.get_cost_and_usage(start, end) == first
+    assert sorted((r["service"], r["cost"]) for r in first) == [("Amazon EC2", 12.5), ("Amazon RDS", 7.0)]
+
+def test_days_without_data_are_cached(tmp_path):
+    service = _service(tmp_path)
+    start = (date.today() - timedelta(days=30)).isoformat()
+    end = (date.today() - timedelta(days=20)).isoformat()
+    # Cost Explorer leaves out the days with no cost
+    service._client.get_cost_and_usage.side_effect = lambda **kw: {
+        "ResultsByTime": _results(kw["TimePeriod"]["Start"], kw["TimePeriod"]["End"])[:4]
+    }
+
+    assert len(service.get_cost_and_usage(start, end)) == 4
+    assert len(service.get_cost_and_usage(start, end)) == 4
+    assert service.client.get_cost_and_usage.call_count == 1
+    stats = service.cache.stats()
+    assert stats["entries"] == 10 and stats["hits"] == 10
+    assert "path" not in stats
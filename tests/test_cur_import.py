@@ -0,0 +1,133 @@
+import csv
+import gzip
+import threading
+from datetime import date, datetime
+from unittest.mock import patch
+import pytest
+from sqlalchemy import func
+from src.jobs.cur_import import import_cur_files
+from src.models.cost_model import CloudCost
+from src.models.rollup_model import CostRollup
+from src.services.cur_import import CurImportService, normalize_column, resolve_columns
+from src.services.ingestion_service import IngestionService
+
+HEADER = ["identity/LineItemId", "lineItem/UsageAccountId", "lineItem/UsageStartDate", "lineItem/ProductCode",
+          "product/ProductName", "product/region", "lineItem/UsageAmount", "lineItem/UnblendedCost"]
+
+def _write_cur(path, rows):
+    with gzip.open(path, "wt", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(HEADER)
+        writer.writerows(rows)
+    return str(path)
+
+def _line_items(count, day="2025-01-01"):
+    return [[f"li-{i}", "111", f"{day}T{i % 24:02d}:00:00Z", "AmazonEC2", "Amazon Elastic Compute Cloud",
+             "us-east-1", "1.0", "0.5"] for i in range(count)]
+
+def _stored(db):
+    return {(row.date.isoformat(), row.service, row.account_id, row.region): (round(row.cost, 6), row.usage)
+            for row in db.query(CloudCost).all()}
+
+def test_column_names_of_both_cur_versions():
+    assert normalize_column("lineItem/UsageStartDate") == "line_item_usage_start_date"
+    assert normalize_column("product/regionCode") == "product_region_code"
+    columns = resolve_columns(["line_item_usage_account_id", "line_item_usage_start_date", "line_item_product_code",
+                               "line_item_unblended_cost"])
+    assert (columns["account_id"], columns["date"], columns["service"], columns["cost"]) == (0, 1, 2, 3)
+    assert columns["region"] is None and columns["usage"] is None
+    with pytest.raises(ValueError, match="cost"):
+        resolve_columns(["lineItem/UsageStartDate", "lineItem/ProductCode", "lineItem/UsageAccountId"])
+
+def test_line_items_are_aggregated_to_the_cost_grain_across_chunks(db_session, tmp_path):
+    rows = _line_items(5) + _line_items(3, day="2025-01-02") + [
+        # Tax lines carry no product name or region
+        ["tax", "222", "2025-01-01T00:00:00Z", "AWSSupportBusiness", "", "", "", "4.25"],
+    ]
+    path = _write_cur(tmp_path / "cur-00001.csv.gz", rows)
+
+    stats = CurImportService(db_session, chunk_rows=2, include_region=True).import_file(path)
+
+    assert (stats["line_items"], stats["chunks"], stats["records"]) == (9, 5, 3)
+    assert stats["rows_per_second"] > 0
+    assert _stored(db_session) == {
+        ("2025-01-01", "Amazon Elastic Compute Cloud", "111", "us-east-1"): (2.5, 5.0),
+        ("2025-01-02", "Amazon Elastic Compute Cloud", "111", "us-east-1"): (1.5, 3.0),
+        ("2025-01-01", "AWSSupportBusiness", "222", None): (4.25, 0.0),
+    }
+    # Derived data is refreshed for the imported days
+    monthly = db_session.query(CostRollup.cost).filter(
+        CostRollup.granularity == "month", CostRollup.period_start == date(2025, 1, 1),
+        CostRollup.service == "Amazon Elastic Compute Cloud").scalar()
+    assert monthly == pytest.approx(4.0)
+
+    # Re-importing replaces the stored totals instead of adding to them
+    CurImportService(db_session, chunk_rows=4, include_region=True).import_file(path)
+    assert _stored(db_session)[("2025-01-01", "Amazon Elastic Compute Cloud", "111", "us-east-1")] == (2.5, 5.0)
+    assert db_session.query(CloudCost).count() == 3
+
+def test_part_files_of_a_report_add_up(db_session, tmp_path):
+    parts = [_write_cur(tmp_path / f"cur-0000{part}.csv.gz", _line_items(12)) for part in (1, 2)]
+
+    stats = CurImportService(db_session, chunk_rows=5).import_files(parts)
+
+    assert [part["records"] for part in stats] == [1, 1]
+    assert _stored(db_session) == {("2025-01-01", "Amazon Elastic Compute Cloud", "111", None): (12.0, 24.0)}
+
+    # A new run over the same parts replaces the totals with the same sums
+    with patch("src.jobs.cur_import.get_db", return_value=iter([db_session])):
+        import_cur_files(parts, chunk_rows=7)
+    assert _stored(db_session) == {("2025-01-01", "Amazon Elastic Compute Cloud", "111", None): (12.0, 24.0)}
+
+def test_a_day_loaded_from_cost_explorer_and_cur_is_counted_once(db_session, tmp_path):
+    ingestion = IngestionService(db_session)
+    ingestion.upsert_cost_records([{"date": "2025-01-01", "service": "Amazon Elastic Compute Cloud",
+                                    "account_id": "111", "region": None, "cost": 1.75, "usage": 3.0}])
+    rows = _line_items(2) + [["eu", "111", "2025-01-01T05:00:00Z", "AmazonEC2", "Amazon Elastic Compute Cloud",
+                              "eu-west-1", "2.0", "1.0"]]
+    path = _write_cur(tmp_path / "cur.csv.gz", rows)
+
+    CurImportService(db_session).import_file(path, refresh=False)
+
+    assert _stored(db_session) == {("2025-01-01", "Amazon Elastic Compute Cloud", "111", None): (2.0, 4.0)}
+    assert db_session.query(func.sum(CloudCost.cost)).scalar() == pytest.approx(2.0)
+
+def test_parse_errors_stop_the_import(db_session, tmp_path):
+    rows = _line_items(4) + [["bad", "111", "2025-01-01T00:00:00Z", "AmazonEC2", "EC2", "us-east-1", "1", "n/a"]]
+    path = _write_cur(tmp_path / "cur.csv.gz", rows)
+
+    with pytest.raises(ValueError, match="n/a"):
+        CurImportService(db_session, chunk_rows=2).import_file(path)
+    assert not [thread for thread in threading.enumerate() if thread.name == "cur-parser"]
+
+def test_parquet_reports(db_session, tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    path = str(tmp_path / "cur.parquet")
+    pq.write_table(pa.table({
+        "line_item_usage_start_date": pa.array([datetime(2025, 1, 1, 5), datetime(2025, 1, 1, 9), datetime(2025, 1, 2)],
+                                               pa.timestamp("ms")),
+        "line_item_product_code": ["AmazonEC2", "AmazonEC2", "AWSSupportBusiness"],
+        "product_product_name": ["Amazon Elastic Compute Cloud", "Amazon Elastic Compute Cloud", None],
+        "line_item_usage_account_id": ["111", "111", "222"],
+        "product_region_code": ["us-east-1", "us-east-1", None],
+        "line_item_unblended_cost": [1.5, 2.0, 3.0],
+        "line_item_usage_amount": [1.0, 1.0, 0.0],
+    }), path)
+
+    stats = CurImportService(db_session, chunk_rows=2, include_region=True).import_file(path, refresh=False)
+
+    assert (stats["line_items"], stats["records"]) == (3, 2)
+    assert _stored(db_session) == {
+        ("2025-01-01", "Amazon Elastic Compute Cloud", "111", "us-east-1"): (3.5, 2.0),
+        ("2025-01-02", "AWSSupportBusiness", "222", None): (3.0, 0.0),
+    }
+
+def test_parsing_sustains_a_million_line_items_per_minute(tmp_path):
+    path = _write_cur(tmp_path / "cur.csv.gz", _line_items(50000))
+
+    parsed = [(line_items, seconds) for _, line_items, seconds in CurImportService(None).iter_chunks(path)]
+
+    line_items = sum(count for count, _ in parsed)
+    assert line_items == 50000
+    assert line_items / sum(seconds for _, seconds in parsed) * 60 > 1_000_000
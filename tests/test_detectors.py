@@ -0,0 +1,75 @@
+import time
+from datetime import date, timedelta
+from src.models.cost_model import CloudCost
+from src.services import anomaly_detection
+from src.services.anomaly_detection import AnomalyDetector, register_detector
+
+def test_registered_detectors_share_one_cube_load(db_session, monkeypatch):
+    db_session.add(CloudCost(date=date.today(), service="Amazon EC2", cost=10.0, usage=1.0, account_id="1"))
+    db_session.commit()
+    loads = []
+    loader = anomaly_detection.INPUT_LOADERS["cube"]
+    monkeypatch.setitem(anomaly_detection.INPUT_LOADERS, "cube", lambda db: loads.append(db) or loader(db))
+
+    detector = AnomalyDetector(db_session)
+    results = detector.get_all_recommendations()
+
+    assert list(results) == ["idle_instances", "underused_rds", "cost_spikes"]
+    assert len(results["idle_instances"]) == 1
+    assert len(loads) == 1
+    assert {timing["status"] for timing in detector.timings.values()} == {"ok"}
+    assert detector.timings["idle_instances"]["findings"] == 1
+
+def test_detectors_run_concurrently_with_their_own_timeouts(db_session, monkeypatch):
+    monkeypatch.setattr(anomaly_detection, "DETECTORS", [])
+    db_session.add(CloudCost(date=date.today(), service="Amazon EC2", cost=10.0, usage=1.0, account_id="1"))
+    db_session.commit()
+
+    class Detectors(AnomalyDetector):
+        @register_detector("slow_a", needs=())
+        def slow_a(self):
+            time.sleep(0.3)
+            return [{"type": "a"}]
+
+        @register_detector("slow_b", needs=())
+        def slow_b(self):
+            time.sleep(0.3)
+            return []
+
+        @register_detector("stuck", needs=(), timeout=0.05)
+        def stuck(self):
+            time.sleep(1)
+            return [{"type": "late"}]
+
+        @register_detector("broken", needs=())
+        def broken(self):
+            raise RuntimeError("bad data")
+
+        @register_detector("sql", needs=("session",))
+        def sql(self):
+            assert self.session is not None and self.session is not self.db
+            return [{"rows": self.session.query(CloudCost).count()}]
+
+    detector = Detectors(db_session)
+    start = time.perf_counter()
+    results = detector.get_all_recommendations()
+
+    # Bounded by the slowest detector, not the sum of both slow ones
+    assert time.perf_counter() - start < 0.55
+    assert results == {"slow_a": [{"type": "a"}], "slow_b": [], "stuck": [], "broken": [], "sql": [{"rows": 1}]}
+    assert detector.timings["stuck"]["status"] == "timeout"
+    assert detector.timings["broken"]["status"] == "error"
+    assert detector.timings["slow_a"]["seconds"] >= 0.3
+
+def test_cost_spikes_are_per_service(db_session):
+    today = date.today()
+    for service, account, previous, recent in (("Amazon EC2", "1", 100.0, 200.0), ("Amazon EC2", "2", 100.0, 10.0),
+                                               ("Amazon RDS", "1", 50.0, 40.0), ("Amazon RDS", "2", 50.0, 90.0)):
+        db_session.add(CloudCost(date=today - timedelta(days=45), service=service, cost=previous, usage=1.0, account_id=account))
+        db_session.add(CloudCost(date=today - timedelta(days=5), service=service, cost=recent, usage=1.0, account_id=account))
+    db_session.commit()
+
+    # EC2 doubled in account 1 but went from 200 to 210 overall; RDS went from 100 to 130
+    (spike,) = AnomalyDetector(db_session).detect_cost_spikes()
+    assert (spike["service"], spike["recent_cost"], spike["previous_cost"]) == ("Amazon RDS", 130.0, 100.0)
+    assert "account_id" not in spike
@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+import pytest
+from src.services.driver_index import DriverIndexService
+from src.services.ingestion_service import IngestionService
+
+def _ingest(db, start, days, daily_cost):
+    records = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        for service, cost in daily_cost(offset).items():
+            records.append({'date': day.isoformat(), 'service': service, 'cost': cost,
+                            'usage': 1.0, 'account_id': '123'})
+    ingestion = IngestionService(db)
+    ingestion.store_cost_records(records)
+    ingestion.on_ingestion_complete()
+
+def test_ingestion_refreshes_ranked_drivers(db_session):
+    start = date(2024, 3, 1)
+    # Last day: EC2 jumps by 50, S3 by 5, RDS drops by 20
+    _ingest(db_session, start, 14, lambda i: {
+        "EC2": 100.0 + (50 if i == 13 else 0),
+        "S3": 10.0 + (5 if i == 13 else 0),
+        "RDS": 40.0 - (20 if i == 13 else 0),
+        "Lambda": 1.0,
+    })
+
+    result = DriverIndexService(db_session).top_drivers(window="dod", dimension="service", k=1)
+
+    assert result["as_of"] == "2024-03-14"
+    assert result["increases"] == [{"rank": 1, "key": "EC2", "current_cost": 150.0, "previous_cost": 100.0,
+                                    "delta": 50.0, "delta_percent": 50.0}]
+    assert [d["key"] for d in result["decreases"]] == ["RDS"]
+
+def test_week_over_week_by_account(db_session):
+    start = date(2024, 3, 1)
+    _ingest(db_session, start, 14, lambda i: {"EC2": 10.0 if i < 7 else 12.0})
+
+    result = DriverIndexService(db_session).top_drivers(window="wow", dimension="account", k=5)
+
+    assert result["increases"][0]["key"] == "123"
+    assert result["increases"][0]["delta"] == 14.0
+    assert result["decreases"] == []
+
+def test_top_drivers_validates_arguments(db_session):
+    with pytest.raises(ValueError):
+        DriverIndexService(db_session).top_drivers(window="mom")
@@ -0,0 +1,68 @@
+import asyncio
+import threading
+from datetime import date
+from unittest.mock import patch
+from src.models.budget_model import Budget
+from src.services.event_bus import EventBus, format_sse
+from src.services.ingestion_service import IngestionService
+
+def test_publish_from_worker_thread_fans_out_per_user():
+    bus = EventBus()
+
+    async def run():
+        _, alice = bus.subscribe("alice", ["costs", "budgets"])
+        _, bob = bus.subscribe("bob", ["costs"])
+
+        def publish():
+            bus.publish("costs", {"dates": ["2024-04-01"]})
+            bus.publish("budgets", {"crossings": []}, users=["alice"])
+
+        thread = threading.Thread(target=publish)
+        thread.start()
+        thread.join()
+
+        alice_events = [await asyncio.wait_for(alice.queue.get(), 1) for _ in range(2)]
+        bob_event = await asyncio.wait_for(bob.queue.get(), 1)
+        await asyncio.sleep(0)
+        return alice_events, bob_event, bob.queue.empty()
+
+    alice_events, bob_event, bob_drained = asyncio.run(run())
+    assert [e["topic"] for e in alice_events] == ["costs", "budgets"]
+    assert bob_event == {"topic": "costs", "data": {"dates": ["2024-04-01"]}}
+    assert bob_drained
+
+def test_slow_subscriber_drops_oldest_events():
+    bus = EventBus()
+
+    async def run():
+        _, subscriber = bus.subscribe("alice")
+        for i in range(subscriber.queue.maxsize + 5):
+            bus.publish("costs", {"n": i})
+        await asyncio.sleep(0)
+        return subscriber
+
+    subscriber = asyncio.run(run())
+    assert subscriber.dropped == 5
+    assert subscriber.queue.get_nowait()["data"] == {"n": 5}
+
+def test_format_sse():
+    assert format_sse("costs", {"a": 1}) == 'event: costs\ndata: {"a":1}\n\n'
+
+@patch('src.services.budget_service.AlertService.send_budget_alerts')
+def test_ingestion_publishes_deltas(mock_send, db_session):
+    db_session.add(Budget(name="EC2", tenant="alice", service="EC2", amount=10.0))
+    db_session.commit()
+
+    ingestion = IngestionService(db_session)
+    ingestion.store_cost_records([
+        {'date': '2024-04-01', 'service': 'EC2', 'cost': 6.0, 'usage': 1.0, 'account_id': '123'},
+        {'date': '2024-04-01', 'service': 'S3', 'cost': 4.0, 'usage': 1.0, 'account_id': '123'},
+    ])
+    with patch('src.services.ingestion_service.event_bus') as bus:
+        ingestion.on_ingestion_complete()
+
+    published = {call.args[0]: call for call in bus.publish.call_args_list}
+    assert published["costs"].args[1] == {"dates": ["2024-04-01"], "daily_totals": {"2024-04-01": 10.0}}
+    assert published["rollups"].args[1] == {"week": ["2024-04-01"], "month": ["2024-04-01"]}
+    assert published["budgets"].kwargs["users"] == ["alice"]
+    assert published["budgets"].args[1]["crossings"][0]["threshold_crossed"] == 50
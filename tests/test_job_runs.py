@@ -0,0 +1,123 @@
+import threading
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+import pytest
+from apscheduler.events import EVENT_JOB_MAX_INSTANCES, EVENT_JOB_SUBMITTED, JobSubmissionEvent
+from apscheduler.schedulers.background import BackgroundScheduler
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+from src.jobs.scheduler import JOB_EVENTS, check_for_anomalies
+from src.main import app
+from src.models.database import get_db, get_read_db
+from src.models.job_model import JobRun
+from src.services.job_runs import JobRunService, JobRunTracker
+from src.services.query_stats import assert_query_budget
+
+
+def _run_jobs(tracker, *jobs):
+    """Run each (job_id, function) once on a real scheduler and wait for all of them to finish."""
+    done = threading.Semaphore(0)
+    scheduler = BackgroundScheduler()
+    scheduler.add_listener(tracker.listener, JOB_EVENTS)
+    scheduler.add_listener(lambda event: done.release(), JOB_EVENTS & ~EVENT_JOB_SUBMITTED)
+    scheduler.start()
+    try:
+        for job_id, function in jobs:
+            scheduler.add_job(function, id=job_id)
+        for _ in jobs:
+            assert done.acquire(timeout=10)
+    finally:
+        scheduler.shutdown()
+
+
+def test_scheduler_listener_records_runs_with_job_telemetry(db_session):
+    tracker = JobRunTracker(session_factory=sessionmaker(bind=db_session.get_bind()))
+
+    def ingest():
+        with tracker.telemetry("ingest") as telemetry:
+            with telemetry.phase("fetch"):
+                telemetry.add(rows_fetched=120, api_calls=2)
+            with telemetry.phase("store"):
+                telemetry.add(rows_upserted=100)
+
+    def broken():
+        with tracker.telemetry("broken"):
+            raise RuntimeError("Cost Explorer throttled")
+
+    _run_jobs(tracker, ("ingest", ingest), ("broken", broken))
+    report = JobRunService(db_session).report()
+
+    runs = {run["job_id"]: run for run in report["runs"]}
+    assert runs["ingest"]["status"] == "success"
+    assert (runs["ingest"]["rows_fetched"], runs["ingest"]["rows_upserted"], runs["ingest"]["api_calls"]) == (120, 100, 2)
+    assert set(runs["ingest"]["phases"]) == {"fetch", "store"}
+    assert runs["ingest"]["duration_seconds"] >= 0
+    assert runs["broken"]["status"] == "error"
+    assert "Cost Explorer throttled" in runs["broken"]["error"]
+    assert report["jobs"]["broken"]["error"] == 1 and report["jobs"]["ingest"]["success"] == 1
+
+
+def test_runs_outside_the_scheduler_do_not_leak_telemetry(db_session):
+    tracker = JobRunTracker(session_factory=sessionmaker(bind=db_session.get_bind()))
+
+    # e.g. `python -m src.jobs.daily_cost_fetch` in the same process
+    with tracker.telemetry("daily_cost_fetch") as telemetry:
+        telemetry.add(rows_upserted=500, api_calls=3)
+    assert telemetry.started_at.tzinfo is timezone.utc
+
+    def fails_before_reporting():
+        raise RuntimeError("no credentials")
+
+    def check():
+        with tracker.telemetry("anomaly_check") as telemetry:
+            telemetry.add(alerts=4)
+
+    _run_jobs(tracker, ("daily_cost_fetch", fails_before_reporting), ("anomaly_check", check))
+    runs = {run["job_id"]: run for run in JobRunService(db_session).report()["runs"]}
+    assert (runs["daily_cost_fetch"]["rows_upserted"], runs["daily_cost_fetch"]["api_calls"]) == (0, 0)
+    assert (runs["anomaly_check"]["alerts"], runs["anomaly_check"]["rows_upserted"]) == (4, 0)
+
+
+def test_skipped_runs_are_recorded_and_summarized(db_session):
+    tracker = JobRunTracker(session_factory=sessionmaker(bind=db_session.get_bind()))
+    for seconds in (10, 20, 30, 40):
+        tracker.record("daily_cost_fetch", "success", started_at=datetime(2026, 10, 1, tzinfo=timezone.utc),
+                       finished_at=datetime(2026, 10, 1, 0, 0, seconds, tzinfo=timezone.utc))
+    tracker.listener(JobSubmissionEvent(EVENT_JOB_MAX_INSTANCES, "daily_cost_fetch", "default", [datetime.now(timezone.utc)]))
+    db_session.query(JobRun).update({JobRun.started_at: datetime.now(timezone.utc), JobRun.rows_upserted: 100})
+    db_session.commit()
+
+    summary = JobRunService(db_session).report(job_id="daily_cost_fetch")["jobs"]["daily_cost_fetch"]
+    assert (summary["runs"], summary["success"], summary["skipped"]) == (5, 4, 1)
+    assert summary["duration_p50_seconds"] == 25.0
+    assert summary["duration_max_seconds"] == 40.0
+    assert summary["rows_per_second"] == 4.0  # 400 rows in 100 seconds
+    with pytest.raises(ValueError):
+        JobRunService(db_session).report(limit=0)
+
+
+def test_anomaly_check_failures_reach_the_scheduler():
+    with patch("src.jobs.scheduler.get_db", return_value=iter([MagicMock()])), \
+         patch("src.jobs.scheduler.RecommendationService") as service:
+        service.return_value.refresh.side_effect = RuntimeError("database is locked")
+        with pytest.raises(RuntimeError, match="database is locked"):
+            check_for_anomalies()
+
+
+def test_job_runs_endpoint(db_session):
+    JobRunTracker(session_factory=sessionmaker(bind=db_session.get_bind())).record(
+        "anomaly_check", "success", started_at=datetime.now(timezone.utc), finished_at=datetime.now(timezone.utc)
+    )
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
+    try:
+        client = TestClient(app)
+        client.post("/auth/register", json={"username": "ops", "email": "ops@example.com", "password": "pw"})
+        token = client.post("/auth/token", data={"username": "ops", "password": "pw"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = client.get("/jobs/runs?job_id=anomaly_check", headers=headers)
+        assert_query_budget(response)
+        assert response.json()["jobs"]["anomaly_check"]["success"] == 1
+        assert client.get("/jobs/runs?days=0", headers=headers).status_code == 400
+    finally:
+        app.dependency_overrides = {}
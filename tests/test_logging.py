@@ -0,0 +1,66 @@
+import json
+import logging
+import queue
+from fastapi.testclient import TestClient
+from src.main import app
+from src.services.logging_service import (
+    ContextFilter, JsonFormatter, NonBlockingQueueHandler, SamplingFilter, configure_logging, new_correlation_id,
+    shutdown_logging
+)
+
+client = TestClient(app)
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), lineno=10):
+    return logging.LogRecord("src.test", level, "/app/src/test.py", lineno, msg, args, None)
+
+def test_json_records_carry_correlation_id_and_extras():
+    new_correlation_id("abc123")
+    record = _record()
+    record.duration_ms = 12.5
+    ContextFilter().filter(record)
+
+    entry = json.loads(JsonFormatter().format(NonBlockingQueueHandler(queue.Queue()).prepare(record)))
+    assert entry["message"] == "hello world"
+    assert entry["correlation_id"] == "abc123"
+    assert entry["duration_ms"] == 12.5
+    assert entry["level"] == "INFO"
+
+def test_sampling_filter_rate_limits_per_call_site_but_keeps_warnings():
+    sampler = SamplingFilter(rate_limit=3)
+    kept = [sampler.filter(_record()) for _ in range(10)]
+    assert kept.count(True) == 3
+
+    assert sampler.filter(_record(lineno=11))
+    assert all(sampler.filter(_record(level=logging.WARNING)) for _ in range(10))
+
+    dropped = SamplingFilter(rate_limit=100, sample_rates={"src.test": 0.0})
+    assert not dropped.filter(_record())
+
+def test_queue_handler_drops_instead_of_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    before = NonBlockingQueueHandler.dropped
+    handler.emit(_record())
+    handler.emit(_record())
+    assert NonBlockingQueueHandler.dropped == before + 1
+
+def test_shutdown_puts_back_the_replaced_handlers():
+    root = logging.getLogger()
+    shutdown_logging()  # configured when src.main was imported
+    console = logging.StreamHandler()
+    root.addHandler(console)
+    try:
+        configure_logging()
+        assert console not in root.handlers
+        assert any(isinstance(handler, NonBlockingQueueHandler) for handler in root.handlers)
+
+        shutdown_logging()
+        assert console in root.handlers
+        assert not any(isinstance(handler, NonBlockingQueueHandler) for handler in root.handlers)
+    finally:
+        root.removeHandler(console)
+        configure_logging()
+
+def test_request_id_is_propagated():
+    response = client.get("/health", headers={"X-Request-ID": "req-42"})
+    assert response.headers["X-Request-ID"] == "req-42"
+    assert len(client.get("/health").headers["X-Request-ID"]) == 32
@@ -0,0 +1,73 @@
+import asyncio
+import gzip
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from src.api.middleware import CompressionMiddleware, PerformanceMiddleware
+
+app = FastAPI()
+app.add_middleware(CompressionMiddleware, minimum_size=100)
+app.add_middleware(PerformanceMiddleware)
+
+@app.get("/small")
+def small():
+    return PlainTextResponse("ok")
+
+@app.get("/large")
+def large():
+    return PlainTextResponse("x" * 5000)
+
+@app.get("/stream")
+def stream():
+    return StreamingResponse(iter([b"a" * 500, b"b" * 500]), media_type="text/plain")
+
+@app.get("/events")
+def events():
+    return StreamingResponse(iter([b"event: costs\ndata: {}\n\n"]), media_type="text/event-stream")
+
+client = TestClient(app)
+
+def test_large_bodies_are_gzipped_and_small_ones_are_not():
+    response = client.get("/large")
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert int(response.headers["Content-Length"]) < 5000
+    assert response.text == "x" * 5000
+
+    response = client.get("/small")
+    assert "Content-Encoding" not in response.headers
+    assert response.text == "ok"
+
+def test_streamed_bodies_are_compressed_per_chunk():
+    chunks = []
+    disconnected = asyncio.Event()
+
+    async def receive():
+        # The client only goes away once the whole response was sent
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        chunks.append(message)
+        if message["type"] == "http.response.body" and not message.get("more_body"):
+            disconnected.set()
+
+    scope = {"type": "http", "method": "GET", "path": "/stream", "raw_path": b"/stream", "query_string": b"",
+             "headers": [(b"accept-encoding", b"gzip")], "root_path": "", "scheme": "http",
+             "server": ("test", 80), "client": ("test", 1), "http_version": "1.1"}
+    asyncio.run(app(scope, receive, send))
+
+    bodies = [m for m in chunks if m["type"] == "http.response.body"]
+    # Every chunk is flushed so the client can decode it without waiting for the end
+    assert bodies[0]["more_body"] and bodies[0]["body"]
+    assert gzip.decompress(b"".join(m["body"] for m in bodies)) == b"a" * 500 + b"b" * 500
+
+def test_event_streams_pass_through_uncompressed():
+    response = client.get("/events")
+    assert "Content-Encoding" not in response.headers
+    assert response.text.startswith("event: costs")
+
+def test_performance_headers():
+    response = client.get("/small", headers={"X-Request-ID": "r1"})
+    assert response.headers["X-Request-ID"] == "r1"
+    assert float(response.headers["X-Process-Time"]) >= 0
+    assert response.headers["X-DB-Statements"] == "0"
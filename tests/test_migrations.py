@@ -0,0 +1,16 @@
+from alembic.autogenerate import compare_metadata
+from alembic.migration import MigrationContext
+from sqlalchemy import create_engine
+from src.models.database import Base, import_models, run_migrations
+
+def test_migrations_match_models(tmp_path):
+    import_models()
+    url = f"sqlite:///{tmp_path / 'migrated.db'}"
+    run_migrations(database_url=url)
+
+    engine = create_engine(url)
+    with engine.connect() as conn:
+        diff = compare_metadata(MigrationContext.configure(conn), Base.metadata)
+    engine.dispose()
+
+    assert diff == []
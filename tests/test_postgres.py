@@ -0,0 +1,146 @@
+import csv
+import os
+from collections import Counter
+from datetime import date
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+from src.models import partitioning
+from src.models.cost_model import CloudCost
+from src.models.partitioning import months_between, partition_ddl, partition_name
+from src.services.ingestion_service import IngestionService
+
+TEST_POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+
+def _records(days, services=("EC2", "S3")):
+    return [
+        {"date": day.isoformat(), "service": service, "cost": 2.0, "usage": 1.0, "account_id": "1"}
+        for day in days for service in services
+    ]
+
+
+class PgStandIn:
+    """Session stand-in recording the statements and COPY data a PostgreSQL session would receive."""
+
+    def __init__(self):
+        self.statements = []
+        self.copied = []
+        self.commits = 0
+        self.partitions = set()
+
+    def get_bind(self):
+        return SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), url="postgresql://stand-in/costs")
+
+    def execute(self, statement, params=None):
+        self.statements.append(str(statement))
+        if "PARTITION OF" in str(statement):
+            self.partitions.add(str(statement).split()[5])
+        if "FROM pg_inherits" in str(statement):
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: sorted(self.partitions)))
+        if "INSERT INTO cloud_costs" not in str(statement):
+            return SimpleNamespace(all=lambda: [])
+        # Every staged row is new: report inserted rows per date like the RETURNING query
+        counts = Counter(date.fromisoformat(row[0]) for row in self.copied)
+        return SimpleNamespace(all=lambda: sorted(counts.items()))
+
+    def commit(self):
+        self.commits += 1
+
+    def connection(self):
+        stand_in = self
+
+        class Cursor:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def copy_expert(self, sql, buffer):
+                stand_in.statements.append(sql)
+                stand_in.copied = list(csv.reader(buffer))
+
+        return SimpleNamespace(execute=self.execute,
+                               connection=SimpleNamespace(driver_connection=SimpleNamespace(cursor=Cursor)))
+
+
+def test_partition_ddl_covers_one_month():
+    assert partition_name(date(2025, 12, 1)) == "cloud_costs_y2025m12"
+    assert partition_ddl(date(2025, 12, 17)) == (
+        "CREATE TABLE IF NOT EXISTS cloud_costs_y2025m12 PARTITION OF cloud_costs "
+        "FOR VALUES FROM ('2025-12-01') TO ('2026-01-01')"
+    )
+    assert months_between(date(2025, 11, 30), date(2026, 1, 1)) == [
+        date(2025, 11, 1), date(2025, 12, 1), date(2026, 1, 1)
+    ]
+
+
+def test_bulk_load_falls_back_to_inserts_on_sqlite(db_session, monkeypatch):
+    monkeypatch.setattr("src.services.ingestion_service.COPY_BATCH_SIZE", 3)
+    ingestion = IngestionService(db_session)
+    ingestion.store_cost_records(_records([date(2025, 1, 1)]))
+
+    records = _records([date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)])
+    assert ingestion.bulk_load_cost_records(iter(records)) == 4
+    assert db_session.query(CloudCost).count() == 6
+    assert ingestion.touched_dates == {date(2025, 1, 1), date(2025, 1, 2), date(2025, 1, 3)}
+
+
+def test_bulk_load_copies_batches_into_partitions(monkeypatch):
+    monkeypatch.setattr("src.services.ingestion_service.COPY_BATCH_SIZE", 1000)
+    db = PgStandIn()
+    ingestion = IngestionService(db)
+
+    stored = ingestion.bulk_load_cost_records(_records([date(2025, 1, 31), date(2025, 2, 1)]))
+
+    assert stored == 4
+    assert ingestion.touched_dates == {date(2025, 1, 31), date(2025, 2, 1)}
+    assert [s for s in db.statements if "PARTITION OF" in s] == [
+        partition_ddl(date(2025, 1, 1)), partition_ddl(date(2025, 2, 1))
+    ]
+    assert any(s.startswith("COPY cloud_costs_staging") for s in db.statements)
+    assert db.copied[0][:5] == ["2025-01-31", "EC2", "2.0", "1.0", "1"]
+    assert db.copied[0][5] == ""  # No region: NULL in CSV format
+    # The loaded periods' rollups are marked stale in the same transaction (week and month)
+    assert sum(s.startswith("DELETE FROM rollup_periods") for s in db.statements) == 2
+
+    # Existing partitions are not created again
+    db.statements.clear()
+    ingestion.bulk_load_cost_records(_records([date(2025, 2, 2)]))
+    assert not any("PARTITION OF" in s for s in db.statements)
+
+    # A partition dropped by another process (e.g. the retention job) is created again
+    db.partitions.discard(partition_name(date(2025, 2, 1)))
+    db.statements.clear()
+    ingestion.bulk_load_cost_records(_records([date(2025, 2, 3)]))
+    assert [s for s in db.statements if "PARTITION OF" in s] == [partition_ddl(date(2025, 2, 1))]
+
+
+@pytest.mark.skipif(not TEST_POSTGRES_URL, reason="TEST_POSTGRES_URL (an empty PostgreSQL database) is not set")
+def test_partitioned_postgres_prunes_and_drops_months():
+    from src.models.database import run_migrations
+
+    run_migrations(database_url=TEST_POSTGRES_URL)
+    engine = create_engine(TEST_POSTGRES_URL)
+    db = sessionmaker(bind=engine)()
+    try:
+        ingestion = IngestionService(db)
+        days = [date(2024, 1, 15), date(2024, 2, 15), date(2024, 3, 15)]
+        assert ingestion.bulk_load_cost_records(_records(days)) == 6
+        assert ingestion.bulk_load_cost_records(_records(days)) == 0
+
+        names = [name for _, name in partitioning.list_partitions(db)]
+        assert {"cloud_costs_y2024m01", "cloud_costs_y2024m02", "cloud_costs_y2024m03"} <= set(names)
+        plan = "\n".join(db.execute(text(
+            "EXPLAIN SELECT sum(cost) FROM cloud_costs WHERE date BETWEEN '2024-02-01' AND '2024-02-29'"
+        )).scalars())
+        assert "cloud_costs_y2024m02" in plan and "cloud_costs_y2024m01" not in plan
+
+        dropped, rows = partitioning.drop_partitions_before(db, date(2024, 3, 1))
+        assert dropped == ["cloud_costs_y2024m01", "cloud_costs_y2024m02"] and rows == 4
+        assert db.query(CloudCost).count() == 2
+    finally:
+        db.close()
+        engine.dispose()
@@ -0,0 +1,101 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.main import app
+from src.api.auth_routes import get_current_user
+from src.services.cur_import import normalize_column
+from src.services.profiler import SamplingProfiler, profiler, to_collapsed, to_speedscope
+from src.services.simulation_engine import SimulationEngine
+
+client = TestClient(app)
+
+def _busy(seconds):
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        SimulationEngine.scenario_grid([0.0, 1.0], [0.5], ["reserved_1yr"], [0.0], [0.0])
+
+def test_timed_capture_samples_application_frames():
+    sampler = SamplingProfiler()
+    sampler.start(seconds=0.3, hz=200)
+    _busy(0.4)
+    profile = sampler.stop()
+
+    assert profile["samples"] > 0
+    collapsed = to_collapsed(profile)
+    assert "scenario_grid (src/services/simulation_engine.py:" in collapsed
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.splitlines())
+
+    speedscope = to_speedscope(profile)
+    sampled = speedscope["profiles"][0]
+    assert len(sampled["samples"]) == len(sampled["weights"])
+    assert max(max(s) for s in sampled["samples"]) < len(speedscope["shared"]["frames"])
+
+def test_route_rule_only_samples_matching_requests():
+    sampler = SamplingProfiler()
+    sampler.profile_route("^/budget/simulate$", sample_rate=1.0, hz=200, seconds=30)
+
+    with sampler.profile_request("/costs/daily"):
+        _busy(0.1)
+    assert not sampler.running
+
+    with sampler.profile_request("/budget/simulate"), sampler.profile_thread():
+        _busy(0.2)
+    assert sampler.status()["route_rule"]["profiled_requests"] == 1
+    assert sampler.stop()["samples"] > 0
+
+def test_route_profiles_leave_out_concurrent_requests():
+    sampler = SamplingProfiler()
+    sampler.profile_route("^/budget/simulate$", sample_rate=1.0, hz=200, seconds=30)
+    done = threading.Event()
+
+    def unrelated_request():
+        while not done.is_set():
+            normalize_column("lineItem/UnblendedCost")
+
+    other = threading.Thread(target=unrelated_request)
+    other.start()
+    try:
+        with sampler.profile_request("/budget/simulate"), sampler.profile_thread():
+            _busy(0.2)
+    finally:
+        done.set()
+        other.join()
+
+    collapsed = to_collapsed(sampler.stop())
+    assert "scenario_grid (" in collapsed
+    assert "normalize_column" not in collapsed
+
+def test_expired_route_rule_stops_without_joining_the_sampler():
+    sampler = SamplingProfiler()
+    sampler.profile_route("^/budget/simulate$", sample_rate=1.0, hz=200, seconds=30)
+
+    with sampler.profile_request("/budget/simulate"), sampler.profile_thread():
+        _busy(0.1)
+        sampler.route_rule["expires"] = 0
+        thread = sampler._thread
+        with patch.object(thread, "join", side_effect=AssertionError("joined on the request path")):
+            with sampler.profile_request("/budget/simulate"):
+                pass
+        assert sampler.route_rule is None
+
+    # The sampler publishes the profile itself as it exits
+    thread.join()
+    assert not sampler.running
+    assert sampler.profile["samples"] > 0
+
+def test_profiler_endpoints_are_admin_only():
+    app.dependency_overrides[get_current_user] = lambda: MagicMock(username="alice")
+    try:
+        assert client.get("/admin/profiler").status_code == 403
+
+        with patch('src.api.auth_routes.ADMIN_USERS', {"alice"}):
+            assert client.post("/admin/profiler/start", json={"seconds": 0, "hz": 100}).status_code == 400
+            assert client.post("/admin/profiler/start", json={"seconds": 0.1, "hz": 100}).status_code == 200
+            assert client.post("/admin/profiler/stop").json()["running"] is False
+            response = client.get("/admin/profiler/profile?format=speedscope")
+            assert response.status_code == 200
+            assert response.json()["profiles"][0]["type"] == "sampled"
+    finally:
+        profiler.stop()
+        app.dependency_overrides = {}
@@ -0,0 +1,47 @@
+from datetime import date
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.models.database import get_db, get_read_db
+from src.models.cost_model import CloudCost
+from src.services.query_stats import assert_query_budget, track_queries
+
+@pytest.fixture
+def client(db_session):
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
+    yield TestClient(app)
+    app.dependency_overrides = {}
+
+def _token(client):
+    client.post("/auth/register", json={"username": "alice", "email": "alice@example.com", "password": "pw"})
+    response = client.post("/auth/token", data={"username": "alice", "password": "pw"})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+def test_endpoints_stay_within_query_budget(client):
+    response = client.post("/auth/register", json={"username": "bob", "email": "bob@example.com", "password": "pw"})
+    assert response.headers["X-DB-Query-Budget"] == "4"
+    assert_query_budget(response)
+
+    headers = _token(client)
+    for path in ("/costs/daily", "/budgets", "/budgets/status", "/monitoring/health"):
+        assert_query_budget(client.get(path, headers=headers))
+
+def test_query_budget_failure_is_reported(client):
+    response = client.get("/costs/daily", headers=_token(client))
+    assert int(response.headers["X-DB-Statements"]) == 2
+    with pytest.raises(AssertionError, match="ran 2 SQL statements; the budget is 1"):
+        assert_query_budget(response, max_statements=1)
+
+def test_track_queries_counts_statements_rows_and_repeats(db_session):
+    db_session.add_all([CloudCost(date=date(2025, 1, 1), service=f"S{i}", cost=1.0, usage=1.0, account_id="1") for i in range(3)])
+    db_session.commit()
+
+    with track_queries() as stats:
+        for service in ("S0", "S1", "S2"):
+            db_session.query(CloudCost).filter(CloudCost.service == service).all()
+        db_session.query(CloudCost).all()
+
+    assert stats.statements == 4
+    assert stats.rows == 6
+    assert stats.db_time > 0
+    assert stats.repeated()[0][1] == 3
@@ -0,0 +1,77 @@
+import threading
+import time
+from unittest.mock import MagicMock, patch
+from fastapi.testclient import TestClient
+from src.main import app
+from src.api.auth_routes import get_current_user
+from src.models.database import get_db, get_read_db
+from src.services.rate_limiter import ConcurrencyLimiter, SingleFlight, TokenBucketLimiter, rate_limiter
+
+client = TestClient(app)
+
+def test_token_bucket_allows_burst_then_throttles():
+    limiter = TokenBucketLimiter()
+    assert [limiter.acquire("u:route", rate=1.0, burst=2)[0] for _ in range(3)] == [True, True, False]
+    allowed, retry_after = limiter.acquire("u:route", rate=1.0, burst=2)
+    assert not allowed and 0 < retry_after <= 1.0
+    # Buckets are independent per key
+    assert limiter.acquire("other:route", rate=1.0, burst=2)[0]
+
+def test_idle_full_buckets_are_pruned(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: clock[0])
+    limiter = TokenBucketLimiter()
+    limiter.acquire("idle:route", rate=1.0, burst=2)
+    limiter.acquire("busy:route", rate=0.01, burst=2)
+
+    # The idle bucket refilled after 2 seconds; the slow one needs 200
+    clock[0] += TokenBucketLimiter.PRUNE_INTERVAL
+    limiter.acquire("new:route", rate=1.0, burst=2)
+    assert set(limiter._buckets) == {"busy:route", "new:route"}
+
+def test_concurrency_limiter_sheds_excess():
+    limiter = ConcurrencyLimiter()
+    assert limiter.try_acquire("fetch", 1)
+    assert not limiter.try_acquire("fetch", 1)
+    limiter.release("fetch")
+    assert limiter.try_acquire("fetch", 1)
+
+def test_single_flight_coalesces_concurrent_calls():
+    flight = SingleFlight()
+    calls = []
+    results = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return {"records": 3}
+
+    threads = [threading.Thread(target=lambda: results.append(flight.run("yesterday", slow_fetch)))
+               for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results == [{"records": 3}] * 5
+    assert flight.coalesced == 4
+
+@patch('src.api.routes.AWSCostService')
+def test_costs_fetch_is_rate_limited_per_user(mock_service_class, db_session):
+    mock_service_class.return_value.get_yesterday_costs.return_value = [
+        {'date': '2024-01-01', 'service': 'EC2', 'cost': 1.0, 'usage': 1.0, 'account_id': '1'}
+    ]
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
+    rate_limiter.reset()
+    try:
+        app.dependency_overrides[get_current_user] = lambda: MagicMock(username="limited")
+        statuses = [client.post("/costs/fetch").status_code for _ in range(3)]
+        assert statuses == [200, 200, 429]
+        assert int(client.post("/costs/fetch").headers["Retry-After"]) >= 1
+
+        app.dependency_overrides[get_current_user] = lambda: MagicMock(username="someone-else")
+        assert client.post("/costs/fetch").status_code == 200
+    finally:
+        rate_limiter.reset()
+        app.dependency_overrides = {}
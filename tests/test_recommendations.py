@@ -0,0 +1,103 @@
+from datetime import date, timedelta
+import pytest
+from fastapi.testclient import TestClient
+from src.main import app
+from src.models.cost_model import CloudCost
+from src.models.database import get_db, get_read_db
+from src.services.monitoring_service import monitoring
+from src.services.query_stats import assert_query_budget
+from src.services.anomaly_detection import AnomalyDetector
+from src.services.recommendation_service import RecommendationService
+
+def _seed(db_session, idle_days=7):
+    today = date.today()
+    for offset in range(idle_days):
+        day = today - timedelta(days=offset)
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=10.0, usage=1.0, account_id="1"))
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=10.0, usage=80.0, account_id="2"))
+        db_session.add(CloudCost(date=day, service="Amazon RDS", cost=4.0, usage=2.0, account_id="2"))
+    db_session.commit()
+
+def test_findings_are_deduplicated_per_type_service_and_account(db_session):
+    _seed(db_session)
+    by_category = RecommendationService(db_session).refresh()
+
+    idle = by_category["idle_instances"]
+    assert len(idle) == 1
+    assert idle[0]["account_id"] == "1"
+    assert idle[0]["occurrences"] == 7
+    # Monthly run rate of the idle instance, not seven days of findings added up
+    assert idle[0]["potential_savings"] == 300.0
+    assert by_category["underused_rds"][0]["potential_savings"] == pytest.approx(36.0)
+
+    # Refreshing again updates rows in place
+    RecommendationService(db_session).refresh()
+    assert len(RecommendationService(db_session).list()) == 2
+
+def test_lifecycle_feeds_the_savings_ledger(db_session):
+    _seed(db_session)
+    service = RecommendationService(db_session)
+    service.refresh()
+    idle = service.list(type="idle_ec2")[0]
+
+    assert service.set_status(idle["id"], "implemented")["implemented_at"] is not None
+    assert service.list(status="implemented")[0]["id"] == idle["id"]
+    report = monitoring.calculate_total_savings(db=db_session)
+    assert report["total_actual_savings"] == 300.0
+    assert report["implemented_recommendations"] == 1
+
+    with pytest.raises(ValueError):
+        service.set_status(idle["id"], "done")
+    assert service.set_status(999, "acknowledged") is None
+
+def test_stale_open_recommendations_are_removed_but_acted_on_ones_kept(db_session):
+    _seed(db_session)
+    service = RecommendationService(db_session)
+    service.refresh()
+    rds = service.list(type="underused_rds")[0]
+    service.set_status(rds["id"], "acknowledged")
+
+    db_session.query(CloudCost).delete()
+    db_session.commit()
+    # Cube is refreshed by ingestion; force a reload for this direct delete
+    from src.services.cost_cube import CostCube
+    CostCube.for_session(db_session).load(db_session)
+    service.refresh()
+
+    assert service.list() == []
+    assert [r["id"] for r in service.list(status="acknowledged")] == [rds["id"]]
+
+def test_recommendations_endpoint_is_an_indexed_read(db_session):
+    _seed(db_session)
+    RecommendationService(db_session).refresh()
+    app.dependency_overrides[get_db] = app.dependency_overrides[get_read_db] = lambda: db_session
+    try:
+        client = TestClient(app)
+        client.post("/auth/register", json={"username": "rec", "email": "rec@example.com", "password": "pw"})
+        token = client.post("/auth/token", data={"username": "rec", "password": "pw"}).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+
+        response = client.get("/recommendations?type=idle_ec2", headers=headers)
+        assert_query_budget(response)
+        assert [r["account_id"] for r in response.json()] == ["1"]
+
+        recommendation_id = response.json()[0]["id"]
+        response = client.patch(f"/recommendations/{recommendation_id}", json={"status": "acknowledged"}, headers=headers)
+        assert response.json()["status"] == "acknowledged"
+        assert client.patch("/recommendations/999", json={"status": "open"}, headers=headers).status_code == 404
+        assert client.get("/recommendations?status=closed", headers=headers).status_code == 400
+    finally:
+        app.dependency_overrides = {}
+
+def test_failed_detector_keeps_its_open_recommendations(db_session, monkeypatch):
+    _seed(db_session)
+    RecommendationService(db_session).refresh()
+
+    def broken(self):
+        raise RuntimeError("detector crashed")
+    monkeypatch.setattr(AnomalyDetector, "detect_idle_instances", broken)
+    service = RecommendationService(db_session)
+    by_category = service.refresh()
+
+    assert service.detector_timings["idle_instances"]["status"] == "error"
+    assert len(by_category["idle_instances"]) == 1
@@ -0,0 +1,101 @@
+import time
+from datetime import date
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from src.models.cost_model import CloudCost
+from src.models.replicas import ReplicaRouter
+from src.services.cost_cube import CostCube
+
+
+@pytest.fixture
+def databases(tmp_path):
+    """A primary and two replica SQLite files; each holds one row naming its database."""
+    engines = {}
+    for name in ("primary", "replica-a", "replica-b"):
+        engine = engines[name] = create_engine(f"sqlite:///{tmp_path / name}.db")
+        CloudCost.__table__.create(bind=engine)
+        with sessionmaker(bind=engine)() as db:
+            db.add(CloudCost(date=date(2025, 1, 1), service=name, cost=1.0, usage=1.0, account_id="1"))
+            db.commit()
+    yield engines
+    for engine in engines.values():
+        engine.dispose()
+
+
+def _served_by(router):
+    with router.read_session() as db:
+        return db.query(CloudCost.service).scalar()
+
+
+def _router(engines, lag, **kwargs):
+    def probe(engine):
+        value = lag[str(engine.url).rsplit("/", 1)[-1][:-3]]
+        if isinstance(value, Exception):
+            raise value
+        return value
+    return ReplicaRouter(sessionmaker(bind=engines["primary"]), [engines["replica-a"], engines["replica-b"]],
+                         max_lag_seconds=10, check_interval=3600, probe=probe, **kwargs)
+
+
+def test_reads_round_robin_over_healthy_replicas(databases):
+    router = _router(databases, {"replica-a": 0.0, "replica-b": 2.0})
+    router.check()
+
+    assert sorted(_served_by(router) for _ in range(4)) == ["replica-a"] * 2 + ["replica-b"] * 2
+    assert [replica["reads"] for replica in router.stats()["replicas"]] == [2, 2]
+
+
+def test_lagging_or_unreachable_replicas_fall_back_to_the_primary(databases):
+    lag = {"replica-a": 45.0, "replica-b": RuntimeError("connection refused")}
+    router = _router(databases, lag)
+    router.check()
+
+    assert _served_by(router) == "primary"
+    stats = router.stats()
+    assert stats["primary_fallbacks"] == 1
+    assert stats["replicas"][0]["lag_seconds"] == 45.0 and not stats["replicas"][0]["healthy"]
+    assert stats["replicas"][1]["error"] == "connection refused"
+
+    # A replica that catches up goes back into rotation
+    lag["replica-a"] = 1.0
+    router.check()
+    assert _served_by(router) == "replica-a"
+
+
+def test_monitor_thread_probes_real_replicas(databases):
+    router = ReplicaRouter(sessionmaker(bind=databases["primary"]), [databases["replica-a"]], check_interval=3600)
+
+    # The first read starts the monitor; until its first probe completes reads use the primary
+    _served_by(router)
+    deadline = time.monotonic() + 5
+    while not router.stats()["replicas"][0]["healthy"] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert router.stats()["replicas"][0]["lag_seconds"] == 0.0
+    assert _served_by(router) == "replica-a"
+
+
+def test_without_replicas_reads_use_the_primary(databases):
+    router = ReplicaRouter(sessionmaker(bind=databases["primary"]), [])
+    assert _served_by(router) == "primary"
+    assert router.stats() == {"max_lag_seconds": 30.0, "primary_fallbacks": 0, "replicas": []}
+
+
+def test_ingestion_invalidates_replica_cubes(databases):
+    primary = sessionmaker(bind=databases["primary"])()
+    replica = sessionmaker(bind=databases["replica-a"])()
+    try:
+        assert CostCube.snapshot_for(replica).services == ("replica-a",)
+
+        # Ingestion on the primary, then replicated
+        primary.add(CloudCost(date=date(2025, 1, 2), service="ingested", cost=2.0, usage=1.0, account_id="1"))
+        primary.commit()
+        replica.add(CloudCost(date=date(2025, 1, 2), service="ingested", cost=2.0, usage=1.0, account_id="1"))
+        replica.commit()
+        CostCube.refresh_loaded(primary, [date(2025, 1, 2)])
+
+        assert set(CostCube.snapshot_for(replica).services) == {"replica-a", "ingested"}
+    finally:
+        primary.close()
+        replica.close()
+
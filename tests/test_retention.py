@@ -0,0 +1,124 @@
+import csv
+import gzip
+from datetime import date
+from unittest.mock import patch
+import pytest
+from sqlalchemy import func
+from src.models.allocation_model import CostAllocation
+from src.models.cost_model import CloudCost
+from src.models.rollup_model import CostRollup
+from src.services import retention_service
+from src.services.allocation_service import AllocationService
+from src.services.ingestion_service import IngestionService
+from src.services.retention_service import RetentionService, add_months
+
+TODAY = date(2026, 3, 15)
+
+def _ingest(db, days):
+    ingestion = IngestionService(db)
+    ingestion.store_cost_records([
+        {"date": day.isoformat(), "service": service, "cost": 10.0, "usage": 1.0, "account_id": "1"}
+        for day in days for service in ("EC2", "S3")
+    ])
+    ingestion.on_ingestion_complete()
+
+def test_add_months():
+    assert add_months(date(2026, 3, 15), -13) == date(2025, 2, 1)
+    assert add_months(date(2026, 1, 31), -1) == date(2025, 12, 1)
+
+def test_old_raw_rows_are_compacted_into_monthly_rollups(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention_service, "RETENTION_AGGREGATE_MONTHS", 0)
+    AllocationService(db_session).create_rule("all", "direct", "platform")
+    _ingest(db_session, [date(2024, 12, 30), date(2025, 1, 5), date(2025, 1, 20), date(2025, 2, 3)])
+    # Raw rows inserted without the ingestion hooks have no rollups yet
+    db_session.add(CloudCost(date=date(2024, 11, 2), service="EC2", cost=7.0, usage=1.0, account_id="1"))
+    db_session.commit()
+
+    stats = RetentionService(db_session, archive_dir=str(tmp_path), chunk_size=3).run(today=TODAY)
+
+    assert stats["raw_cutoff"] == "2025-02-01"
+    assert stats["deleted_raw_rows"] == 7
+    assert [d for (d,) in db_session.query(CloudCost.date).distinct()] == [date(2025, 2, 3)]
+    monthly = dict(db_session.query(CostRollup.period_start, CostRollup.cost).filter(
+        CostRollup.granularity == "month", CostRollup.service == "EC2").all())
+    assert monthly[date(2024, 11, 1)] == 7.0 and monthly[date(2025, 1, 1)] == 20.0
+    assert db_session.query(CostRollup).filter(
+        CostRollup.granularity == "week", CostRollup.period_start < date(2025, 2, 1)).count() == 0
+
+    # Daily allocations become one row per month, with the same totals
+    assert AllocationService(db_session).chargeback(date(2025, 1, 1), date(2025, 1, 31))["total"] == 40.0
+    assert db_session.query(CostAllocation).filter(CostAllocation.date < date(2025, 2, 1)).count() == 4
+    # Rule changes only reallocate the remaining raw history
+    AllocationService(db_session).create_rule("late", "direct", "other", priority=1)
+    assert AllocationService(db_session).chargeback(date(2025, 1, 1), date(2025, 1, 31))["total"] == 40.0
+
+    assert stats["maintenance"] == ["VACUUM", "ANALYZE"]
+    # A second run has nothing left to do
+    again = RetentionService(db_session, archive_dir=str(tmp_path)).run(today=TODAY)
+    assert again["deleted_raw_rows"] == 0 and again["compacted_allocations"] == 0
+    assert again["maintenance"] == ["ANALYZE"]
+
+def test_old_monthly_rollups_are_archived(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(retention_service, "RETENTION_AGGREGATE_MONTHS", 24)
+    _ingest(db_session, [date(2023, 6, 10), date(2024, 6, 10)])
+
+    stats = RetentionService(db_session, archive_dir=str(tmp_path)).run(today=TODAY)
+
+    assert stats["archive_cutoff"] == "2024-03-01"
+    assert stats["archived_rollups"] == 2
+    remaining = db_session.query(CostRollup.period_start).filter(CostRollup.granularity == "month").distinct().all()
+    assert remaining == [(date(2024, 6, 1),)]
+    (archive,) = tmp_path.glob("cost_rollups_2023-06_*.csv.gz")
+    with gzip.open(archive, "rt") as f:
+        rows = list(csv.DictReader(f))
+    assert sorted(row["service"] for row in rows) == ["EC2", "S3"]
+    assert float(rows[0]["cost"]) == 10.0
+
+def _january(db):
+    return db.query(func.sum(CostRollup.cost), func.sum(CostRollup.row_count)).filter(
+        CostRollup.granularity == "month", CostRollup.period_start == date(2025, 1, 1)).one()
+
+def test_interrupted_compaction_resumes_without_losing_rows(db_session, tmp_path):
+    _ingest(db_session, [date(2025, 1, 5), date(2025, 1, 20)])
+    service = RetentionService(db_session, archive_dir=str(tmp_path), chunk_size=3)
+    fold = service._fold_chunk
+    calls = []
+
+    def fold_once(month, ids):
+        if calls:
+            raise RuntimeError("killed")
+        calls.append(ids)
+        fold(month, ids)
+
+    with patch.object(service, "_fold_chunk", side_effect=fold_once), pytest.raises(RuntimeError):
+        service.run(today=TODAY)
+    assert db_session.query(CloudCost).count() == 1
+    assert _january(db_session) == (30.0, 3)
+
+    stats = service.run(today=TODAY)
+
+    assert (stats["compacted_months"], stats["deleted_raw_rows"]) == (1, 1)
+    assert _january(db_session) == (40.0, 4)
+
+def test_rows_landing_in_a_compacted_month_are_folded_in(db_session, tmp_path):
+    _ingest(db_session, [date(2025, 1, 5), date(2025, 1, 20)])
+    RetentionService(db_session, archive_dir=str(tmp_path)).run(today=TODAY)
+
+    # A late revision: the rollup refresh after ingestion leaves the compacted month alone
+    _ingest(db_session, [date(2025, 1, 31)])
+    assert _january(db_session) == (40.0, 4)
+
+    stats = RetentionService(db_session, archive_dir=str(tmp_path)).run(today=TODAY)
+
+    assert stats["deleted_raw_rows"] == 2
+    assert _january(db_session) == (60.0, 6)
+    assert db_session.query(CloudCost).count() == 0
+
+def test_the_week_straddling_the_cutoff_keeps_its_rollup(db_session, tmp_path):
+    _ingest(db_session, [date(2025, 1, 20), date(2025, 1, 28), date(2025, 2, 1)])
+
+    RetentionService(db_session, archive_dir=str(tmp_path)).run(today=TODAY)
+
+    weeks = [start for (start,) in db_session.query(CostRollup.period_start).filter(
+        CostRollup.granularity == "week").distinct()]
+    assert weeks == [date(2025, 1, 27)]
@@ -0,0 +1,69 @@
+from datetime import date, timedelta
+import numpy as np
+import pytest
+from src.models.cost_model import CloudCost
+from src.services.cost_cube import CubeSnapshot
+from src.services.simulation_engine import SimulationEngine, CATEGORIES, EC2_IDLE, EC2, OTHER, RDS_UNDERUSED
+
+def _history(days=30):
+    history = np.zeros((len(CATEGORIES), days))
+    history[EC2_IDLE] = 10.0
+    history[EC2] = 100.0
+    history[OTHER] = 50.0
+    return history
+
+def test_evaluate_applies_transforms():
+    scenarios = SimulationEngine.scenario_grid(
+        stop_idle=[0.0, 1.0], commitment_coverage=[0.0], commitment_plans=["reserved_1yr"],
+        spot_fraction=[0.0, 0.5], rds_downsize=[0.0]
+    )
+    totals = SimulationEngine.evaluate(_history(), scenarios, spot_discount=0.7)
+
+    # (stop_idle, spot_fraction) = (0, 0), (0, 0.5), (1, 0), (1, 0.5)
+    assert totals == pytest.approx([160 * 30, (55 + 55 * 0.3 + 50) * 30, 150 * 30, (50 + 50 * 0.3 + 50) * 30])
+
+def test_commitment_discount_only_applies_to_committed_spend():
+    scenarios = SimulationEngine.scenario_grid(
+        stop_idle=[0.0], commitment_coverage=[1.0], commitment_plans=["reserved_3yr"],
+        spot_fraction=[0.0], rds_downsize=[0.0]
+    )
+    totals = SimulationEngine.evaluate(_history(), scenarios)
+
+    assert totals[0] == pytest.approx((110 * 0.4 + 50) * 30)
+
+def test_rank_scenarios_from_database(db_session):
+    today = date.today()
+    for offset in range(14):
+        day = today - timedelta(days=offset)
+        db_session.add(CloudCost(date=day, service="Amazon EC2", cost=20.0, usage=1.0, account_id="1"))
+        db_session.add(CloudCost(date=day, service="Amazon S3", cost=5.0, usage=50.0, account_id="1"))
+    db_session.commit()
+
+    result = SimulationEngine(db_session).rank_scenarios(days=14, top_n=3)
+
+    assert result["scenarios_evaluated"] == 3 * 5 * 4 * 3 * 3
+    assert result["baseline_monthly_cost"] == 750.0
+    best = result["scenarios"][0]
+    assert best["stop_idle"] == 1.0
+    assert best["monthly_savings"] == 600.0
+
+def test_scenario_grid_rejects_unknown_plan():
+    with pytest.raises(ValueError):
+        SimulationEngine.scenario_grid([0.0], [0.5], ["lifetime"], [0.0], [0.0])
+
+def test_rank_scenarios_rejects_top_n_below_one(db_session):
+    with pytest.raises(ValueError, match="top_n"):
+        SimulationEngine(db_session).rank_scenarios(days=14, top_n=0)
+
+def test_cube_and_sql_history_categorize_services_alike(db_session, monkeypatch):
+    today = date.today()
+    for service, usage in (("Amazon EC2", 1.0), ("ec2-other", 50.0), ("Amazon Rds Proxy", 2.0), ("Amazon S3", 1.0)):
+        db_session.add(CloudCost(date=today, service=service, cost=10.0, usage=usage, account_id="1"))
+    db_session.commit()
+    from_cube = SimulationEngine(db_session).load_history(days=1)
+
+    monkeypatch.setattr(CubeSnapshot, "covers", lambda self, start: False)
+    from_sql = SimulationEngine(db_session).load_history(days=1)
+
+    assert np.array_equal(from_cube, from_sql)
+    assert from_sql[[EC2_IDLE, EC2, RDS_UNDERUSED, OTHER], 0].tolist() == [10.0, 10.0, 10.0, 10.0]